@@ -0,0 +1,11 @@
+import pytest
+
+
+@pytest.fixture(autouse=True, scope="session")
+def isolated_files():
+    from core.testing import IsolatedFiles
+
+    files = IsolatedFiles()
+    files.enable()
+    yield
+    files.disable()
@@ -1,7 +1,8 @@
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from http import HTTPStatus
 
 
+@override_settings(PERF_SAMPLE_RATE=0)
 class AboutUrlTests(TestCase):
     def setUp(self):
         self.guest_client = Client()
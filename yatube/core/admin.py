@@ -0,0 +1,25 @@
+from django.contrib import admin
+
+from .models import OutgoingEmail, Task
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'name', 'status', 'priority', 'attempts', 'run_after')
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'idempotency_key')
+
+
+admin.site.register(Task, TaskAdmin)
+
+
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'subject', 'recipients', 'status', 'attempts', 'created',
+        'sent_at')
+    list_filter = ('status',)
+    search_fields = ('subject', 'recipients')
+    exclude = ('message',)
+
+
+admin.site.register(OutgoingEmail, OutgoingEmailAdmin)
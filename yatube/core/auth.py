@@ -0,0 +1,81 @@
+import hashlib
+import secrets
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.crypto import constant_time_compare
+
+AUTH_USER_CACHE_TIMEOUT: int = 60 * 5
+
+
+def shared_cache():
+    """Кэш сессий: общий для процессов, иначе сброс виден одному из них."""
+    return caches[settings.SESSION_CACHE_ALIAS]
+
+
+def user_version_key(user_id):
+    return f"auth_user_version:{user_id}"
+
+
+def user_version(user_id):
+    """Версия пользователя, которая меняется при каждом сохранении.
+
+    Версия случайная, а не счётчик: если запись вытеснят из кэша, новая
+    версия не совпадёт ни с одной из прежних.
+    """
+    key = user_version_key(user_id)
+    version = shared_cache().get(key)
+    if version is None:
+        shared_cache().add(key, secrets.token_hex(8), None)
+        version = shared_cache().get(key)
+    return version
+
+
+def user_cache_key(user_id, session_hash):
+    digest = hashlib.md5(session_hash.encode()).hexdigest()
+    return f"auth_user:{user_id}:{user_version(user_id)}:{digest}"
+
+
+def get_cached_user(request):
+    """Пользователь сессии из кэша, без запроса к таблице пользователей.
+
+    Ключ включает хеш сессии и версию пользователя, поэтому после смены
+    пароля, деактивации или правки пользователя во всех процессах
+    читается свежая запись. Django при этом сбрасывает устаревшую сессию.
+    """
+    user_id = request.session.get(SESSION_KEY)
+    if user_id is None:
+        return AnonymousUser()
+
+    session_hash = request.session.get(HASH_SESSION_KEY) or ""
+    key = user_cache_key(user_id, session_hash)
+    user = shared_cache().get(key)
+    if user is not None:
+        if session_hash and constant_time_compare(
+                session_hash, user.get_session_auth_hash()):
+            return user
+        shared_cache().delete(key)
+
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        shared_cache().set(key, user, AUTH_USER_CACHE_TIMEOUT)
+    return user
+
+
+def bump_user_version(user_id):
+    shared_cache().set(user_version_key(user_id), secrets.token_hex(8), None)
+
+
+@receiver(post_save, sender=auth.get_user_model())
+@receiver(post_delete, sender=auth.get_user_model())
+def invalidate_cached_user(sender, instance, **kwargs):
+    bump_user_version(instance.pk)
+    # До фиксации транзакции другой процесс может прочитать старую строку
+    # и закэшировать её под новой версией, поэтому версия меняется ещё раз.
+    transaction.on_commit(lambda: bump_user_version(instance.pk))
@@ -0,0 +1,74 @@
+import math
+import statistics
+import time
+import tracemalloc
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+BENCHMARK_REPEAT: int = 20
+REGRESSION_THRESHOLD: float = 0.2
+
+
+def percentile(values, share):
+    """Перцентиль по ближайшему рангу; подходит и для одного замера."""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(share * len(ordered)) - 1, 0)]
+
+
+def measure(func, repeat=BENCHMARK_REPEAT):
+    """Время, число запросов и пик памяти вызова func.
+
+    Время меряется без tracemalloc, чтобы трассировка памяти его не
+    искажала; память — отдельным прогоном. Кроме медианы возвращаются
+    95-й и 99-й перцентили.
+    """
+    if repeat < 1:
+        raise ValueError("repeat должен быть положительным")
+    func()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    with CaptureQueriesContext(connection) as queries:
+        tracemalloc.start()
+        try:
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "median_ms": statistics.median(timings),
+        "p50_ms": percentile(timings, 0.5),
+        "p95_ms": percentile(timings, 0.95),
+        "p99_ms": percentile(timings, 0.99),
+        "queries": len(queries),
+        "peak_kb": peak / 1024,
+    }
+
+
+def regressions(baseline, current, threshold=REGRESSION_THRESHOLD,
+                metric="p95_ms"):
+    """Замеры из current, которые хуже сохранённых в baseline.
+
+    Время сравнивается с допуском threshold, число запросов — строго.
+    """
+    problems = []
+    for name, result in current.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if result[metric] > before[metric] * (1 + threshold):
+            problems.append(
+                f"{name}: {metric} {before[metric]:.2f} → "
+                f"{result[metric]:.2f}"
+            )
+        if result["queries"] > before["queries"]:
+            problems.append(
+                f"{name}: запросов {before['queries']} → "
+                f"{result['queries']}"
+            )
+    return problems
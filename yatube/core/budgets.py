@@ -0,0 +1,50 @@
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+# Одинаковый запрос, повторённый столько раз, считается признаком N+1.
+N_PLUS_ONE_THRESHOLD: int = 3
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_budget(max_queries):
+    """Объявляет, сколько SQL-запросов может сделать view."""
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+def get_budget(view):
+    return getattr(view, "query_budget", None)
+
+
+@contextmanager
+def record_queries():
+    """Собирает SQL всех запросов к базе внутри блока."""
+    queries = []
+
+    def record(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(record))
+        yield queries
+
+
+def budget_problems(queries, budget=None, threshold=N_PLUS_ONE_THRESHOLD):
+    """Превышение бюджета и повторяющиеся запросы в виде сообщений."""
+    problems = []
+    if budget is not None and len(queries) > budget:
+        problems.append(
+            f"{len(queries)} запросов при бюджете {budget}")
+    for sql, count in Counter(queries).items():
+        if count >= threshold:
+            problems.append(f"запрос повторён {count} раз: {sql}")
+    return problems
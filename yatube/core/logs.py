@@ -0,0 +1,19 @@
+import os
+from logging.handlers import RotatingFileHandler
+
+
+class PrivateRotatingFileHandler(RotatingFileHandler):
+    """Лог, который может читать только владелец процесса.
+
+    Каталог лога получает права 0700, а файлы, в том числе новые после
+    ротации, 0600.
+    """
+
+    def _open(self):
+        directory = os.path.dirname(self.baseFilename)
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        os.chmod(directory, 0o700)
+        fd = os.open(
+            self.baseFilename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        os.chmod(self.baseFilename, 0o600)
+        return os.fdopen(fd, self.mode, encoding=self.encoding)
@@ -0,0 +1,204 @@
+import datetime as dt
+import logging
+import pickle
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from .models import OutgoingEmail
+from .tasks import enqueue, task
+
+logger = logging.getLogger(__name__)
+
+EMAIL_BATCH_SIZE: int = 100
+EMAIL_MAX_ATTEMPTS: int = 5
+EMAIL_RETRY_DELAY: int = 60
+EMAIL_PRIORITY: int = 20
+EMAIL_SENDING_TIMEOUT: int = 60 * 10
+# Отправленные письма хранятся сутки: в них ссылки сброса пароля.
+EMAIL_SENT_RETENTION: int = 60 * 60 * 24
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Сохраняет письма в базу, а отправляет их фоновая задача.
+
+    Настоящая отправка идёт через QUEUED_EMAIL_BACKEND, поэтому запрос
+    не ждёт почтовый сервер.
+    """
+
+    def send_messages(self, email_messages):
+        rows = []
+        for message in email_messages:
+            connection, message.connection = message.connection, None
+            try:
+                rows.append(OutgoingEmail(
+                    subject=message.subject[:255],
+                    recipients=", ".join(message.recipients()),
+                    message=pickle.dumps(message),
+                ))
+            finally:
+                message.connection = connection
+        if not rows:
+            return 0
+        OutgoingEmail.objects.bulk_create(rows)
+        enqueue("core.send_emails", priority=EMAIL_PRIORITY)
+        return len(rows)
+
+
+def requeue_stale_emails(timeout=EMAIL_SENDING_TIMEOUT):
+    """Возвращает в очередь письма, отправитель которых завис или упал."""
+    return OutgoingEmail.objects.filter(
+        status=OutgoingEmail.SENDING,
+        claimed_at__lt=timezone.now() - dt.timedelta(seconds=timeout),
+    ).update(status=OutgoingEmail.PENDING)
+
+
+def purge_sent_emails(retention=EMAIL_SENT_RETENTION):
+    """Удаляет письма, отправленные раньше, чем retention секунд назад."""
+    deleted, _ = OutgoingEmail.objects.filter(
+        status=OutgoingEmail.SENT,
+        sent_at__lt=timezone.now() - dt.timedelta(seconds=retention),
+    ).delete()
+    return deleted
+
+
+@transaction.atomic
+def claim_emails(limit):
+    candidates = (
+        OutgoingEmail.objects
+        .filter(status=OutgoingEmail.PENDING)
+        .order_by("id")
+        .values_list("id", flat=True)[:limit]
+    )
+    return [
+        email_id
+        for email_id in list(candidates)
+        if OutgoingEmail.objects
+        .filter(id=email_id, status=OutgoingEmail.PENDING)
+        .update(status=OutgoingEmail.SENDING, claimed_at=timezone.now())
+    ]
+
+
+def send_batch(connection, email_ids):
+    """Отправляет пакет вне транзакции и записывает итог в короткой.
+
+    Письмо, которое не удалось прочитать (например, после обновления
+    Django), сразу помечается FAILED, а остальные письма уходят.
+    """
+    messages = []
+    attempts = {}
+    rows = OutgoingEmail.objects.filter(id__in=email_ids).order_by("id")
+    for row in rows:
+        try:
+            messages.append(pickle.loads(bytes(row.message)))
+        except Exception as error:
+            logger.exception("Не удалось прочитать письмо %d", row.id)
+            OutgoingEmail.objects.filter(id=row.id).update(
+                status=OutgoingEmail.FAILED,
+                attempts=row.attempts + 1,
+                last_error=repr(error),
+            )
+            continue
+        attempts[row.id] = row.attempts + 1
+    if not messages:
+        return True
+    try:
+        connection.send_messages(messages)
+    except Exception as error:
+        logger.exception("Не удалось отправить пакет из %d писем",
+                         len(messages))
+        record_failure(attempts, error)
+        return False
+    record_sent(attempts)
+    return True
+
+
+@transaction.atomic
+def record_failure(attempts, error):
+    for status, ids in [
+        (OutgoingEmail.FAILED, [
+            i for i, n in attempts.items() if n >= EMAIL_MAX_ATTEMPTS]),
+        (OutgoingEmail.PENDING, [
+            i for i, n in attempts.items() if n < EMAIL_MAX_ATTEMPTS]),
+    ]:
+        for email_id in ids:
+            OutgoingEmail.objects.filter(id=email_id).update(
+                status=status,
+                attempts=attempts[email_id],
+                last_error=repr(error),
+            )
+
+
+@transaction.atomic
+def record_sent(attempts):
+    for email_id, attempt in attempts.items():
+        OutgoingEmail.objects.filter(id=email_id).update(
+            status=OutgoingEmail.SENT,
+            attempts=attempt,
+            last_error="",
+            sent_at=timezone.now(),
+        )
+
+
+@task("core.send_emails", atomic=False)
+def send_emails(batch_size=EMAIL_BATCH_SIZE):
+    """Отправляет накопившиеся письма пакетами через одно соединение.
+
+    Задача не держит транзакцию, пока ждёт почтовый сервер: каждый пакет
+    забирается и отмечается отправленным в своей короткой транзакции.
+    Если почтовый сервер отказал, оставшиеся письма ждут следующей
+    задачи. Повторно может уйти только пакет, отправитель которого упал
+    между отправкой и отметкой: через EMAIL_SENDING_TIMEOUT такие письма
+    возвращаются в очередь.
+    """
+    requeue_stale_emails()
+    purge_sent_emails()
+    sent = 0
+    started = time.monotonic()
+    connection = get_connection(settings.QUEUED_EMAIL_BACKEND)
+    with connection:
+        while True:
+            email_ids = claim_emails(batch_size)
+            if not email_ids:
+                break
+            if not send_batch(connection, email_ids):
+                enqueue(
+                    "core.send_emails",
+                    priority=EMAIL_PRIORITY,
+                    delay=EMAIL_RETRY_DELAY,
+                )
+                break
+            sent += len(email_ids)
+    if sent:
+        logger.info("Отправлено писем: %d за %.3f с",
+                    sent, time.monotonic() - started)
+    return sent
+
+
+def delivery_stats():
+    """Число писем по статусам и время ожидания самого старого письма."""
+    stats = dict(
+        OutgoingEmail.objects
+        .order_by()
+        .values_list("status")
+        .annotate(Count("id"))
+    )
+    oldest = (
+        OutgoingEmail.objects
+        .filter(status=OutgoingEmail.PENDING)
+        .aggregate(oldest=Min("created"))["oldest"]
+    )
+    return {
+        "counts": {
+            status: stats.get(status, 0)
+            for status, _ in OutgoingEmail.STATUS_CHOICES
+        },
+        "oldest_pending_age": (
+            (timezone.now() - oldest).total_seconds() if oldest else None
+        ),
+    }
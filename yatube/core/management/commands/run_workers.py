@@ -0,0 +1,80 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+# Как часто удалять старые выполненные задачи, секунды.
+PURGE_INTERVAL: int = 60 * 10
+
+
+def init_worker():
+    django.setup()
+
+
+def run_task(task_id):
+    # Модуль импортируется в дочернем процессе до django.setup(),
+    # поэтому модели загружаются только здесь.
+    from core.tasks import execute
+
+    try:
+        return execute(task_id)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Выполняет фоновые задачи из очереди в пуле процессов"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes", type=int, default=multiprocessing.cpu_count(),
+            help="Количество процессов-воркеров",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=50,
+            help="Сколько задач забирать из очереди за раз",
+        )
+        parser.add_argument(
+            "--poll-interval", type=float, default=1.0,
+            help="Пауза в секундах, если очередь пуста",
+        )
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Разобрать очередь и завершиться",
+        )
+
+    def handle(self, *args, **options):
+        from core.tasks import claim, purge_done, requeue_stale
+
+        done = failed = 0
+        purged = None
+        # Воркеры запускаются начисто, а не форком процесса с открытым
+        # соединением к базе.
+        connections.close_all()
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=options["processes"],
+            mp_context=context,
+            initializer=init_worker,
+        ) as pool:
+            while True:
+                if purged is None or (
+                        time.monotonic() - purged >= PURGE_INTERVAL):
+                    purge_done()
+                    purged = time.monotonic()
+                requeue_stale()
+                task_ids = claim(options["batch_size"])
+                if not task_ids:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+                    continue
+                for ok in pool.map(run_task, task_ids):
+                    done += ok
+                    failed += not ok
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Выполнено задач: {done}, с ошибкой: {failed}"))
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.slow_queries import SLOW_QUERIES_TOP, read_log, summarize
+
+
+class Command(BaseCommand):
+    help = "Самые дорогие по суммарному времени запросы из лога медленных"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit", type=int, default=SLOW_QUERIES_TOP,
+            help="Сколько запросов показать",
+        )
+        parser.add_argument(
+            "--log", default=settings.SLOW_QUERY_LOG,
+            help="Путь к логу медленных запросов",
+        )
+
+    def handle(self, *args, **options):
+        top = summarize(read_log(options["log"]), options["limit"])
+        if not top:
+            self.stdout.write("Медленных запросов не найдено")
+            return
+        for place, query in enumerate(top, 1):
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{place}. {query['total_ms']:.0f} мс всего, "
+                f"{query['count']} раз, максимум {query['max_ms']:.0f} мс"
+            ))
+            self.stdout.write(query["sql"])
+            if query["views"]:
+                self.stdout.write(
+                    "View: " + ", ".join(sorted(query["views"])))
+            for location in sorted(query["locations"]):
+                self.stdout.write(f"  {location}")
+            if query["plan"]:
+                self.stdout.write("План:\n" + query["plan"])
+            self.stdout.write("")
@@ -0,0 +1,295 @@
+import glob
+import json
+import os
+import re
+import secrets
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: файлы завершившихся процессов не сливаются.
+    fcntl = None
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+METRICS_FLUSH_INTERVAL: int = 5
+# Сюда сливаются метрики завершившихся процессов.
+EXITED_METRICS_FILE: str = "exited.json"
+PROCESS_FILE_RE = re.compile(r"^(\d+)-\w+\.json$")
+
+HELP = {
+    "yatube_requests_total": ("counter", "Запросы по view и статусу."),
+    "yatube_request_duration_seconds": (
+        "histogram", "Время ответа view."),
+    "yatube_sampled_requests_total": (
+        "counter", "Запросы, попавшие в выборку PERF_SAMPLE_RATE."),
+    "yatube_db_queries_total": (
+        "counter", "SQL-запросы view по выборке запросов."),
+    "yatube_db_duration_seconds_total": (
+        "counter", "Время SQL-запросов view по выборке запросов."),
+    "yatube_cache_requests_total": (
+        "counter", "Обращения к кэшу по имени кэша и результату."),
+    "yatube_thumbnail_generation_seconds": (
+        "histogram", "Время создания миниатюр."),
+    "yatube_throttle_requests_total": (
+        "counter", "Запросы, пропущенные и отклонённые ограничителями."),
+    "yatube_queue_depth": (
+        "gauge", "Количество фоновых задач и писем по статусам."),
+}
+
+
+def metrics_dir():
+    return settings.METRICS_DIR
+
+
+def labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def as_snapshot(counters, histograms):
+    """Метрики в виде, который сохраняется в файл."""
+    return {
+        "counters": [
+            [name, dict(labels), value]
+            for (name, labels), value in counters.items()
+        ],
+        "histograms": [
+            [name, dict(labels), histogram]
+            for (name, labels), histogram in histograms.items()
+        ],
+    }
+
+
+class Registry:
+    """Метрики текущего процесса, периодически сбрасываемые в файл.
+
+    Каждый процесс пишет свой файл в METRICS_DIR; при чтении файлы
+    складываются, поэтому внешний сборщик не нужен. Файлы завершившихся
+    процессов collect сливает в один, чтобы суммы не уменьшались, а
+    каталог не рос.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = defaultdict(float)
+        self.histograms = {}
+        self.flushed = 0
+        self.pid = None
+        self.filename = None
+
+    def ensure_owner(self):
+        """Заводит свой файл при первом обращении и после fork.
+
+        В имени кроме PID есть случайная часть: процесс с тем же PID,
+        что у завершившегося, не перезапишет его итоги. Скопированные
+        при fork метрики родителя уже учтены в его файле.
+        """
+        pid = os.getpid()
+        if pid != self.pid:
+            self.pid = pid
+            self.filename = f"{pid}-{secrets.token_hex(8)}.json"
+            self.counters.clear()
+            self.histograms.clear()
+
+    def inc(self, name, labels, value=1):
+        with self.lock:
+            self.ensure_owner()
+            self.counters[(name, labels_key(labels))] += value
+        self.maybe_flush()
+
+    def observe(self, name, labels, value, buckets=LATENCY_BUCKETS):
+        key = (name, labels_key(labels))
+        with self.lock:
+            self.ensure_owner()
+            histogram = self.histograms.setdefault(
+                key, {"buckets": [0] * len(buckets), "sum": 0, "count": 0})
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram["buckets"][i] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+        self.maybe_flush()
+
+    def snapshot(self):
+        with self.lock:
+            self.ensure_owner()
+            return as_snapshot(self.counters, self.histograms)
+
+    def maybe_flush(self):
+        if time.monotonic() - self.flushed >= METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        self.flushed = time.monotonic()
+        directory = metrics_dir()
+        os.makedirs(directory, exist_ok=True)
+        snapshot = self.snapshot()
+        write_json(directory, self.filename, snapshot)
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+
+registry = Registry()
+
+
+def write_json(directory, name, data):
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as output:
+        json.dump(data, output)
+    os.replace(temp_path, os.path.join(directory, name))
+
+
+def read_json(path):
+    try:
+        with open(path) as source:
+            return json.load(source)
+    except (OSError, ValueError):
+        return None
+
+
+def add_snapshot(data, counters, histograms):
+    for name, labels, value in data["counters"]:
+        counters[(name, labels_key(labels))] += value
+    for name, labels, histogram in data["histograms"]:
+        total = histograms.setdefault(
+            (name, labels_key(labels)),
+            {
+                "buckets": [0] * len(histogram["buckets"]),
+                "sum": 0,
+                "count": 0,
+            },
+        )
+        for i, count in enumerate(histogram["buckets"]):
+            total["buckets"][i] += count
+        total["sum"] += histogram["sum"]
+        total["count"] += histogram["count"]
+
+
+def process_exited(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        # Процесс есть, но принадлежит другому пользователю.
+        return False
+    return False
+
+
+@contextmanager
+def directory_lock(directory):
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(directory, "lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def merge_exited(directory):
+    """Сливает файлы завершившихся процессов в EXITED_METRICS_FILE.
+
+    Итог помнит имена слитых файлов: если удаление прервётся, при
+    чтении и следующем слиянии они не будут учтены дважды.
+    """
+    exited = [
+        name for name in os.listdir(directory)
+        if PROCESS_FILE_RE.match(name)
+        and process_exited(int(PROCESS_FILE_RE.match(name).group(1)))
+    ]
+    if not exited:
+        return
+    path = os.path.join(directory, EXITED_METRICS_FILE)
+    total = read_json(path) or {"counters": [], "histograms": []}
+    merged = set(total.get("merged", []))
+    counters = defaultdict(float)
+    histograms = {}
+    add_snapshot(total, counters, histograms)
+    for name in exited:
+        data = read_json(os.path.join(directory, name))
+        if name not in merged and data is not None:
+            add_snapshot(data, counters, histograms)
+    write_json(
+        directory,
+        EXITED_METRICS_FILE,
+        {**as_snapshot(counters, histograms), "merged": exited},
+    )
+    for name in exited:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+
+
+def collect():
+    """Сумма метрик всех процессов, записавших файлы."""
+    registry.flush()
+    directory = metrics_dir()
+    counters = defaultdict(float)
+    histograms = {}
+    with directory_lock(directory):
+        if fcntl is not None:
+            merge_exited(directory)
+        exited = read_json(os.path.join(directory, EXITED_METRICS_FILE))
+        merged = set(exited.get("merged", [])) if exited else set()
+        for path in glob.glob(os.path.join(directory, "*.json")):
+            if os.path.basename(path) in merged:
+                continue
+            data = read_json(path)
+            if data is not None:
+                add_snapshot(data, counters, histograms)
+    return counters, histograms
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"')
+         .replace("\n", "\\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def render(counters, histograms, gauges):
+    """Метрики в текстовом формате Prometheus."""
+    samples = defaultdict(list)
+    for (name, labels), value in sorted([*counters.items(), *gauges.items()]):
+        samples[name].append(
+            f"{name}{format_labels(labels)} {format_value(value)}")
+    for (name, labels), histogram in sorted(histograms.items()):
+        for bound, count in zip(LATENCY_BUCKETS, histogram["buckets"]):
+            bucket_labels = labels + (("le", f"{bound:g}"),)
+            samples[name].append(
+                f"{name}_bucket{format_labels(bucket_labels)} {count}")
+        inf_labels = labels + (("le", "+Inf"),)
+        samples[name].append(
+            f"{name}_bucket{format_labels(inf_labels)} {histogram['count']}")
+        samples[name].append(
+            f"{name}_sum{format_labels(labels)} "
+            f"{format_value(histogram['sum'])}")
+        samples[name].append(
+            f"{name}_count{format_labels(labels)} {histogram['count']}")
+
+    lines = []
+    for name in sorted(samples):
+        kind, help_text = HELP.get(name, ("untyped", ""))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples[name])
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,194 @@
+import cProfile
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.functional import SimpleLazyObject
+
+from .auth import get_cached_user
+from .budgets import (
+    QueryBudgetExceeded,
+    budget_problems,
+    get_budget,
+    record_queries,
+)
+from .metrics import registry
+from .perf import RequestMetrics, current_metrics, record_query, sampled
+from .profiling import authorized, save_profile
+from .slow_queries import current_request
+
+perf_logger = logging.getLogger("yatube.perf")
+budget_logger = logging.getLogger("yatube.query_budget")
+
+
+def get_user(request):
+    if not hasattr(request, "_cached_user"):
+        request._cached_user = get_cached_user(request)
+    return request._cached_user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware, который берёт пользователя из кэша."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_user(request))
+
+
+def view_name(request):
+    match = request.resolver_match
+    # Для ненайденных адресов метка одна, чтобы не плодить ряды метрик.
+    return match.view_name if match else "unresolved"
+
+
+class PerformanceMiddleware:
+    """Метрики запросов для /metrics, Server-Timing и лога.
+
+    Число и время ответов учитываются для всех запросов. Подробные
+    метрики собираются для выборки: с вероятностью PERF_SAMPLE_RATE или
+    по заголовку X-Perf-Trace с внутреннего адреса.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # Запрос нужен логу медленных запросов, чтобы указать view.
+        token = current_request.set(request)
+        try:
+            return self.measure(request)
+        finally:
+            current_request.reset(token)
+
+    def measure(self, request):
+        if not sampled(request):
+            started = time.perf_counter()
+            response = self.get_response(request)
+            self.record(request, response, time.perf_counter() - started)
+            return response
+
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(record_query))
+                response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        total = time.perf_counter() - started
+        self.record(request, response, total, metrics)
+
+        response["Server-Timing"] = metrics.server_timing(total)
+        perf_logger.info(json.dumps({
+            "view": view_name(request),
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            **metrics.as_dict(total),
+        }))
+        return response
+
+    def record(self, request, response, total, metrics=None):
+        view = view_name(request)
+        registry.inc(
+            "yatube_requests_total",
+            {
+                "view": view,
+                "method": request.method,
+                "status": response.status_code,
+            },
+        )
+        registry.observe(
+            "yatube_request_duration_seconds", {"view": view}, total)
+        if metrics is not None:
+            registry.inc("yatube_sampled_requests_total", {"view": view})
+            registry.inc(
+                "yatube_db_queries_total",
+                {"view": view},
+                metrics.counts["db"],
+            )
+            registry.inc(
+                "yatube_db_duration_seconds_total",
+                {"view": view},
+                metrics.durations["db"],
+            )
+
+
+class QueryBudgetMiddleware:
+    """Проверяет бюджет запросов view и ищет повторяющиеся запросы.
+
+    Работает только при DEBUG. В режиме QUERY_BUDGET_MODE = "warn"
+    нарушения пишутся в лог, в режиме "raise" запрос завершается
+    ошибкой, при "off" проверка отключена. В тестах бюджеты проверяет
+    posts/tests/test_query_budgets.py.
+    """
+
+    def __init__(self, get_response):
+        self.mode = settings.QUERY_BUDGET_MODE
+        if self.mode == "off" or not settings.DEBUG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with record_queries() as queries:
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        if match is None:
+            return response
+        problems = budget_problems(queries, get_budget(match.func))
+        if problems:
+            message = f"{match.view_name}: " + "; ".join(problems)
+            if self.mode == "raise":
+                raise QueryBudgetExceeded(message)
+            budget_logger.warning(message)
+        return response
+
+
+class ProfilingMiddleware:
+    """Профилирует выборку запросов через cProfile.
+
+    Профилируется доля PROFILE_SAMPLE_RATE запросов и запросы с
+    заголовком X-Profile-Token, равным PROFILE_TOKEN; им в ответ
+    приходит имя файла в заголовке X-Profile. Файлы .pstats пишутся в
+    PROFILE_DIR, хранятся последние PROFILE_KEEP; их открывают snakeviz,
+    gprof2dot или flameprof.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILE_SAMPLE_RATE and not settings.PROFILE_TOKEN:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        requested = authorized(request)
+        if not requested and random.random() >= settings.PROFILE_SAMPLE_RATE:
+            return self.get_response(request)
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # В процессе уже работает другой профилировщик.
+            return self.get_response(request)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            profile.disable()
+        elapsed = time.perf_counter() - started
+
+        name = save_profile(
+            profile, f"{view_name(request)}-{elapsed * 1000:.0f}ms")
+        if requested:
+            response["X-Profile"] = name
+        return response
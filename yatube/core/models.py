@@ -0,0 +1,96 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Ожидает"),
+        (RUNNING, "Выполняется"),
+        (DONE, "Выполнена"),
+        (FAILED, "Ошибка"),
+    ]
+
+    name = models.CharField(verbose_name="Задача", max_length=200)
+    payload = models.TextField(verbose_name="Параметры", default="{}")
+    priority = models.SmallIntegerField(verbose_name="Приоритет", default=0)
+    idempotency_key = models.CharField(
+        verbose_name="Ключ идемпотентности",
+        max_length=200,
+        unique=True,
+        null=True,
+        blank=True,
+    )
+    status = models.CharField(
+        verbose_name="Статус",
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name="Попыток", default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        verbose_name="Максимум попыток", default=5)
+    run_after = models.DateTimeField(
+        verbose_name="Выполнить после", default=timezone.now)
+    last_error = models.TextField(verbose_name="Последняя ошибка", blank=True)
+    created = models.DateTimeField(
+        verbose_name="Дата создания", auto_now_add=True)
+    updated = models.DateTimeField(
+        verbose_name="Дата изменения", auto_now=True)
+
+    class Meta:
+        verbose_name = "Фоновая задача"
+        verbose_name_plural = "Фоновые задачи"
+        indexes = [
+            models.Index(
+                fields=["status", "-priority", "run_after"],
+                name="task_queue",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.get_status_display()})"
+
+
+class OutgoingEmail(models.Model):
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Ожидает"),
+        (SENDING, "Отправляется"),
+        (SENT, "Отправлено"),
+        (FAILED, "Ошибка"),
+    ]
+
+    subject = models.CharField(verbose_name="Тема", max_length=255)
+    recipients = models.TextField(verbose_name="Получатели")
+    message = models.BinaryField(verbose_name="Сообщение")
+    status = models.CharField(
+        verbose_name="Статус",
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        db_index=True,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name="Попыток", default=0)
+    last_error = models.TextField(verbose_name="Последняя ошибка", blank=True)
+    created = models.DateTimeField(
+        verbose_name="Дата создания", auto_now_add=True)
+    sent_at = models.DateTimeField(
+        verbose_name="Дата отправки", null=True, blank=True)
+    claimed_at = models.DateTimeField(
+        verbose_name="Взято в отправку", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Исходящее письмо"
+        verbose_name_plural = "Исходящие письма"
+
+    def __str__(self):
+        return f"{self.subject} ({self.get_status_display()})"
@@ -0,0 +1,15 @@
+PAGE_SIZE_PARAM: str = "per_page"
+
+
+def page_size(request, default, maximum):
+    """Размер страницы из ?per_page=, не больше maximum.
+
+    Некорректное значение заменяется размером по умолчанию.
+    """
+    try:
+        size = int(request.GET.get(PAGE_SIZE_PARAM, default))
+    except (TypeError, ValueError):
+        return default
+    if size < 1:
+        return default
+    return min(size, maximum)
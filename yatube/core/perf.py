@@ -0,0 +1,159 @@
+import random
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.template.backends.django import DjangoTemplates, Template
+from sorl.thumbnail.base import ThumbnailBackend
+
+from .metrics import registry
+
+PERF_TRACE_HEADER: str = "HTTP_X_PERF_TRACE"
+CACHE_PAGE_PREFIX: str = "views.decorators.cache."
+SESSION_CACHE_PREFIX: str = "django.contrib.sessions."
+
+current_metrics = ContextVar("current_metrics", default=None)
+
+
+class RequestMetrics:
+    """Время и счётчики по слоям для одного запроса."""
+
+    def __init__(self):
+        self.durations = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.cache = defaultdict(lambda: {"hits": 0, "misses": 0})
+
+    def add(self, name, duration):
+        self.durations[name] += duration
+        self.counts[name] += 1
+
+    def as_dict(self, total):
+        return {
+            "total_ms": round(total * 1000, 2),
+            "db_ms": round(self.durations["db"] * 1000, 2),
+            "db_queries": self.counts["db"],
+            "template_ms": round(self.durations["template"] * 1000, 2),
+            "cache_hits": sum(c["hits"] for c in self.cache.values()),
+            "cache_misses": sum(c["misses"] for c in self.cache.values()),
+            "thumbnail_ms": round(self.durations["thumbnail"] * 1000, 2),
+            "thumbnails": self.counts["thumbnail"],
+        }
+
+    def server_timing(self, total):
+        data = self.as_dict(total)
+        return ", ".join([
+            f'db;dur={data["db_ms"]};desc="{data["db_queries"]} queries"',
+            f'tpl;dur={data["template_ms"]}',
+            f'cache;desc="{data["cache_hits"]} hits, '
+            f'{data["cache_misses"]} misses"',
+            f'thumb;dur={data["thumbnail_ms"]};'
+            f'desc="{data["thumbnails"]} thumbnails"',
+            f'total;dur={data["total_ms"]}',
+        ])
+
+
+@contextmanager
+def timed(name):
+    """Добавляет время блока к метрикам запроса, если они собираются."""
+    metrics = current_metrics.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add(name, time.perf_counter() - started)
+
+
+def cache_key_group(key):
+    """Имя кэша по ключу: key_prefix для cache_page, иначе префикс ключа."""
+    if key.startswith(SESSION_CACHE_PREFIX):
+        return "sessions"
+    if key.startswith(CACHE_PAGE_PREFIX):
+        parts = key[len(CACHE_PAGE_PREFIX):].split(".")
+        return parts[1] if len(parts) > 1 else parts[0]
+    return key.split(":", 1)[0]
+
+
+def record_cache(key, hit):
+    group = cache_key_group(key)
+    registry.inc(
+        "yatube_cache_requests_total",
+        {"cache": group, "result": "hit" if hit else "miss"},
+    )
+    metrics = current_metrics.get()
+    if metrics is not None:
+        metrics.cache[group]["hits" if hit else "misses"] += 1
+
+
+def record_query(execute, sql, params, many, context):
+    with timed("db"):
+        return execute(sql, params, many, context)
+
+
+class InstrumentedCacheMixin:
+    _missing = object()
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, self._missing, version)
+        record_cache(key, value is not self._missing)
+        return default if value is self._missing else value
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    pass
+
+
+class InstrumentedFileBasedCache(InstrumentedCacheMixin, FileBasedCache):
+    pass
+
+
+class InstrumentedTemplate(Template):
+    def render(self, context=None, request=None):
+        with timed("template"):
+            return super().render(context, request)
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """Шаблонизатор Django, замеряющий время отрисовки шаблонов страниц.
+
+    Вложенные include отрисовываются внутри страницы и отдельно не
+    считаются.
+    """
+
+    def from_string(self, template_code):
+        template = super().from_string(template_code)
+        return InstrumentedTemplate(template.template, self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return InstrumentedTemplate(template.template, self)
+
+
+class InstrumentedThumbnailBackend(ThumbnailBackend):
+    def get_thumbnail(self, file_, geometry_string, **options):
+        with timed("thumbnail"):
+            return super().get_thumbnail(file_, geometry_string, **options)
+
+    def _create_thumbnail(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super()._create_thumbnail(*args, **kwargs)
+        finally:
+            registry.observe(
+                "yatube_thumbnail_generation_seconds",
+                {},
+                time.perf_counter() - started,
+            )
+
+
+def sampled(request):
+    if (request.META.get(PERF_TRACE_HEADER)
+            and request.META.get("REMOTE_ADDR") in settings.INTERNAL_IPS):
+        return True
+    return random.random() < settings.PERF_SAMPLE_RATE
@@ -0,0 +1,44 @@
+import hmac
+import os
+import re
+
+from django.conf import settings
+from django.utils import timezone
+
+PROFILE_TOKEN_HEADER: str = "HTTP_X_PROFILE_TOKEN"
+
+
+def authorized(request):
+    """Запрос просит профилирование и предъявил верный PROFILE_TOKEN."""
+    token = request.META.get(PROFILE_TOKEN_HEADER)
+    if not token or not settings.PROFILE_TOKEN:
+        return False
+    return hmac.compare_digest(
+        token.encode(), settings.PROFILE_TOKEN.encode())
+
+
+def rotate(directory, keep):
+    """Оставляет в каталоге только keep самых свежих профилей."""
+    names = sorted(
+        name for name in os.listdir(directory) if name.endswith(".pstats"))
+    for name in names[:max(len(names) - keep, 0)]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            # Файл уже удалил другой процесс.
+            pass
+
+
+def save_profile(profile, label):
+    """Сохраняет профиль в PROFILE_DIR и возвращает имя файла.
+
+    Имя начинается со времени, поэтому сортировка по имени совпадает с
+    порядком записи даже для нескольких процессов.
+    """
+    directory = settings.PROFILE_DIR
+    os.makedirs(directory, exist_ok=True)
+    label = re.sub(r"[^\w.-]", "_", label)
+    name = f"{timezone.now():%Y%m%dT%H%M%S%f}-{os.getpid()}-{label}.pstats"
+    profile.dump_stats(os.path.join(directory, name))
+    rotate(directory, settings.PROFILE_KEEP)
+    return name
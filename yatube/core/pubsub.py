@@ -0,0 +1,76 @@
+import queue
+import threading
+from collections import defaultdict
+
+SUBSCRIBER_QUEUE_SIZE: int = 100
+
+
+class Subscription:
+    """Очередь сообщений одного подписчика канала."""
+
+    def __init__(self, bus, channel, maxsize=SUBSCRIBER_QUEUE_SIZE):
+        self.bus = bus
+        self.channel = channel
+        self.closed = False
+        self._queue = queue.Queue(maxsize=maxsize)
+
+    def put(self, message):
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            # Медленный подписчик отключается и догоняет канал при
+            # переподключении, а не копит сообщения без ограничений.
+            self.close()
+
+    def get(self, timeout=None):
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.bus.unsubscribe(self)
+
+
+class Bus:
+    """Внутрипроцессная шина публикации и подписки по каналам.
+
+    Все подписчики канала получают каждое опубликованное сообщение, так
+    что сколько угодно читателей одного поста обслуживаются одной
+    публикацией без опроса базы.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels = defaultdict(set)
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel)
+        with self._lock:
+            self._channels[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._channels.get(subscription.channel)
+            if subscribers is None:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._channels[subscription.channel]
+
+    def subscribers(self, channel):
+        with self._lock:
+            return len(self._channels.get(channel, ()))
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put(message)
+        return len(subscribers)
+
+
+bus = Bus()
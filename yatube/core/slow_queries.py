@@ -0,0 +1,169 @@
+import json
+import logging
+import os
+import re
+import time
+import traceback
+from collections import defaultdict
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger("yatube.slow_queries")
+
+EXPLAIN_PREFIXES = {
+    "sqlite": "EXPLAIN QUERY PLAN ",
+    "postgresql": "EXPLAIN ",
+    "mysql": "EXPLAIN ",
+}
+# Обёртки вокруг запросов, а не места, где запросы делаются.
+INSTRUMENTATION_FILES = {
+    "core/budgets.py",
+    "core/middleware.py",
+    "core/perf.py",
+    "core/slow_queries.py",
+}
+MAX_PARAM_LENGTH: int = 200
+# Параметры запросов к этим таблицам — ключи сессий и хеши паролей.
+SENSITIVE_TABLE = re.compile(
+    r'\b(?:FROM|INTO|UPDATE)\s+[`"]?(?:django_session|auth_user)[`"]?'
+    r'(?![\w])',
+    re.IGNORECASE,
+)
+REDACTED: str = "[скрыто]"
+SLOW_QUERIES_TOP: int = 10
+
+current_request = ContextVar("current_request", default=None)
+
+IN_LIST = re.compile(r"IN \((?:%s, )*%s\)")
+
+
+def current_view():
+    request = current_request.get()
+    if request is None:
+        return None
+    match = request.resolver_match
+    return match.view_name if match else None
+
+
+def code_location():
+    """Самый внутренний кадр стека из кода проекта, а не Django."""
+    for frame, lineno in traceback.walk_stack(None):
+        path = os.path.relpath(frame.f_code.co_filename, settings.BASE_DIR)
+        if not path.startswith("..") and path not in INSTRUMENTATION_FILES:
+            return f"{path}:{lineno} in {frame.f_code.co_name}"
+    return None
+
+
+def explain(connection, sql, params):
+    """План запроса; курсор создаётся в обход execute_wrapper и лога."""
+    prefix = EXPLAIN_PREFIXES.get(connection.vendor)
+    if prefix is None or not sql.lstrip().upper().startswith("SELECT"):
+        return None
+    cursor = connection.create_cursor()
+    try:
+        cursor.execute(prefix + sql, params)
+        return "\n".join(str(row[-1]) for row in cursor.fetchall())
+    except DatabaseError as error:
+        return f"EXPLAIN не удался: {error}"
+    finally:
+        cursor.close()
+
+
+def short(value):
+    text = value if isinstance(value, str) else repr(value)
+    if len(text) > MAX_PARAM_LENGTH:
+        return text[:MAX_PARAM_LENGTH] + "…"
+    return value
+
+
+def log_slow_query(execute, sql, params, many, context):
+    threshold = settings.SLOW_QUERY_THRESHOLD_MS
+    if threshold is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration = (time.perf_counter() - started) * 1000
+    if duration >= threshold:
+        # План в PostgreSQL и MySQL может повторять значения параметров.
+        sensitive = bool(SENSITIVE_TABLE.search(sql))
+        logger.info(json.dumps(
+            {
+                "sql": sql,
+                "params": (
+                    REDACTED if sensitive
+                    else None if many or params is None
+                    else [short(param) for param in params]
+                ),
+                "many": many,
+                "duration_ms": round(duration, 2),
+                "view": current_view(),
+                "location": code_location(),
+                "plan": (
+                    None if many or sensitive
+                    else explain(context["connection"], sql, params)
+                ),
+            },
+            ensure_ascii=False,
+            default=str,
+        ))
+    return result
+
+
+@receiver(connection_created)
+def install_slow_query_log(sender, connection, **kwargs):
+    # Соединение может открыться внутри блока execute_wrapper(), который
+    # на выходе снимает последнюю обёртку, поэтому лог ставится первым.
+    if log_slow_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, log_slow_query)
+
+
+def read_log(path):
+    """Записи лога вместе с файлами, оставленными ротацией."""
+    paths = [path] + [
+        f"{path}.{i}" for i in range(1, settings.SLOW_QUERY_LOG_BACKUPS + 1)
+    ]
+    for name in paths:
+        if not os.path.exists(name):
+            continue
+        with open(name, encoding="utf-8") as log:
+            for line in log:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def fingerprint(sql):
+    """SQL без различий в длине списков IN (...)."""
+    return IN_LIST.sub("IN (...)", sql)
+
+
+def summarize(records, limit=SLOW_QUERIES_TOP):
+    """Запросы с наибольшим суммарным временем."""
+    groups = defaultdict(lambda: {
+        "count": 0,
+        "total_ms": 0.0,
+        "max_ms": 0.0,
+        "views": set(),
+        "locations": set(),
+        "plan": None,
+    })
+    for record in records:
+        sql = fingerprint(record["sql"])
+        group = groups[sql]
+        group["count"] += 1
+        group["total_ms"] += record["duration_ms"]
+        if record["duration_ms"] >= group["max_ms"]:
+            group["max_ms"] = record["duration_ms"]
+            group["plan"] = record.get("plan")
+        if record.get("view"):
+            group["views"].add(record["view"])
+        if record.get("location"):
+            group["locations"].add(record["location"])
+    top = sorted(
+        groups.items(), key=lambda item: item[1]["total_ms"], reverse=True)
+    return [{"sql": sql, **group} for sql, group in top[:limit]]
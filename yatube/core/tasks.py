@@ -0,0 +1,156 @@
+import datetime as dt
+import json
+import logging
+import traceback
+from contextlib import nullcontext
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+RETRY_DELAY: int = 10
+STALE_TIMEOUT: int = 60 * 10
+DEFAULT_MAX_ATTEMPTS: int = 5
+# Выполненные задачи хранятся сутки, потом удаляются вместе с ключами.
+DONE_RETENTION: int = 60 * 60 * 24
+
+registry = {}
+
+
+class UnknownTask(LookupError):
+    pass
+
+
+def task(name, atomic=True):
+    """Регистрирует функцию как фоновую задачу с данным именем.
+
+    Задача с atomic=False выполняется вне общей транзакции и сама
+    управляет транзакциями; такую задачу нужно делать безопасной для
+    повторного запуска.
+    """
+    def decorator(func):
+        func.atomic = atomic
+        registry[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, priority=0, key=None, delay=None,
+            max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """Ставит задачу в очередь в текущей транзакции.
+
+    Задача с уже встречавшимся ключом идемпотентности не добавляется
+    повторно.
+    """
+    run_after = timezone.now()
+    if delay:
+        run_after += dt.timedelta(seconds=delay)
+    Task.objects.bulk_create(
+        [
+            Task(
+                name=name,
+                payload=json.dumps(payload or {}, cls=DjangoJSONEncoder),
+                priority=priority,
+                idempotency_key=key,
+                max_attempts=max_attempts,
+                run_after=run_after,
+            )
+        ],
+        ignore_conflicts=key is not None,
+    )
+
+
+def claim(limit):
+    """Забирает до limit готовых задач, начиная с самых приоритетных."""
+    candidates = (
+        Task.objects
+        .filter(status=Task.PENDING, run_after__lte=timezone.now())
+        .order_by("-priority", "run_after", "id")
+        .values_list("id", flat=True)[:limit]
+    )
+    return [
+        task_id
+        for task_id in list(candidates)
+        if Task.objects
+        .filter(id=task_id, status=Task.PENDING)
+        .update(status=Task.RUNNING, updated=timezone.now())
+    ]
+
+
+def requeue_stale(timeout=STALE_TIMEOUT):
+    """Возвращает в очередь задачи, воркер которых завис или упал."""
+    return Task.objects.filter(
+        status=Task.RUNNING,
+        updated__lt=timezone.now() - dt.timedelta(seconds=timeout),
+    ).update(status=Task.PENDING)
+
+
+def purge_done(retention=DONE_RETENTION):
+    """Удаляет задачи, выполненные раньше, чем retention секунд назад.
+
+    После этого ключ идемпотентности удалённой задачи можно поставить в
+    очередь снова, поэтому срок должен быть больше времени, за которое
+    повторяется событие с тем же ключом.
+    """
+    deleted, _ = Task.objects.filter(
+        status=Task.DONE,
+        updated__lt=timezone.now() - dt.timedelta(seconds=retention),
+    ).delete()
+    return deleted
+
+
+def execute(task_id):
+    """Выполняет задачу и отмечает её выполненной в одной транзакции.
+
+    Если задача меняет только базу, повторного выполнения не будет даже
+    при падении воркера; задачи с atomic=False выполняются без общей
+    транзакции. При ошибке задача откладывается с экспоненциальной
+    задержкой, пока не кончатся попытки.
+    """
+    current = Task.objects.get(id=task_id)
+    try:
+        func = registry.get(current.name)
+        if func is None:
+            raise UnknownTask(current.name)
+        atomic = getattr(func, "atomic", True)
+        with transaction.atomic() if atomic else nullcontext():
+            func(**json.loads(current.payload))
+            Task.objects.filter(id=task_id).update(
+                status=Task.DONE,
+                attempts=current.attempts + 1,
+                last_error="",
+                updated=timezone.now(),
+            )
+        return True
+    except Exception:
+        logger.exception("Задача %s (%s) завершилась ошибкой",
+                         task_id, current.name)
+        attempts = current.attempts + 1
+        delay = RETRY_DELAY * 2 ** (attempts - 1)
+        Task.objects.filter(id=task_id).update(
+            status=(
+                Task.FAILED if attempts >= current.max_attempts
+                else Task.PENDING
+            ),
+            attempts=attempts,
+            last_error=traceback.format_exc(),
+            run_after=timezone.now() + dt.timedelta(seconds=delay),
+            updated=timezone.now(),
+        )
+        return False
+
+
+def run_pending(limit=None):
+    """Выполняет готовые задачи в текущем процессе; нужно для тестов."""
+    done = 0
+    while limit is None or done < limit:
+        task_ids = claim(1)
+        if not task_ids:
+            break
+        execute(task_ids[0])
+        done += 1
+    return done
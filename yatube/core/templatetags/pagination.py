@@ -0,0 +1,53 @@
+from django import template
+
+register = template.Library()
+
+PAGE_WINDOW_ON_EACH_SIDE: int = 2
+PAGE_WINDOW_ON_ENDS: int = 1
+
+
+def page_window(number, num_pages, on_each_side=PAGE_WINDOW_ON_EACH_SIDE,
+                on_ends=PAGE_WINDOW_ON_ENDS):
+    """Номера страниц вокруг текущей и по краям, None на месте пропуска.
+
+    Размер результата не зависит от числа страниц.
+    """
+    ranges = [
+        (1, min(on_ends, num_pages)),
+        (max(number - on_each_side, 1),
+         min(number + on_each_side, num_pages)),
+        (max(num_pages - on_ends + 1, 1), num_pages),
+    ]
+    window = []
+    last = 0
+    for start, end in ranges:
+        start = max(start, last + 1)
+        if start > end:
+            continue
+        if start > last + 2:
+            window.append(None)
+        elif start == last + 2:
+            # Пропуск из одной страницы нагляднее показать номером.
+            start -= 1
+        window.extend(range(start, end + 1))
+        last = end
+    return window
+
+
+@register.simple_tag
+def page_links(page_obj, on_each_side=PAGE_WINDOW_ON_EACH_SIDE,
+               on_ends=PAGE_WINDOW_ON_ENDS):
+    return page_window(
+        page_obj.number,
+        page_obj.paginator.num_pages,
+        on_each_side,
+        on_ends,
+    )
+
+
+@register.simple_tag(takes_context=True)
+def page_url(context, number):
+    """Ссылка на страницу с сохранением остальных параметров запроса."""
+    query = context["request"].GET.copy()
+    query["page"] = number
+    return f"?{query.urlencode()}"
@@ -0,0 +1,52 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+from django.utils.module_loading import import_string
+
+
+def independent_cache(alias):
+    """Отдельный экземпляр кэша alias, как его видит другой процесс."""
+    options = settings.CACHES[alias]
+    return import_string(options["BACKEND"])(options["LOCATION"], options)
+
+
+class IsolatedFiles:
+    """Переносит файлы, которые пишет сайт, во временный каталог.
+
+    Иначе тесты очищали бы кэш сессий запущенного на той же машине
+    сайта и добавляли свои запросы к его метрикам.
+    """
+
+    def __init__(self):
+        self.directory = tempfile.mkdtemp(prefix="yatube-tests-")
+        caches = {
+            alias: dict(options) for alias, options in settings.CACHES.items()
+        }
+        caches["sessions"]["LOCATION"] = os.path.join(
+            self.directory, "sessions")
+        self.settings_override = override_settings(
+            CACHES=caches,
+            METRICS_DIR=os.path.join(self.directory, "metrics"),
+        )
+
+    def enable(self):
+        self.settings_override.enable()
+
+    def disable(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.isolated_files = IsolatedFiles()
+        self.isolated_files.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.isolated_files.disable()
+        super().teardown_test_environment(**kwargs)
@@ -1,9 +1,708 @@
-from django.test import TestCase
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core import mail
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
 from http import HTTPStatus
+import datetime as dt
+import glob
+import json
+import logging
+import os
+import pstats
+import shutil
+import stat
+import tempfile
+from io import StringIO
 
+from .auth import user_version_key
+from .benchmark import measure, percentile, regressions
+from .budgets import record_queries
+from .logs import PrivateRotatingFileHandler
+from .mail import (
+    EMAIL_MAX_ATTEMPTS,
+    EMAIL_SENDING_TIMEOUT,
+    EMAIL_SENT_RETENTION,
+    delivery_stats,
+)
+from .metrics import EXITED_METRICS_FILE, Registry, collect
+from .metrics import registry as metrics
+from .models import OutgoingEmail, Task
+from .perf import cache_key_group
+from .pubsub import SUBSCRIBER_QUEUE_SIZE, Bus
+from .slow_queries import REDACTED, fingerprint, log_slow_query, summarize
+from .templatetags.pagination import page_window
+from .testing import independent_cache
+from .tasks import (
+    DONE_RETENTION,
+    claim,
+    enqueue,
+    execute,
+    purge_done,
+    registry,
+    run_pending,
+    task,
+)
 
+User = get_user_model()
+
+
+class FailingEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionError("smtp is down")
+
+
+class TransactionProbeEmailBackend(BaseEmailBackend):
+    """Запоминает глубину вложенных транзакций в момент отправки."""
+
+    depths = []
+
+    def send_messages(self, email_messages):
+        TransactionProbeEmailBackend.depths.append(
+            len(connection.savepoint_ids))
+        return len(email_messages)
+
+
+@override_settings(PERF_SAMPLE_RATE=0)
 class ViewTestClass(TestCase):
     def test_error_page(self):
         response = self.client.get("/nonexist-page/")
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         self.assertTemplateUsed(response, "core/404.html")
+
+
+class PageWindowTestClass(TestCase):
+    def test_window_around_current_page(self):
+        for number, num_pages, expected in [
+            (1, 1, [1]),
+            (3, 5, [1, 2, 3, 4, 5]),
+            (1, 1000, [1, 2, 3, None, 1000]),
+            (500, 1000, [1, None, 498, 499, 500, 501, 502, None, 1000]),
+            (5, 1000, [1, 2, 3, 4, 5, 6, 7, None, 1000]),
+            (1000, 1000, [1, None, 998, 999, 1000]),
+        ]:
+            with self.subTest(number=number, num_pages=num_pages):
+                self.assertEqual(page_window(number, num_pages), expected)
+
+    def test_configurable_width(self):
+        self.assertEqual(
+            page_window(50, 100, on_each_side=1, on_ends=2),
+            [1, 2, None, 49, 50, 51, None, 99, 100],
+        )
+
+
+class BusTestClass(TestCase):
+    def test_publish_reaches_channel_subscribers(self):
+        bus = Bus()
+        first = bus.subscribe("channel")
+        second = bus.subscribe("channel")
+        other = bus.subscribe("other")
+
+        self.assertEqual(bus.publish("channel", "message"), 2)
+        self.assertEqual(first.get(timeout=0), "message")
+        self.assertEqual(second.get(timeout=0), "message")
+        self.assertIsNone(other.get(timeout=0))
+
+    def test_slow_subscriber_is_dropped(self):
+        bus = Bus()
+        subscription = bus.subscribe("channel")
+        for i in range(SUBSCRIBER_QUEUE_SIZE + 1):
+            bus.publish("channel", i)
+
+        self.assertTrue(subscription.closed)
+        self.assertEqual(bus.subscribers("channel"), 0)
+
+
+class TaskQueueTestClass(TestCase):
+    def setUp(self):
+        self.calls = []
+
+        @task("tests.record")
+        def record(value):
+            self.calls.append(value)
+
+        @task("tests.fail")
+        def fail():
+            raise ValueError("fail")
+
+    def tearDown(self):
+        registry.pop("tests.record")
+        registry.pop("tests.fail")
+
+    def test_priority_order(self):
+        enqueue("tests.record", {"value": "low"})
+        enqueue("tests.record", {"value": "high"}, priority=10)
+
+        self.assertEqual(run_pending(), 2)
+        self.assertEqual(self.calls, ["high", "low"])
+        self.assertFalse(Task.objects.exclude(status=Task.DONE).exists())
+
+    def test_idempotency_key(self):
+        for _ in range(2):
+            enqueue("tests.record", {"value": 1}, key="once")
+
+        run_pending()
+        enqueue("tests.record", {"value": 1}, key="once")
+        run_pending()
+        self.assertEqual(self.calls, [1])
+
+    def test_delayed_task_waits(self):
+        enqueue("tests.record", {"value": 1}, delay=60)
+
+        self.assertEqual(claim(10), [])
+
+    def test_failed_task_retried_then_given_up(self):
+        enqueue("tests.fail", max_attempts=2)
+        current = Task.objects.get()
+
+        self.assertFalse(execute(current.id))
+        current.refresh_from_db()
+        self.assertEqual(current.status, Task.PENDING)
+        self.assertEqual(current.attempts, 1)
+        self.assertIn("ValueError", current.last_error)
+        self.assertGreater(current.run_after, current.created)
+        self.assertEqual(claim(10), [])
+
+        self.assertFalse(execute(current.id))
+        current.refresh_from_db()
+        self.assertEqual(current.status, Task.FAILED)
+
+    def test_old_done_tasks_purged(self):
+        for value in range(3):
+            enqueue("tests.record", {"value": value})
+        enqueue("tests.fail", max_attempts=1)
+        run_pending()
+        Task.objects.update(updated=timezone.now() - dt.timedelta(
+            seconds=DONE_RETENTION + 1))
+        enqueue("tests.record", {"value": 3})
+        run_pending()
+
+        self.assertEqual(purge_done(), 3)
+        self.assertCountEqual(
+            Task.objects.values_list("status", flat=True),
+            [Task.DONE, Task.FAILED],
+        )
+
+
+@override_settings(
+    EMAIL_BACKEND="core.mail.QueuedEmailBackend",
+    QUEUED_EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+)
+class QueuedEmailTestClass(TestCase):
+    def test_password_reset_mail_is_queued(self):
+        User.objects.create_user(
+            username="user", email="user@example.com", password="password")
+
+        response = self.client.post(
+            reverse("users:password_reset"), {"email": "user@example.com"})
+
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(delivery_stats()["counts"][OutgoingEmail.PENDING], 1)
+
+        run_pending()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["user@example.com"])
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.status, OutgoingEmail.SENT)
+        self.assertIsNotNone(email.sent_at)
+
+    def test_batch_sent_over_one_connection(self):
+        mail.send_mass_mail(
+            [("subject", "body", None, [f"{i}@example.com"])
+             for i in range(3)]
+        )
+
+        run_pending()
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(delivery_stats()["counts"][OutgoingEmail.SENT], 3)
+
+    @override_settings(QUEUED_EMAIL_BACKEND="core.tests.FailingEmailBackend")
+    def test_failed_delivery_retried_then_given_up(self):
+        mail.send_mail("subject", "body", None, ["user@example.com"])
+
+        for _ in range(EMAIL_MAX_ATTEMPTS):
+            Task.objects.filter(status=Task.PENDING).update(
+                run_after=timezone.now())
+            run_pending()
+
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.status, OutgoingEmail.FAILED)
+        self.assertEqual(email.attempts, EMAIL_MAX_ATTEMPTS)
+        self.assertIn("smtp is down", email.last_error)
+
+    @override_settings(
+        QUEUED_EMAIL_BACKEND="core.tests.TransactionProbeEmailBackend")
+    def test_sent_outside_transaction(self):
+        mail.send_mail("subject", "body", None, ["user@example.com"])
+        TransactionProbeEmailBackend.depths = []
+        depth = len(connection.savepoint_ids)
+
+        run_pending()
+        self.assertEqual(TransactionProbeEmailBackend.depths, [depth])
+        self.assertEqual(
+            OutgoingEmail.objects.get().status, OutgoingEmail.SENT)
+
+    def test_stale_sending_requeued(self):
+        mail.send_mail("subject", "body", None, ["user@example.com"])
+        OutgoingEmail.objects.update(
+            status=OutgoingEmail.SENDING,
+            claimed_at=timezone.now() - dt.timedelta(
+                seconds=EMAIL_SENDING_TIMEOUT + 1),
+        )
+
+        run_pending()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(
+            OutgoingEmail.objects.get().status, OutgoingEmail.SENT)
+
+    def test_unreadable_email_does_not_block_batch(self):
+        mail.send_mass_mail(
+            [("subject", "body", None, [f"{i}@example.com"])
+             for i in range(3)]
+        )
+        broken = OutgoingEmail.objects.order_by("id").first()
+        OutgoingEmail.objects.filter(id=broken.id).update(
+            message=b"not a pickle")
+
+        run_pending()
+        self.assertEqual(
+            [message.to[0] for message in mail.outbox],
+            ["1@example.com", "2@example.com"],
+        )
+        broken.refresh_from_db()
+        self.assertEqual(broken.status, OutgoingEmail.FAILED)
+        self.assertEqual(broken.attempts, 1)
+        self.assertEqual(delivery_stats()["counts"][OutgoingEmail.SENT], 2)
+
+    def test_old_sent_emails_purged(self):
+        mail.send_mass_mail(
+            [("subject", "body", None, [f"{i}@example.com"])
+             for i in range(2)]
+        )
+        run_pending()
+        OutgoingEmail.objects.filter(
+            id=OutgoingEmail.objects.order_by("id").first().id
+        ).update(sent_at=timezone.now() - dt.timedelta(
+            seconds=EMAIL_SENT_RETENTION + 1))
+
+        mail.send_mail("subject", "body", None, ["user@example.com"])
+        run_pending()
+        self.assertEqual(delivery_stats()["counts"][OutgoingEmail.SENT], 2)
+
+
+@override_settings(PERF_SAMPLE_RATE=0)
+class CachedUserTestClass(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="user", password="password")
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        caches[settings.SESSION_CACHE_ALIAS].clear()
+
+    def _queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("posts:follow_index"))
+        return response, [
+            query["sql"] for query in queries.captured_queries
+            if query["sql"].startswith('SELECT "auth_user"')
+        ]
+
+    def test_user_loaded_once(self):
+        _, first = self._queries()
+        response, second = self._queries()
+
+        self.assertEqual(len(first), 1)
+        self.assertEqual(second, [])
+        self.assertEqual(response.context["user"], self.user)
+
+    def test_user_edit_invalidates_cache(self):
+        self._queries()
+        self.user.first_name = "Имя"
+        self.user.save()
+
+        response, _ = self._queries()
+        self.assertEqual(response.context["user"].first_name, "Имя")
+
+    def test_deactivation_and_password_change_log_out(self):
+        for change in ["is_active", "password"]:
+            with self.subTest(change=change):
+                self.client.force_login(self.user)
+                self._queries()
+                if change == "is_active":
+                    self.user.is_active = False
+                else:
+                    self.user.set_password("new-password")
+                self.user.save()
+
+                response, _ = self._queries()
+                self.assertEqual(response.status_code, HTTPStatus.FOUND)
+                self.user.is_active = True
+                self.user.save()
+
+    def test_password_change_in_other_process_logs_out(self):
+        self._queries()
+        User.objects.filter(pk=self.user.pk).update(
+            password=make_password("new-password"))
+        independent_cache(settings.SESSION_CACHE_ALIAS).set(
+            user_version_key(self.user.pk), "other-process", None)
+
+        response, queries = self._queries()
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertEqual(len(queries), 1)
+
+
+@override_settings(PERF_SAMPLE_RATE=0)
+class PerformanceMiddlewareTestClass(TestCase):
+    def tearDown(self):
+        cache.clear()
+
+    @override_settings(PERF_SAMPLE_RATE=1)
+    def test_sampled_request_reports_metrics(self):
+        with self.assertLogs("yatube.perf", "INFO") as logs:
+            response = self.client.get(reverse("posts:index"))
+            self.client.get(reverse("posts:index"))
+
+        self.assertIn("db;dur=", response["Server-Timing"])
+        self.assertIn("total;dur=", response["Server-Timing"])
+        first, second = [
+            json.loads(line.split(":", 2)[2]) for line in logs.output]
+        self.assertEqual(first["view"], "posts:index")
+        self.assertEqual(first["status"], HTTPStatus.OK)
+        self.assertGreater(first["db_queries"], 0)
+        self.assertGreater(first["template_ms"], 0)
+        self.assertGreater(first["cache_misses"], 0)
+        self.assertEqual(second["db_queries"], 0)
+        self.assertGreater(second["cache_hits"], 0)
+
+    def test_unsampled_request_untouched(self):
+        response = self.client.get(reverse("posts:index"))
+        self.assertNotIn("Server-Timing", response)
+
+        with self.assertLogs("yatube.perf", "INFO"):
+            response = self.client.get(
+                reverse("posts:index"), HTTP_X_PERF_TRACE="1")
+        self.assertIn("Server-Timing", response)
+
+    def test_cache_key_group(self):
+        for key, group in {
+            "views.decorators.cache.cache_page.index_page.GET.abc": (
+                "index_page"),
+            "views.decorators.cache.cache_header.index_page.abc": (
+                "index_page"),
+            "feed:rss:index": "feed",
+            "posts:high_water": "posts",
+            "django.contrib.sessions.cached_dbabc": "sessions",
+        }.items():
+            with self.subTest(key=key):
+                self.assertEqual(cache_key_group(key), group)
+
+
+@override_settings(PERF_SAMPLE_RATE=0)
+class MetricsTestClass(TestCase):
+    def setUp(self):
+        self.metrics_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            METRICS_DIR=self.metrics_dir)
+        self.settings_override.enable()
+        metrics.reset()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.metrics_dir, ignore_errors=True)
+        metrics.reset()
+        cache.clear()
+
+    def test_metrics_exposed(self):
+        for _ in range(2):
+            self.client.get(reverse("posts:index"))
+        enqueue("tests.unknown")
+
+        text = self.client.get(reverse("metrics")).content.decode()
+
+        self.assertIn("# TYPE yatube_request_duration_seconds histogram", text)
+        self.assertIn(
+            'yatube_requests_total{method="GET",status="200",'
+            'view="posts:index"} 2',
+            text,
+        )
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="posts:index"} 2',
+            text,
+        )
+        self.assertIn(
+            'yatube_cache_requests_total{cache="index_page",result="hit"}',
+            text,
+        )
+        self.assertIn(
+            'yatube_queue_depth{queue="tasks",status="pending"} 1', text)
+
+    def test_processes_aggregated(self):
+        metrics.inc("yatube_requests_total", {"view": "v"}, 2)
+        with open(os.path.join(self.metrics_dir, "1.json"), "w") as output:
+            json.dump(
+                {"counters": [["yatube_requests_total", {"view": "v"}, 3]],
+                 "histograms": []},
+                output,
+            )
+
+        text = self.client.get(reverse("metrics")).content.decode()
+        self.assertIn('yatube_requests_total{view="v"} 5', text)
+
+    def test_same_pid_keeps_previous_totals(self):
+        for value in (3, 4):
+            process = Registry()
+            process.inc("yatube_requests_total", {"view": "v"}, value)
+            process.flush()
+
+        counters, _ = collect()
+        self.assertEqual(
+            counters[("yatube_requests_total", (("view", "v"),))], 7)
+        self.assertEqual(
+            len(glob.glob(os.path.join(self.metrics_dir, "*.json"))), 3)
+
+    def test_exited_processes_merged(self):
+        exited = os.path.join(self.metrics_dir, "999999999-abc.json")
+        with open(exited, "w") as output:
+            json.dump(
+                {"counters": [["yatube_requests_total", {"view": "v"}, 3]],
+                 "histograms": []},
+                output,
+            )
+        key = ("yatube_requests_total", (("view", "v"),))
+
+        for _ in range(2):
+            counters, _ = collect()
+            self.assertEqual(counters[key], 3)
+        self.assertFalse(os.path.exists(exited))
+        self.assertTrue(os.path.exists(
+            os.path.join(self.metrics_dir, EXITED_METRICS_FILE)))
+
+    def test_tests_do_not_write_real_metrics(self):
+        self.settings_override.disable()
+        try:
+            self.assertNotEqual(
+                settings.METRICS_DIR,
+                os.path.join(tempfile.gettempdir(), "yatube-metrics"),
+            )
+        finally:
+            self.settings_override.enable()
+
+    def test_only_internal_or_staff(self):
+        response = self.client.get(reverse("metrics"), REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+        staff = User.objects.create_user(username="staff", is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(reverse("metrics"), REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+
+class BenchmarkTestClass(TestCase):
+    def test_measure_reports_percentiles_and_queries(self):
+        result = measure(lambda: list(User.objects.all()), repeat=10)
+
+        self.assertEqual(result["queries"], 1)
+        self.assertLessEqual(result["p50_ms"], result["p95_ms"])
+        self.assertLessEqual(result["p95_ms"], result["p99_ms"])
+        self.assertGreater(result["peak_kb"], 0)
+
+    def test_percentile_nearest_rank(self):
+        values = list(range(100, 0, -1))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.95), 95)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([7.0], 0.99), 7.0)
+
+    def test_measure_single_repeat(self):
+        result = measure(lambda: None, repeat=1)
+        self.assertEqual(result["p50_ms"], result["p99_ms"])
+
+    def test_regressions(self):
+        baseline = {
+            "index": {"p95_ms": 10.0, "queries": 3},
+            "removed": {"p95_ms": 1.0, "queries": 1},
+        }
+        current = {
+            "index": {"p95_ms": 11.0, "queries": 3},
+            "added": {"p95_ms": 100.0, "queries": 9},
+        }
+        self.assertEqual(regressions(baseline, current), [])
+
+        current["index"] = {"p95_ms": 13.0, "queries": 4}
+        self.assertEqual(len(regressions(baseline, current)), 2)
+        self.assertEqual(
+            len(regressions(baseline, current, threshold=0.5)), 1)
+
+
+@override_settings(PERF_SAMPLE_RATE=0)
+class ProfilingTestClass(TestCase):
+    def setUp(self):
+        self.profile_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            PROFILE_DIR=self.profile_dir,
+            PROFILE_TOKEN="secret",
+            PROFILE_SAMPLE_RATE=0,
+            PROFILE_KEEP=2,
+        )
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+        cache.clear()
+
+    def test_profiled_with_token_only(self):
+        for token in [None, "wrong"]:
+            headers = {"HTTP_X_PROFILE_TOKEN": token} if token else {}
+            response = Client().get(reverse("posts:index"), **headers)
+            self.assertNotIn("X-Profile", response)
+        self.assertEqual(os.listdir(self.profile_dir), [])
+
+        response = Client().get(
+            reverse("posts:index"), HTTP_X_PROFILE_TOKEN="secret")
+        name = response["X-Profile"]
+        self.assertIn("posts_index", name)
+        stats = pstats.Stats(os.path.join(self.profile_dir, name))
+        self.assertGreater(stats.total_calls, 0)
+
+    def test_old_profiles_removed(self):
+        names = [
+            Client().get(
+                reverse("posts:index"), HTTP_X_PROFILE_TOKEN="secret"
+            )["X-Profile"]
+            for _ in range(3)
+        ]
+        self.assertEqual(sorted(os.listdir(self.profile_dir)), names[1:])
+
+    @override_settings(PROFILE_SAMPLE_RATE=1)
+    def test_sampled_requests_profiled(self):
+        response = Client().get(reverse("posts:index"))
+        self.assertNotIn("X-Profile", response)
+        self.assertEqual(len(os.listdir(self.profile_dir)), 1)
+
+
+@override_settings(PERF_SAMPLE_RATE=0)
+class SlowQueryLogTestClass(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="author")
+
+    def tearDown(self):
+        cache.clear()
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_slow_queries_logged_with_plan_and_origin(self):
+        with self.assertLogs("yatube.slow_queries", "INFO") as logs:
+            self.client.get(
+                reverse("posts:profile", kwargs={"username": "author"}))
+        records = [json.loads(record.getMessage()) for record in logs.records]
+
+        self.assertTrue(all(
+            record["view"] == "posts:profile" for record in records))
+        selects = [
+            record for record in records
+            if record["sql"].startswith("SELECT")
+            and record["location"].startswith("posts/views.py")
+        ]
+        self.assertTrue(selects)
+        self.assertTrue(all(
+            record["plan"] for record in selects
+            if record["params"] != REDACTED
+        ))
+        self.assertIn(self.user.id, selects[-1]["params"])
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_session_and_user_params_redacted(self):
+        with self.assertLogs("yatube.slow_queries", "INFO") as logs:
+            User.objects.create_user(username="user", password="secret")
+            self.client.login(username="user", password="secret")
+        records = [json.loads(record.getMessage()) for record in logs.records]
+
+        sensitive = [
+            record for record in records
+            if any(table in record["sql"]
+                   for table in ["auth_user", "django_session"])
+        ]
+        self.assertTrue(any(
+            "django_session" in record["sql"] for record in sensitive))
+        self.assertTrue(all(
+            record["params"] == REDACTED and record["plan"] is None
+            for record in sensitive
+        ))
+        self.assertNotIn("pbkdf2", "".join(logs.output))
+
+    def test_log_file_private(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "logs", "slow.log")
+        handler = PrivateRotatingFileHandler(path, delay=True)
+        handler.emit(logging.makeLogRecord({"msg": "query"}))
+        handler.close()
+
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o600)
+        self.assertEqual(
+            stat.S_IMODE(os.stat(os.path.dirname(path)).st_mode), 0o700)
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_explain_not_counted_as_query(self):
+        with self.assertLogs("yatube.slow_queries", "INFO"):
+            with self.assertNumQueries(1):
+                User.objects.count()
+
+    def test_wrappers_balanced_when_connecting_inside_wrapper(self):
+        connection.execute_wrappers.remove(log_slow_query)
+        with record_queries() as queries:
+            connection_created.send(
+                sender=connection.__class__, connection=connection)
+            User.objects.count()
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(connection.execute_wrappers, [log_slow_query])
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=10 ** 6)
+    def test_fast_queries_not_logged(self):
+        # assertNoLogs появился только в Python 3.10.
+        with self.assertLogs("yatube.slow_queries", "INFO") as logs:
+            User.objects.count()
+            logging.getLogger("yatube.slow_queries").info("end")
+        self.assertEqual(logs.output, ["INFO:yatube.slow_queries:end"])
+
+    def test_report_orders_by_total_time(self):
+        records = [
+            {"sql": "SELECT a WHERE id IN (%s, %s)", "duration_ms": 300,
+             "view": "posts:index", "location": "posts/views.py:1 in f"},
+            {"sql": "SELECT a WHERE id IN (%s)", "duration_ms": 300,
+             "view": "posts:profile", "location": "posts/views.py:2 in g"},
+            {"sql": "SELECT b", "duration_ms": 500, "plan": "SCAN b"},
+        ]
+        top = summarize(records)
+        self.assertEqual(
+            [query["sql"] for query in top],
+            [fingerprint(records[0]["sql"]), "SELECT b"],
+        )
+        self.assertEqual(top[0]["count"], 2)
+        self.assertEqual(top[0]["views"], {"posts:index", "posts:profile"})
+
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "slow.log")
+        with open(path, "w") as log:
+            log.write(json.dumps(records[2]) + "\n")
+        with open(path + ".1", "w") as log:
+            log.write(json.dumps(records[0]) + "\nnot json\n")
+        out = StringIO()
+        call_command("slow_queries_report", log=path, stdout=out)
+        shutil.rmtree(directory)
+
+        report = out.getvalue()
+        self.assertLess(report.index("SELECT b"), report.index("IN (...)"))
+        self.assertIn("SCAN b", report)
@@ -0,0 +1,141 @@
+import hashlib
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .metrics import registry
+from .views import too_many_requests
+
+
+def throttle_key(scope, identity):
+    digest = hashlib.md5(str(identity).lower().encode()).hexdigest()
+    return f"throttle:{scope}:{digest}"
+
+
+def record_hit(scope, outcome):
+    registry.inc(
+        "yatube_throttle_requests_total",
+        {"scope": scope, "outcome": outcome},
+    )
+
+
+class TokenBucket:
+    """Ограничитель частоты «ведро с жетонами» в общем кэше.
+
+    В ведре до burst жетонов, каждый запрос забирает один, а запас
+    восполняется со скоростью rate жетонов в секунду. Проверка не
+    атомарна, поэтому при гонке несколько лишних запросов могут пройти.
+    """
+
+    def __init__(self, scope, rate, burst):
+        self.scope = scope
+        self.rate = rate
+        self.burst = burst
+
+    def tokens(self, key, now):
+        tokens, updated = cache.get(key, (self.burst, now))
+        return min(self.burst, tokens + (now - updated) * self.rate)
+
+    def wait(self, identity, now=None):
+        """Как consume, но жетон не забирает, даже если он есть."""
+        now = time.time() if now is None else now
+        tokens = self.tokens(throttle_key(self.scope, identity), now)
+        if tokens < 1:
+            record_hit(self.scope, "rejected")
+            return math.ceil((1 - tokens) / self.rate)
+        return 0
+
+    def consume(self, identity, now=None):
+        """Забирает жетон; возвращает 0 или сколько секунд ждать."""
+        now = time.time() if now is None else now
+        key = throttle_key(self.scope, identity)
+        tokens = self.tokens(key, now)
+        timeout = math.ceil(self.burst / self.rate)
+
+        if tokens < 1:
+            cache.set(key, (tokens, now), timeout)
+            record_hit(self.scope, "rejected")
+            return math.ceil((1 - tokens) / self.rate)
+
+        cache.set(key, (tokens - 1, now), timeout)
+        record_hit(self.scope, "allowed")
+        return 0
+
+
+class SlidingWindow:
+    """Счётчик запросов в скользящем окне длиной period секунд.
+
+    Хранятся только счётчики текущего и предыдущего окна; предыдущее
+    учитывается с весом, убывающим по мере сдвига окна. Проверка стоит
+    одного get_many и одного incr.
+    """
+
+    def __init__(self, scope, limit, period):
+        self.scope = scope
+        self.limit = limit
+        self.period = period
+
+    def hit(self, identity, now=None):
+        """Учитывает запрос; возвращает 0 или сколько секунд ждать."""
+        now = time.time() if now is None else now
+        window, elapsed = divmod(now, self.period)
+        base = throttle_key(self.scope, identity)
+        current_key = f"{base}:{int(window)}"
+        previous_key = f"{base}:{int(window) - 1}"
+        counts = cache.get_many([previous_key, current_key])
+        previous = counts.get(previous_key, 0)
+        current = counts.get(current_key, 0)
+
+        weight = 1 - elapsed / self.period
+        if previous * weight + current >= self.limit:
+            record_hit(self.scope, "rejected")
+            return self.retry_after(previous, current, elapsed)
+
+        cache.add(current_key, 0, 2 * self.period)
+        try:
+            cache.incr(current_key)
+        except ValueError:
+            cache.set(current_key, 1, 2 * self.period)
+        record_hit(self.scope, "allowed")
+        return 0
+
+    def retry_after(self, previous, current, elapsed):
+        if current >= self.limit or not previous:
+            return math.ceil(self.period - elapsed)
+        # Вклад предыдущего окна убывает линейно: ждём, пока оценка
+        # не опустится ниже лимита.
+        free_at = self.period * (1 - (self.limit - current) / previous)
+        return max(1, math.ceil(free_at - elapsed))
+
+
+def client_ip(request):
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def rate_limit(scope, methods=None):
+    """Ограничивает частоту вызова view для пользователя и IP-адреса.
+
+    Лимиты берутся из settings.RATE_LIMITS[scope] в виде
+    {"user": (limit, period), "ip": (limit, period)}.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if methods is None or request.method in methods:
+                limits = settings.RATE_LIMITS[scope]
+                identities = {"ip": client_ip(request)}
+                if request.user.is_authenticated:
+                    identities["user"] = request.user.pk
+                retry_after = max(
+                    SlidingWindow(f"{scope}-{kind}", *limits[kind])
+                    .hit(identity)
+                    for kind, identity in identities.items()
+                )
+                if retry_after:
+                    return too_many_requests(request, retry_after)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
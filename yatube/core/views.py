@@ -1,5 +1,11 @@
+from django.conf import settings
+from django.db.models import Count
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
 
+from .metrics import collect, render as render_metrics
+from .models import OutgoingEmail, Task
+
 
 def page_not_found(request, exception):
     return render(request, "core/404.html", {"path": request.path}, status=404)
@@ -15,3 +21,35 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=""):
     return render(request, "core/403csrf.html")
+
+
+def too_many_requests(request, retry_after):
+    response = render(
+        request, "core/429.html", {"retry_after": retry_after}, status=429)
+    response["Retry-After"] = str(retry_after)
+    return response
+
+
+def queue_depths():
+    gauges = {}
+    for queue, model in [("tasks", Task), ("email", OutgoingEmail)]:
+        counts = dict(
+            model.objects.order_by().values_list("status")
+            .annotate(Count("id"))
+        )
+        for status, _ in model.STATUS_CHOICES:
+            key = (("queue", queue), ("status", status))
+            gauges[("yatube_queue_depth", key)] = counts.get(status, 0)
+    return gauges
+
+
+def metrics(request):
+    """Метрики в формате Prometheus для внутренних адресов и персонала."""
+    if (request.META.get("REMOTE_ADDR") not in settings.INTERNAL_IPS
+            and not request.user.is_staff):
+        raise Http404
+    counters, histograms = collect()
+    return HttpResponse(
+        render_metrics(counters, histograms, queue_depths()),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
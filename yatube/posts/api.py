@@ -0,0 +1,285 @@
+import base64
+import binascii
+import json
+from functools import wraps
+
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_GET, require_POST
+
+from core.paging import page_size
+from core.throttling import rate_limit
+from .follows import follow_authors, unfollow_authors
+from .models import Comment, Group, Post, User
+from .watermark import high_water
+
+API_PAGE_SIZE: int = 20
+# Ответ API — плоские строки без экземпляров моделей, поэтому страница
+# может быть больше, чем в HTML-ленте.
+API_MAX_PAGE_SIZE: int = 200
+API_BATCH_MAX: int = 100
+
+JSON_PARAMS = {"separators": (",", ":"), "ensure_ascii": False}
+
+POST_FIELDS = {
+    "id": "id",
+    "text": "text",
+    "pub_date": "pub_date",
+    "image": "image",
+    "author": "author__username",
+    "group": "group__slug",
+}
+
+COMMENT_FIELDS = {
+    "id": "id",
+    "text": "text",
+    "created": "created",
+    "author": "author__username",
+}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class InvalidMark(ValueError):
+    pass
+
+
+def api_response(data, status=200):
+    return JsonResponse(data, status=status, json_dumps_params=JSON_PARAMS)
+
+
+def api_error(detail, status):
+    return api_response({"detail": detail}, status=status)
+
+
+def api_login_required(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return api_error("Требуется авторизация.", 401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def encode_cursor(pub_date, post_id):
+    raw = json.dumps([pub_date.isoformat(), post_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Разбирает курсор вида (дата публикации, id) последнего поста."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        pub_date, post_id = json.loads(raw)
+        pub_date = parse_datetime(pub_date)
+    except (binascii.Error, TypeError, ValueError):
+        raise InvalidCursor(cursor)
+    if pub_date is None or not isinstance(post_id, int):
+        raise InvalidCursor(cursor)
+    return pub_date, post_id
+
+
+def project(queryset, fields):
+    """Проекция в словари без создания экземпляров моделей."""
+    keys = tuple(fields)
+    for row in queryset.values_list(*fields.values()):
+        yield dict(zip(keys, row))
+
+
+def post_values(queryset):
+    for row in project(queryset, POST_FIELDS):
+        if row["image"]:
+            row["image"] = default_storage.url(row["image"])
+        else:
+            row["image"] = None
+        yield row
+
+
+def cursor_page(request, queryset):
+    """Страница ленты по курсору: посты старше последнего отданного."""
+    queryset = queryset.order_by("-pub_date", "-id")
+
+    cursor = request.GET.get("cursor")
+    if cursor:
+        pub_date, post_id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=post_id))
+
+    size = page_size(request, API_PAGE_SIZE, API_MAX_PAGE_SIZE)
+    results = list(post_values(queryset[:size + 1]))
+    next_cursor = None
+    if len(results) > size:
+        results = results[:size]
+        last = results[-1]
+        next_cursor = encode_cursor(last["pub_date"], last["id"])
+
+    return {"results": results, "next": next_cursor}
+
+
+def feed_response(request, queryset):
+    try:
+        return api_response(cursor_page(request, queryset))
+    except InvalidCursor:
+        return api_error("Некорректный курсор.", 400)
+
+
+def parse_mark(request):
+    """Разбирает отметку клиента: ?after=<id> или ?since=<дата>."""
+    after = request.GET.get("after")
+    if after is not None:
+        try:
+            return Q(id__gt=int(after)), int(after), None
+        except ValueError:
+            raise InvalidMark(after)
+
+    since = request.GET.get("since")
+    try:
+        since = parse_datetime(since or "")
+    except ValueError:
+        since = None
+    if since is None:
+        raise InvalidMark(request.GET.get("since"))
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return Q(pub_date__gt=since), None, since
+
+
+def newer_posts(request, queryset):
+    """Отвечает, сколько постов новее увиденного клиентом.
+
+    Сначала сравнивает отметку клиента с кэшированным самым новым
+    постом сайта: если новее ничего нет, к базе не обращается.
+    """
+    try:
+        newer, after, since = parse_mark(request)
+    except InvalidMark:
+        return api_error("Укажите after=<id> или since=<дата>.", 400)
+
+    latest_id, latest_date = high_water()
+    data = {"latest": latest_id, "count": 0}
+    with_list = "list" in request.GET
+    if with_list:
+        data["results"] = []
+
+    if after is not None and after >= latest_id:
+        return api_response(data)
+    if since is not None and (latest_date is None or since >= latest_date):
+        return api_response(data)
+
+    queryset = queryset.filter(newer)
+    data["count"] = queryset.count()
+    if with_list and data["count"]:
+        size = page_size(request, API_PAGE_SIZE, API_MAX_PAGE_SIZE)
+        data["results"] = list(
+            post_values(queryset.order_by("-id")[:size]))
+    return api_response(data)
+
+
+@require_GET
+def index(request):
+    return feed_response(request, Post.objects.all())
+
+
+@require_GET
+def index_new(request):
+    return newer_posts(request, Post.objects.all())
+
+
+@require_GET
+def group_posts(request, slug):
+    group_id = (
+        Group.objects.filter(slug=slug).values_list("id", flat=True).first())
+    if group_id is None:
+        return api_error("Группа не найдена.", 404)
+    return feed_response(request, Post.objects.filter(group_id=group_id))
+
+
+@require_GET
+def profile(request, username):
+    author_id = (
+        User.objects
+        .filter(username=username)
+        .values_list("id", flat=True)
+        .first()
+    )
+    if author_id is None:
+        return api_error("Пользователь не найден.", 404)
+    return feed_response(request, Post.objects.filter(author_id=author_id))
+
+
+@require_GET
+@api_login_required
+def follow_index(request):
+    return feed_response(
+        request, Post.objects.filter(author__following__user=request.user))
+
+
+@require_GET
+@api_login_required
+def follow_new(request):
+    return newer_posts(
+        request, Post.objects.filter(author__following__user=request.user))
+
+
+@require_GET
+def post_detail(request, post_id):
+    post = next(post_values(Post.objects.filter(id=post_id)), None)
+    if post is None:
+        return api_error("Пост не найден.", 404)
+
+    post["comments"] = list(project(
+        Comment.objects.filter(post_id=post_id).order_by("created", "id"),
+        COMMENT_FIELDS,
+    ))
+    return api_response(post)
+
+
+@require_GET
+def post_batch(request):
+    try:
+        ids = [
+            int(post_id)
+            for post_id in request.GET.get("ids", "").split(",")
+            if post_id
+        ]
+    except ValueError:
+        return api_error("Некорректный id поста.", 400)
+    if len(ids) > API_BATCH_MAX:
+        return api_error(f"Не больше {API_BATCH_MAX} постов за запрос.", 400)
+
+    posts = {
+        post["id"]: post
+        for post in post_values(Post.objects.filter(id__in=ids))
+    }
+    return api_response(
+        {"results": [posts[post_id] for post_id in ids if post_id in posts]})
+
+
+@require_POST
+@api_login_required
+@rate_limit("follow")
+def following(request):
+    """Пакетная подписка и отписка по спискам имён follow и unfollow."""
+    follow = request.POST.getlist("follow")
+    unfollow = request.POST.getlist("unfollow")
+    if len(follow) + len(unfollow) > API_BATCH_MAX:
+        return api_error(f"Не больше {API_BATCH_MAX} авторов за запрос.", 400)
+
+    ids = dict(
+        User.objects
+        .filter(username__in=follow + unfollow)
+        .values_list("username", "id")
+    )
+    data = {"followed": 0, "unfollowed": 0}
+    if follow:
+        data["followed"] = follow_authors(
+            request.user, [ids[name] for name in follow if name in ids])
+    if unfollow:
+        data["unfollowed"] = unfollow_authors(
+            request.user, [ids[name] for name in unfollow if name in ids])
+    return api_response(data)
@@ -0,0 +1,158 @@
+import datetime as dt
+from itertools import groupby, islice
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import DigestLog, Follow, Post, User
+
+DIGEST_PERIOD = dt.timedelta(days=1)
+DIGEST_POSTS_PER_AUTHOR: int = 5
+DIGEST_BATCH_SIZE: int = 500
+FETCH_CHUNK_SIZE: int = 10000
+DIGEST_SUBJECT: str = "Новые посты в ваших подписках"
+
+
+def new_posts_by_author(start, end, per_author=DIGEST_POSTS_PER_AUTHOR):
+    """Последние посты каждого автора за период и их общее количество."""
+    authors = {}
+    rows = (
+        Post.objects
+        .filter(pub_date__gt=start, pub_date__lte=end)
+        .order_by("author_id", "-pub_date")
+        .values_list("author_id", "author__username", "id", "text")
+    )
+    for author_id, username, post_id, text in rows.iterator():
+        author = authors.setdefault(
+            author_id, {"username": username, "posts": [], "count": 0})
+        author["count"] += 1
+        if len(author["posts"]) < per_author:
+            author["posts"].append({"id": post_id, "text": text})
+    return authors
+
+
+def followed_authors(start, end, after_user_id=0):
+    """Поток пар (подписчик, авторы с новыми постами) по возрастанию id.
+
+    Подписки читаются кусками, так что память не зависит от числа
+    подписчиков. Подписчики с id не больше after_user_id пропускаются.
+    """
+    rows = (
+        Follow.objects
+        .filter(
+            user_id__gt=after_user_id,
+            author_id__in=(
+                Post.objects
+                .filter(pub_date__gt=start, pub_date__lte=end)
+                .values("author_id")
+            ),
+        )
+        .order_by("user_id", "author_id")
+        .values_list("user_id", "author_id")
+        .iterator(chunk_size=FETCH_CHUNK_SIZE)
+    )
+    for user_id, group in groupby(rows, key=lambda row: row[0]):
+        yield user_id, [author_id for _, author_id in group]
+
+
+def digest_message(username, email, authors):
+    body = render_to_string(
+        "posts/email/digest.txt",
+        {
+            "username": username,
+            "authors": authors,
+            "site_url": settings.SITE_URL,
+        },
+    )
+    return EmailMessage(DIGEST_SUBJECT, body, to=[email])
+
+
+def start_digest(now):
+    """Незаконченная рассылка или новая за период с прошлой."""
+    with transaction.atomic():
+        last = DigestLog.objects.select_for_update().first()
+        if last and last.in_progress:
+            return last
+        start = last.period_end if last else now - DIGEST_PERIOD
+        return DigestLog.objects.create(
+            period_start=start,
+            period_end=now,
+            in_progress=True,
+        )
+
+
+def send_batch(log, batch, authors, connection):
+    """Ставит письма пачки в очередь и сдвигает отметку о прогрессе.
+
+    Всё происходит в одной транзакции: если пачку уже разослал другой
+    запуск, отметка не сдвинется и письма откатятся.
+    """
+    users = {
+        user_id: (username, email)
+        for user_id, username, email in (
+            User.objects
+            .filter(id__in=[user_id for user_id, _ in batch])
+            .exclude(email="")
+            .values_list("id", "username", "email")
+        )
+    }
+    messages = [
+        digest_message(
+            *users[user_id],
+            [authors[author_id] for author_id in author_ids],
+        )
+        for user_id, author_ids in batch
+        if user_id in users
+    ]
+    with transaction.atomic():
+        sent = (connection.send_messages(messages) or 0) if messages else 0
+        last_user_id = batch[-1][0]
+        moved = DigestLog.objects.filter(
+            pk=log.pk, last_user_id=log.last_user_id,
+        ).update(
+            last_user_id=last_user_id,
+            recipients=F("recipients") + sent,
+        )
+        if not moved:
+            transaction.set_rollback(True)
+            return False
+    log.last_user_id = last_user_id
+    log.recipients += sent
+    return True
+
+
+def send_digests(now=None, batch_size=DIGEST_BATCH_SIZE, connection=None):
+    """Рассылает дайджесты за период с прошлой рассылки.
+
+    Каждая пачка из batch_size получателей сохраняется в своей
+    транзакции вместе с id последнего получателя, чтобы не держать
+    блокировку базы всю рассылку. Прерванная рассылка продолжается
+    следующим запуском с того же места, а новый период начнётся уже
+    после неё.
+    """
+    now = now or timezone.now()
+    connection = connection or get_connection()
+    log = start_digest(now)
+    authors = new_posts_by_author(log.period_start, log.period_end)
+
+    followers = (
+        followed_authors(
+            log.period_start, log.period_end, log.last_user_id)
+        if authors else iter(())
+    )
+    while True:
+        batch = list(islice(followers, batch_size))
+        if not batch:
+            break
+        if not send_batch(log, batch, authors, connection):
+            # Рассылку продолжает другой запуск.
+            return log
+
+    log.posts = sum(author["count"] for author in authors.values())
+    log.in_progress = False
+    log.save(update_fields=["posts", "in_progress"])
+    return log
@@ -0,0 +1,87 @@
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from core.pubsub import bus
+
+SSE_RETRY_MS: int = 3000
+SSE_KEEPALIVE: int = 15
+SSE_STREAM_TIMEOUT: int = 60
+SSE_OVERLOAD_RETRY: int = 30
+
+# Каждый поток занимает поток WSGI-сервера, поэтому их число в процессе
+# ограничено settings.SSE_MAX_STREAMS; остальные клиенты переподключаются
+# позже.
+stream_slots = threading.BoundedSemaphore(settings.SSE_MAX_STREAMS)
+
+
+def comment_channel(post_id):
+    return f"post:{post_id}:comments"
+
+
+def comment_message(comment):
+    return {
+        "id": comment.id,
+        "author": comment.author.username,
+        "text": comment.text,
+        "created": comment.created,
+    }
+
+
+def publish_comment(comment):
+    bus.publish(comment_channel(comment.post_id), comment_message(comment))
+
+
+def sse_event(message):
+    data = json.dumps(message, cls=DjangoJSONEncoder, ensure_ascii=False)
+    return f"id: {message['id']}\nevent: comment\ndata: {data}\n\n"
+
+
+def comment_events(subscription, backlog):
+    """Поток SSE: пропущенные комментарии, затем новые из шины.
+
+    Поток ограничен по времени, чтобы не занимать воркер бесконечно:
+    браузер переподключается сам и присылает Last-Event-ID.
+    """
+    last_id = 0
+    deadline = time.monotonic() + SSE_STREAM_TIMEOUT
+    try:
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        for message in backlog:
+            last_id = message["id"]
+            yield sse_event(message)
+        while not subscription.closed and time.monotonic() < deadline:
+            message = subscription.get(timeout=SSE_KEEPALIVE)
+            if message is None:
+                yield ": keepalive\n\n"
+            elif message["id"] > last_id:
+                last_id = message["id"]
+                yield sse_event(message)
+    finally:
+        subscription.close()
+
+
+class CommentStream:
+    """Поток SSE, который при закрытии ответа освобождает слот и подписку.
+
+    Django закрывает ответ и тогда, когда поток так и не начали читать;
+    finally генератора в этом случае не выполняется.
+    """
+
+    def __init__(self, subscription, backlog):
+        self.subscription = subscription
+        self.events = comment_events(subscription, backlog)
+        self.closed = False
+
+    def __iter__(self):
+        return self.events
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.events.close()
+            self.subscription.close()
+            stream_slots.release()
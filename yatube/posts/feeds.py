@@ -0,0 +1,173 @@
+import hashlib
+
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.utils.http import http_date, parse_http_date, quote_etag
+
+from .models import Group, Post, User
+
+FEED_ITEMS_COUNT: int = 20
+FEED_CACHE_TIMEOUT: int = 60 * 15
+FEED_TITLE_LEN: int = 50
+
+FEED_TYPES = {
+    "rss": Rss201rev2Feed,
+    "atom": Atom1Feed,
+}
+
+FEED_ITEM_FIELDS = (
+    "id",
+    "text",
+    "pub_date",
+    "author",
+    "author__username",
+    "author__first_name",
+    "author__last_name",
+)
+
+
+def feed_cache_key(scope, kind):
+    # В scope попадают имена пользователей, которые memcached не примет
+    # в ключе как есть.
+    digest = hashlib.md5(scope.encode()).hexdigest()
+    return f"feed:{kind}:{digest}"
+
+
+def feed_scopes(username, group_slug=None):
+    """Возвращает ленты, в которые попадает пост автора и группы."""
+    scopes = ["index", f"author:{username}"]
+    if group_slug is not None:
+        scopes.append(f"group:{group_slug}")
+    return scopes
+
+
+def post_feed_scopes(post):
+    group_slug = post.group.slug if post.group_id is not None else None
+    return feed_scopes(post.author.username, group_slug)
+
+
+def invalidate_feeds(scopes):
+    cache.delete_many([
+        feed_cache_key(scope, kind)
+        for scope in scopes
+        for kind in FEED_TYPES
+    ])
+
+
+class PostsFeed(Feed):
+    """Лента последних постов с кэшированием тела и условными GET."""
+
+    def __init__(self, kind="rss"):
+        self.kind = kind
+        self.feed_type = FEED_TYPES[kind]
+
+    def __call__(self, request, *args, **kwargs):
+        key = feed_cache_key(self.scope(**kwargs), self.kind)
+        entry = cache.get(key)
+        if entry is None:
+            response = super().__call__(request, *args, **kwargs)
+            entry = {
+                "content": response.content,
+                "content_type": response["Content-Type"],
+                "etag": quote_etag(hashlib.md5(response.content).hexdigest()),
+                # Feed ставит Last-Modified по самому свежему посту, так
+                # что перезаполнение кэша не меняет его без новых постов.
+                "last_modified": parse_http_date(response["Last-Modified"]),
+            }
+            cache.set(key, entry, FEED_CACHE_TIMEOUT)
+
+        response = get_conditional_response(
+            request,
+            etag=entry["etag"],
+            last_modified=entry["last_modified"],
+        )
+        if response is None:
+            response = HttpResponse(
+                entry["content"], content_type=entry["content_type"])
+        response["ETag"] = entry["etag"]
+        response["Last-Modified"] = http_date(entry["last_modified"])
+        return response
+
+    def scope(self, **kwargs):
+        return "index"
+
+    def title(self):
+        return "Последние обновления на сайте"
+
+    def link(self):
+        return reverse("posts:index")
+
+    def description(self):
+        return self.title()
+
+    def posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        return (
+            self.posts(obj)
+            .select_related("author")
+            .only(*FEED_ITEM_FIELDS)[:FEED_ITEMS_COUNT]
+        )
+
+    def item_title(self, item):
+        return item.text[:FEED_TITLE_LEN]
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse("posts:post_detail", kwargs={"post_id": item.id})
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+
+class GroupPostsFeed(PostsFeed):
+    def scope(self, slug):
+        return f"group:{slug}"
+
+    def get_object(self, request, slug):
+        return Group.objects.only("title", "slug", "description").get(
+            slug=slug)
+
+    def title(self, group):
+        return group.title
+
+    def link(self, group):
+        return reverse("posts:group_list", kwargs={"slug": group.slug})
+
+    def description(self, group):
+        return group.description
+
+    def posts(self, group):
+        return Post.objects.filter(group=group)
+
+
+class AuthorPostsFeed(PostsFeed):
+    def scope(self, username):
+        return f"author:{username}"
+
+    def get_object(self, request, username):
+        return User.objects.only(
+            "username", "first_name", "last_name").get(username=username)
+
+    def title(self, author):
+        name = author.get_full_name() or author.username
+        return f"Посты пользователя {name}"
+
+    def link(self, author):
+        return reverse("posts:profile", kwargs={"username": author.username})
+
+    def description(self, author):
+        return self.title(author)
+
+    def posts(self, author):
+        return Post.objects.filter(author=author)
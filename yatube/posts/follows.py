@@ -0,0 +1,87 @@
+from django.core.cache import cache
+
+from .models import Follow, Recommendation, User
+
+# Сброс при подписке виден только процессу, где он случился, если кэш
+# не общий, поэтому срок хранения короткий.
+FOLLOWING_CACHE_TIMEOUT: int = 60
+
+
+def following_cache_key(user_id):
+    return f"following:{user_id}"
+
+
+def following_ids(user):
+    """Множество id авторов, на которых подписан пользователь.
+
+    Хранится в кэше, чтобы профиль отвечал на вопрос «подписан ли?» без
+    запроса к базе.
+    """
+    key = following_cache_key(user.id)
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(
+            Follow.objects
+            .filter(user=user)
+            .values_list("author_id", flat=True)
+        )
+        cache.set(key, ids, FOLLOWING_CACHE_TIMEOUT)
+    return ids
+
+
+def reset_following(user_id):
+    cache.delete(following_cache_key(user_id))
+
+
+def recommended_authors(user):
+    """Сохранённые рекомендации без авторов, на которых уже подписан."""
+    following = following_ids(user)
+    recommendations = (
+        Recommendation.objects
+        .filter(user=user)
+        .select_related("author")
+        .only(
+            "author",
+            "author__username",
+            "author__first_name",
+            "author__last_name",
+        )
+    )
+    return [
+        recommendation.author
+        for recommendation in recommendations
+        if recommendation.author_id not in following
+    ]
+
+
+def author_ids(usernames):
+    return list(
+        User.objects
+        .filter(username__in=usernames)
+        .values_list("id", flat=True)
+    )
+
+
+def follow_authors(user, ids):
+    """Подписывает на авторов; возвращает число новых подписок.
+
+    Повторы игнорируются, в том числе при гонке двух запросов.
+    """
+    ids = set(ids) - {user.id}
+    ids -= set(
+        Follow.objects
+        .filter(user=user, author_id__in=ids)
+        .values_list("author_id", flat=True)
+    )
+    Follow.objects.bulk_create(
+        [Follow(user=user, author_id=author_id) for author_id in ids],
+        ignore_conflicts=True,
+    )
+    reset_following(user.id)
+    return len(ids)
+
+
+def unfollow_authors(user, ids):
+    deleted, _ = Follow.objects.filter(user=user, author_id__in=ids).delete()
+    reset_following(user.id)
+    return deleted
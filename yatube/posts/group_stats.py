@@ -0,0 +1,117 @@
+import datetime as dt
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Group, GroupActivity, GroupStats, Post
+
+HISTOGRAM_DAYS: int = 14
+
+
+def post_added(group_id, when):
+    """Учитывает новый пост группы в счётчиках без агрегации по постам."""
+    day = timezone.localdate(when)
+    with transaction.atomic():
+        GroupStats.objects.bulk_create(
+            [GroupStats(group_id=group_id)], ignore_conflicts=True)
+        GroupStats.objects.filter(group_id=group_id).update(
+            post_count=F("post_count") + 1)
+        GroupStats.objects.filter(
+            Q(last_post_at__isnull=True) | Q(last_post_at__lt=when),
+            group_id=group_id,
+        ).update(last_post_at=when)
+
+        GroupActivity.objects.bulk_create(
+            [GroupActivity(group_id=group_id, day=day)],
+            ignore_conflicts=True,
+        )
+        GroupActivity.objects.filter(group_id=group_id, day=day).update(
+            post_count=F("post_count") + 1)
+
+
+def post_removed(group_id, when):
+    day = timezone.localdate(when)
+    with transaction.atomic():
+        GroupStats.objects.filter(
+            group_id=group_id, post_count__gt=0
+        ).update(post_count=F("post_count") - 1)
+        GroupActivity.objects.filter(
+            group_id=group_id, day=day, post_count__gt=0
+        ).update(post_count=F("post_count") - 1)
+
+        # Дата последнего поста пересчитывается, только если удалён
+        # самый свежий пост группы.
+        if GroupStats.objects.filter(
+                group_id=group_id, last_post_at__lte=when).exists():
+            last_post_at = (
+                Post.objects
+                .filter(group_id=group_id)
+                .aggregate(last=Max("pub_date"))["last"]
+            )
+            GroupStats.objects.filter(group_id=group_id).update(
+                last_post_at=last_post_at)
+
+
+def histograms(group_ids, days=HISTOGRAM_DAYS, today=None):
+    """Количество постов по дням за последние days дней для каждой группы."""
+    today = today or timezone.localdate()
+    start = today - dt.timedelta(days=days - 1)
+    counts = {
+        (group_id, day): post_count
+        for group_id, day, post_count in (
+            GroupActivity.objects
+            .filter(group_id__in=group_ids, day__gte=start)
+            .values_list("group_id", "day", "post_count")
+        )
+    }
+    return {
+        group_id: [
+            counts.get((group_id, start + dt.timedelta(days=i)), 0)
+            for i in range(days)
+        ]
+        for group_id in group_ids
+    }
+
+
+def rebuild_group_stats():
+    """Пересчитывает статистику всех групп по постам."""
+    totals = {
+        row["group"]: row
+        for row in (
+            Post.objects
+            .filter(group__isnull=False)
+            .order_by()
+            .values("group")
+            .annotate(post_count=Count("id"), last_post_at=Max("pub_date"))
+        )
+    }
+    daily = (
+        Post.objects
+        .filter(group__isnull=False)
+        .annotate(day=TruncDate("pub_date"))
+        .order_by()
+        .values("group", "day")
+        .annotate(post_count=Count("id"))
+    )
+    with transaction.atomic():
+        GroupStats.objects.all().delete()
+        GroupActivity.objects.all().delete()
+        GroupStats.objects.bulk_create(
+            GroupStats(
+                group_id=group_id,
+                post_count=totals.get(group_id, {}).get("post_count", 0),
+                last_post_at=totals.get(group_id, {}).get("last_post_at"),
+            )
+            for group_id in Group.objects.values_list("id", flat=True)
+        )
+        GroupActivity.objects.bulk_create(
+            GroupActivity(
+                group_id=row["group"],
+                day=row["day"],
+                post_count=row["post_count"],
+            )
+            for row in daily.iterator()
+        )
+    return GroupStats.objects.count()
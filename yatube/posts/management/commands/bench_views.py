@@ -0,0 +1,182 @@
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.benchmark import REGRESSION_THRESHOLD, measure, regressions
+from posts.models import Comment, Follow, Group, Post, User
+
+VIEW_BENCHMARK_REPEAT: int = 100
+UNLIMITED_RATE = (10 ** 9, 1)
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет перцентили задержки, число запросов и пик памяти "
+        "страниц постов на заполненной базе"
+    )
+
+    views = [
+        "index",
+        "group_posts",
+        "profile",
+        "post_detail",
+        "follow_index",
+        "post_create",
+        "add_comment",
+    ]
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeat", type=int, default=VIEW_BENCHMARK_REPEAT,
+            help="Количество запросов к каждой странице",
+        )
+        parser.add_argument(
+            "--view", action="append", choices=self.views, dest="only",
+            help="Замерить только эти страницы",
+        )
+        parser.add_argument(
+            "--cold-cache", action="store_true",
+            help="Очищать кэш перед каждым запросом",
+        )
+        parser.add_argument(
+            "--output", help="Сохранить результаты в JSON-файл")
+        parser.add_argument(
+            "--compare",
+            help="Сравнить с результатами из JSON-файла прошлого замера",
+        )
+        parser.add_argument(
+            "--threshold", type=float, default=REGRESSION_THRESHOLD,
+            help="Допустимый рост p95 при сравнении, доля",
+        )
+
+    def targets(self):
+        """Самые тяжёлые объекты набора: с ними страницы самые большие."""
+        reader = (
+            User.objects
+            .annotate(follows=Count("follower"))
+            .order_by("-follows")
+            .first()
+        )
+        author = (
+            User.objects
+            .annotate(followers=Count("following"))
+            .order_by("-followers")
+            .first()
+        )
+        group = (
+            Group.objects
+            .annotate(posts=Count("post"))
+            .order_by("-posts")
+            .first()
+        )
+        post_id = (
+            Comment.objects
+            .order_by()
+            .values("post")
+            .annotate(comments=Count("id"))
+            .order_by("-comments")
+            .values_list("post", flat=True)
+            .first()
+        ) or Post.objects.values_list("id", flat=True).first()
+        if None in (reader, author, group, post_id):
+            raise CommandError(
+                "Не хватает данных; заполните базу командой seed_benchmark")
+        return reader, author, group, post_id
+
+    def requests(self, reader, author, group, post_id):
+        guest = Client()
+        client = Client()
+        client.force_login(reader)
+        return {
+            "index": lambda: guest.get(reverse("posts:index")),
+            "group_posts": lambda: guest.get(
+                reverse("posts:group_list", kwargs={"slug": group.slug})),
+            "profile": lambda: guest.get(
+                reverse(
+                    "posts:profile", kwargs={"username": author.username})),
+            "post_detail": lambda: guest.get(
+                reverse("posts:post_detail", kwargs={"post_id": post_id})),
+            "follow_index": lambda: client.get(
+                reverse("posts:follow_index")),
+            "post_create": lambda: client.post(
+                reverse("posts:post_create"),
+                {"text": "Замер создания поста", "group": group.id},
+            ),
+            "add_comment": lambda: client.post(
+                reverse("posts:add_comment", kwargs={"post_id": post_id}),
+                {"text": "Замер комментария"},
+            ),
+        }
+
+    def run(self, names, repeat, cold_cache):
+        """Замеряет страницы и откатывает всё, что они записали в базу."""
+        requests = self.requests(*self.targets())
+        results = {}
+        with transaction.atomic():
+            for name in names:
+                def call(request=requests[name]):
+                    if cold_cache:
+                        cache.clear()
+                    response = request()
+                    if response.status_code >= 400:
+                        raise CommandError(
+                            f"{name}: ответ {response.status_code}")
+                    return response
+
+                results[name] = measure(call, repeat)
+            transaction.set_rollback(True)
+        return results
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1:
+            raise CommandError("Нужен хотя бы один повтор")
+        names = options["only"] or self.views
+        with override_settings(
+            DEBUG=False,
+            PERF_SAMPLE_RATE=0,
+            ALLOWED_HOSTS=settings.ALLOWED_HOSTS + ["testserver"],
+            RATE_LIMITS={
+                scope: {kind: UNLIMITED_RATE for kind in limits}
+                for scope, limits in settings.RATE_LIMITS.items()
+            },
+        ):
+            results = self.run(names, options["repeat"], options["cold_cache"])
+
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name}: p50 {result['p50_ms']:.2f} мс, "
+                f"p95 {result['p95_ms']:.2f} мс, "
+                f"p99 {result['p99_ms']:.2f} мс, "
+                f"запросов: {result['queries']}, "
+                f"{result['peak_kb']:.1f} КБ"
+            )
+
+        if options["output"]:
+            report = {
+                "created": timezone.now().isoformat(),
+                "repeat": options["repeat"],
+                "cold_cache": options["cold_cache"],
+                "dataset": {
+                    model._meta.model_name: model.objects.count()
+                    for model in (User, Group, Post, Comment, Follow)
+                },
+                "views": results,
+            }
+            with open(options["output"], "w") as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+
+        if options["compare"]:
+            with open(options["compare"]) as file:
+                baseline = json.load(file)["views"]
+            problems = regressions(baseline, results, options["threshold"])
+            if problems:
+                raise CommandError(
+                    "Производительность ухудшилась:\n" + "\n".join(problems))
+            self.stdout.write(self.style.SUCCESS("Регрессий не найдено"))
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+
+from core.benchmark import BENCHMARK_REPEAT, measure
+from posts.models import Post
+from posts.views import POSTS_PER_PAGE, post_cards
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает выборку страницы ленты целиком и только по полям "
+        "карточки поста"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeat", type=int, default=BENCHMARK_REPEAT,
+            help="Количество повторов каждого замера",
+        )
+        parser.add_argument(
+            "--per-page", type=int, default=POSTS_PER_PAGE,
+            help="Размер страницы ленты",
+        )
+
+    def handle(self, *args, **options):
+        per_page = options["per_page"]
+        querysets = {
+            "full": Post.objects.select_related("author", "group"),
+            "slim": post_cards(Post.objects.all()),
+        }
+        results = {
+            name: measure(
+                lambda queryset=queryset: list(queryset[:per_page]),
+                options["repeat"],
+            )
+            for name, queryset in querysets.items()
+        }
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name}: {result['median_ms']:.2f} мс, "
+                f"{result['peak_kb']:.1f} КБ, "
+                f"запросов: {result['queries']}"
+            )
+        full, slim = results["full"], results["slim"]
+        self.stdout.write(self.style.SUCCESS(
+            f"Время: {slim['median_ms'] / full['median_ms']:.0%}, "
+            f"память: {slim['peak_kb'] / full['peak_kb']:.0%} от полной "
+            "выборки"
+        ))
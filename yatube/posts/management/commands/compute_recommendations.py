@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from posts.recommendations import (
+    BATCH_SIZE,
+    RECOMMENDATIONS_COUNT,
+    compute_recommendations,
+)
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает рекомендации «на кого подписаться»"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=BATCH_SIZE,
+            help="Сколько пользователей обрабатывать за одну транзакцию",
+        )
+        parser.add_argument(
+            "--limit", type=int, default=RECOMMENDATIONS_COUNT,
+            help="Сколько авторов рекомендовать каждому пользователю",
+        )
+
+    def handle(self, *args, **options):
+        total = compute_recommendations(
+            batch_size=options["batch_size"],
+            limit=options["limit"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Сохранено рекомендаций: {total}"))
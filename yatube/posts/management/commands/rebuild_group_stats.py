@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts.group_stats import rebuild_group_stats
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает статистику групп по постам"
+
+    def handle(self, *args, **options):
+        groups = rebuild_group_stats()
+        self.stdout.write(
+            self.style.SUCCESS(f"Обновлена статистика групп: {groups}"))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import rebuild_trending
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает рейтинги популярности постов и групп"
+
+    def handle(self, *args, **options):
+        posts, groups = rebuild_trending()
+        self.stdout.write(self.style.SUCCESS(
+            f"Обновлено постов: {posts}, групп: {groups}"))
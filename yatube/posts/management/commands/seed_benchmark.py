@@ -0,0 +1,99 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.group_stats import rebuild_group_stats
+from posts.models import Post
+from posts.recommendations import compute_recommendations
+from posts.seeding import (
+    COMMENTS_COUNT,
+    FOLLOWS_COUNT,
+    GROUPS_COUNT,
+    IMAGE_SHARE,
+    INSERT_BATCH_SIZE,
+    POSTS_COUNT,
+    SEED,
+    SEED_DAYS,
+    USERS_COUNT,
+    BenchmarkSeeder,
+)
+from posts.trending import rebuild_trending
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет пустую базу большим набором данных для замеров "
+        "производительности"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--seed", type=int, default=SEED,
+            help="Зерно генераторов случайных чисел",
+        )
+        parser.add_argument(
+            "--scale", type=float, default=1.0,
+            help="Множитель для количества всех объектов",
+        )
+        parser.add_argument("--users", type=int, default=USERS_COUNT)
+        parser.add_argument("--groups", type=int, default=GROUPS_COUNT)
+        parser.add_argument("--posts", type=int, default=POSTS_COUNT)
+        parser.add_argument("--comments", type=int, default=COMMENTS_COUNT)
+        parser.add_argument("--follows", type=int, default=FOLLOWS_COUNT)
+        parser.add_argument(
+            "--days", type=int, default=SEED_DAYS,
+            help="За сколько дней распределить посты",
+        )
+        parser.add_argument(
+            "--image-share", type=float, default=IMAGE_SHARE,
+            help="Доля постов с картинкой",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=INSERT_BATCH_SIZE,
+            help="Размер пачки bulk_create",
+        )
+        parser.add_argument(
+            "--recommendations", action="store_true",
+            help=(
+                "Пересчитать и рекомендации; на полном наборе это "
+                "дольше, чем всё остальное"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if Post.objects.exists():
+            raise CommandError(
+                "В базе уже есть посты. Очистите её командой flush, "
+                "чтобы данные с тем же зерном совпадали."
+            )
+
+        def scaled(name):
+            return max(1, round(options[name] * options["scale"]))
+
+        seeder = BenchmarkSeeder(
+            seed=options["seed"],
+            days=options["days"],
+            batch_size=options["batch_size"],
+        )
+        stages = [
+            ("Пользователи", lambda: seeder.users(scaled("users"))),
+            ("Группы", lambda: seeder.groups(scaled("groups"))),
+            ("Посты", lambda: seeder.posts(
+                scaled("posts"), options["image_share"])),
+            ("Подписки", lambda: seeder.follows(scaled("follows"))),
+            ("Комментарии", lambda: seeder.comments(scaled("comments"))),
+            ("Статистика групп", rebuild_group_stats),
+            ("Рейтинги", lambda: sum(rebuild_trending(seeder.now))),
+        ]
+        if options["recommendations"]:
+            stages.append(("Рекомендации", compute_recommendations))
+        started = time.perf_counter()
+        for title, stage in stages:
+            stage_started = time.perf_counter()
+            count = stage()
+            self.stdout.write(
+                f"{title}: {count} за "
+                f"{time.perf_counter() - stage_started:.1f} с"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Готово за {time.perf_counter() - started:.1f} с"))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from posts.digests import DIGEST_BATCH_SIZE, send_digests
+
+
+class Command(BaseCommand):
+    help = "Рассылает подписчикам дайджест новых постов"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=DIGEST_BATCH_SIZE,
+            help="Сколько писем формировать за раз",
+        )
+
+    def handle(self, *args, **options):
+        log = send_digests(batch_size=options["batch_size"])
+        if log.in_progress:
+            self.stdout.write(
+                "Рассылку за этот период продолжает другой запуск")
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Дайджест отправлен получателям: {log.recipients}, "
+            f"постов: {log.posts}"))
@@ -0,0 +1,23 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_recommendation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='trending_score',
+            field=models.FloatField(db_index=True, default=0.0, editable=False, verbose_name='Рейтинг популярности'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='trending_score',
+            field=models.FloatField(db_index=True, default=0.0, editable=False, verbose_name='Рейтинг популярности'),
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:25
+
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+import django.db.models.deletion
+
+
+def fill_group_stats(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    GroupStats = apps.get_model('posts', 'GroupStats')
+    GroupActivity = apps.get_model('posts', 'GroupActivity')
+    Post = apps.get_model('posts', 'Post')
+
+    totals = {
+        row['group']: row
+        for row in (
+            Post.objects
+            .filter(group__isnull=False)
+            .order_by()
+            .values('group')
+            .annotate(
+                post_count=models.Count('id'),
+                last_post_at=models.Max('pub_date'),
+            )
+        )
+    }
+    GroupStats.objects.bulk_create(
+        GroupStats(
+            group_id=group_id,
+            post_count=totals.get(group_id, {}).get('post_count', 0),
+            last_post_at=totals.get(group_id, {}).get('last_post_at'),
+        )
+        for group_id in Group.objects.values_list('id', flat=True)
+    )
+    GroupActivity.objects.bulk_create(
+        GroupActivity(
+            group_id=row['group'],
+            day=row['day'],
+            post_count=row['post_count'],
+        )
+        for row in (
+            Post.objects
+            .filter(group__isnull=False)
+            .annotate(day=TruncDate('pub_date'))
+            .order_by()
+            .values('group', 'day')
+            .annotate(post_count=models.Count('id'))
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_trending_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Group', verbose_name='Группа')),
+                ('post_count', models.PositiveIntegerField(default=0, verbose_name='Количество постов')),
+                ('last_post_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата последнего поста')),
+            ],
+            options={
+                'verbose_name': 'Статистика группы',
+                'verbose_name_plural': 'Статистика групп',
+            },
+        ),
+        migrations.CreateModel(
+            name='GroupActivity',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('post_count', models.PositiveIntegerField(default=0, verbose_name='Количество постов')),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='posts.Group', verbose_name='Группа')),
+            ],
+            options={
+                'verbose_name': 'Активность группы',
+                'verbose_name_plural': 'Активность групп',
+                'ordering': ['day'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='groupactivity',
+            constraint=models.UniqueConstraint(fields=('group', 'day'), name='unique_group_day'),
+        ),
+        migrations.RunPython(fill_group_stats, migrations.RunPython.noop),
+    ]
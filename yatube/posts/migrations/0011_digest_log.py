@@ -0,0 +1,29 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_group_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DigestLog',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateTimeField(verbose_name='Начало периода')),
+                ('period_end', models.DateTimeField(db_index=True, verbose_name='Конец периода')),
+                ('recipients', models.PositiveIntegerField(default=0, verbose_name='Получателей')),
+                ('posts', models.PositiveIntegerField(default=0, verbose_name='Постов')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата рассылки')),
+            ],
+            options={
+                'verbose_name': 'Рассылка дайджеста',
+                'verbose_name_plural': 'Рассылки дайджестов',
+                'ordering': ['-period_end'],
+            },
+        ),
+    ]
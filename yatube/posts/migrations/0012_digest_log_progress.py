@@ -0,0 +1,23 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_digest_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='digestlog',
+            name='in_progress',
+            field=models.BooleanField(default=False, verbose_name='Идёт рассылка'),
+        ),
+        migrations.AddField(
+            model_name='digestlog',
+            name='last_user_id',
+            field=models.PositiveIntegerField(default=0, verbose_name='Последний обработанный подписчик'),
+        ),
+    ]
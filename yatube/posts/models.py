@@ -9,6 +9,12 @@ class Group(models.Model):
     title = models.CharField(verbose_name="Название группы", max_length=200)
     description = models.TextField(verbose_name="Описание группы")
     slug = models.SlugField(verbose_name="Слаг группы", unique=True)
+    trending_score = models.FloatField(
+        verbose_name="Рейтинг популярности",
+        default=0.0,
+        db_index=True,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = "Группа"
@@ -26,6 +32,7 @@ class Post(models.Model):
     pub_date = models.DateTimeField(
         verbose_name="Дата публикации",
         auto_now_add=True,
+        db_index=True,
     )
 
     author = models.ForeignKey(
@@ -49,6 +56,13 @@ class Post(models.Model):
         verbose_name="Картинка",
     )
 
+    trending_score = models.FloatField(
+        verbose_name="Рейтинг популярности",
+        default=0.0,
+        db_index=True,
+        editable=False,
+    )
+
     class Meta:
         ordering = ["-pub_date"]
         verbose_name = "Пост"
@@ -110,3 +124,133 @@ class Follow(models.Model):
     class Meta:
         verbose_name = "Подписка"
         verbose_name_plural = "Подписки"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "author"],
+                name="unique_follow",
+            ),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F("author")),
+                name="prevent_self_follow",
+            ),
+        ]
+
+
+class Recommendation(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="recommendations",
+        verbose_name="Пользователь",
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Рекомендуемый автор",
+    )
+    score = models.FloatField(verbose_name="Оценка")
+
+    def __str__(self):
+        return f"Пользователю: {self.user}, Автор: {self.author}"
+
+    class Meta:
+        ordering = ["-score"]
+        verbose_name = "Рекомендация"
+        verbose_name_plural = "Рекомендации"
+        indexes = [
+            models.Index(
+                fields=["user", "-score"],
+                name="recommendation_user_score",
+            ),
+        ]
+
+
+class GroupStats(models.Model):
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+        verbose_name="Группа",
+    )
+    post_count = models.PositiveIntegerField(
+        verbose_name="Количество постов",
+        default=0,
+    )
+    last_post_at = models.DateTimeField(
+        verbose_name="Дата последнего поста",
+        null=True,
+        blank=True,
+    )
+
+    def __str__(self):
+        return f"Статистика группы {self.group_id}"
+
+    class Meta:
+        verbose_name = "Статистика группы"
+        verbose_name_plural = "Статистика групп"
+
+
+class GroupActivity(models.Model):
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name="activity",
+        verbose_name="Группа",
+    )
+    day = models.DateField(verbose_name="День")
+    post_count = models.PositiveIntegerField(
+        verbose_name="Количество постов",
+        default=0,
+    )
+
+    def __str__(self):
+        return f"{self.group_id}: {self.day} — {self.post_count}"
+
+    class Meta:
+        ordering = ["day"]
+        verbose_name = "Активность группы"
+        verbose_name_plural = "Активность групп"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["group", "day"],
+                name="unique_group_day",
+            ),
+        ]
+
+
+class DigestLog(models.Model):
+    period_start = models.DateTimeField(verbose_name="Начало периода")
+    period_end = models.DateTimeField(
+        verbose_name="Конец периода",
+        db_index=True,
+    )
+    recipients = models.PositiveIntegerField(
+        verbose_name="Получателей",
+        default=0,
+    )
+    posts = models.PositiveIntegerField(
+        verbose_name="Постов",
+        default=0,
+    )
+    last_user_id = models.PositiveIntegerField(
+        verbose_name="Последний обработанный подписчик",
+        default=0,
+    )
+    in_progress = models.BooleanField(
+        verbose_name="Идёт рассылка",
+        default=False,
+    )
+    created = models.DateTimeField(
+        verbose_name="Дата рассылки",
+        auto_now_add=True,
+    )
+
+    def __str__(self):
+        return f"Дайджест {self.period_start} — {self.period_end}"
+
+    class Meta:
+        ordering = ["-period_end"]
+        verbose_name = "Рассылка дайджеста"
+        verbose_name_plural = "Рассылки дайджестов"
@@ -0,0 +1,133 @@
+from itertools import chain
+
+import numpy as np
+from django.db import transaction
+
+from .models import Follow, Recommendation, User
+
+RECOMMENDATIONS_COUNT: int = 5
+CO_FOLLOW_WEIGHT: float = 0.5
+MAX_CO_FOLLOWERS: int = 1000
+BATCH_SIZE: int = 500
+FETCH_CHUNK_SIZE: int = 10000
+
+
+def _csr(rows, cols, size):
+    """Разреженная матрица смежности в виде массивов (indptr, indices)."""
+    order = np.argsort(rows, kind="stable")
+    indptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=size), out=indptr[1:])
+    return indptr, cols[order]
+
+
+def _gather(csr, nodes):
+    """Склеивает строки матрицы для набора вершин без цикла по ним."""
+    indptr, indices = csr
+    starts = indptr[nodes]
+    lengths = indptr[nodes + 1] - starts
+    total = int(lengths.sum())
+    if not total:
+        return indices[:0]
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return indices[offsets + np.arange(total)]
+
+
+class FollowGraph:
+    """Граф подписок как две разреженные матрицы: подписки и подписчики."""
+
+    def __init__(self, users, authors):
+        self.ids = np.unique(np.concatenate([users, authors]))
+        users = np.searchsorted(self.ids, users)
+        authors = np.searchsorted(self.ids, authors)
+        self.following = _csr(users, authors, len(self.ids))
+        self.followers = _csr(authors, users, len(self.ids))
+
+    @classmethod
+    def load(cls):
+        edges = np.fromiter(
+            chain.from_iterable(
+                Follow.objects
+                .order_by()
+                .values_list("user_id", "author_id")
+                .iterator(chunk_size=FETCH_CHUNK_SIZE)
+            ),
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        return cls(edges[:, 0], edges[:, 1])
+
+    def node(self, user_id):
+        index = np.searchsorted(self.ids, user_id)
+        if index < len(self.ids) and self.ids[index] == user_id:
+            return index
+        return None
+
+    def recommend(self, user_id, limit=RECOMMENDATIONS_COUNT):
+        """Топ авторов по друзьям друзей и по сходству подписок.
+
+        Каждый автор, на которого подписаны авторы пользователя, получает
+        балл за каждую такую связь. Пользователи с общими подписками
+        встречаются столько раз, сколько у них общих авторов, поэтому их
+        подписки учитываются с весом, растущим с похожестью.
+        """
+        node = self.node(user_id)
+        if node is None:
+            return []
+        followed = _gather(self.following, np.array([node]))
+        if not len(followed):
+            return []
+
+        friends_of_friends = _gather(self.following, followed)
+
+        co_followers = _gather(self.followers, followed)
+        co_followers = co_followers[co_followers != node]
+        if len(co_followers) > MAX_CO_FOLLOWERS:
+            co_followers, counts = np.unique(co_followers, return_counts=True)
+            closest = np.argsort(-counts, kind="stable")[:MAX_CO_FOLLOWERS]
+            co_followers = np.repeat(co_followers[closest], counts[closest])
+        co_followed = _gather(self.following, co_followers)
+
+        candidates = np.concatenate([friends_of_friends, co_followed])
+        weights = np.concatenate([
+            np.ones(len(friends_of_friends)),
+            np.full(len(co_followed), CO_FOLLOW_WEIGHT),
+        ])
+        allowed = ~np.isin(candidates, followed) & (candidates != node)
+        candidates, inverse = np.unique(
+            candidates[allowed], return_inverse=True)
+        if not len(candidates):
+            return []
+        scores = np.bincount(inverse, weights=weights[allowed])
+        top = np.argsort(-scores, kind="stable")[:limit]
+        return [
+            (int(self.ids[candidates[i]]), float(scores[i])) for i in top
+        ]
+
+
+def store_recommendations(graph, user_ids, limit=RECOMMENDATIONS_COUNT):
+    recommendations = [
+        Recommendation(user_id=user_id, author_id=author_id, score=score)
+        for user_id in user_ids
+        for author_id, score in graph.recommend(user_id, limit)
+    ]
+    with transaction.atomic():
+        Recommendation.objects.filter(user_id__in=user_ids).delete()
+        Recommendation.objects.bulk_create(recommendations)
+    return len(recommendations)
+
+
+def compute_recommendations(batch_size=BATCH_SIZE,
+                            limit=RECOMMENDATIONS_COUNT):
+    """Пересчитывает рекомендации всех пользователей пакетами."""
+    graph = FollowGraph.load()
+    user_ids = np.fromiter(
+        User.objects
+        .order_by("id")
+        .values_list("id", flat=True)
+        .iterator(chunk_size=FETCH_CHUNK_SIZE),
+        dtype=np.int64,
+    )
+    total = 0
+    for start in range(0, len(user_ids), batch_size):
+        batch = user_ids[start:start + batch_size].tolist()
+        total += store_recommendations(graph, batch, limit)
+    return total
@@ -0,0 +1,264 @@
+import datetime as dt
+import io
+from contextlib import contextmanager
+
+import numpy as np
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from mixer.backend.django import Mixer
+from PIL import Image
+
+from .models import Comment, Follow, Group, Post, User
+
+SEED: int = 42
+FAKER_LOCALE: str = "ru_RU"
+SEED_PASSWORD: str = "benchmark"
+
+USERS_COUNT: int = 20000
+GROUPS_COUNT: int = 200
+POSTS_COUNT: int = 1000000
+COMMENTS_COUNT: int = 2000000
+FOLLOWS_COUNT: int = 1000000
+SEED_DAYS: int = 365
+
+FOLLOWERS_EXPONENT: float = 1.1
+GROUPS_EXPONENT: float = 1.2
+ACTIVITY_DAMPING: float = 0.5
+NO_GROUP_SHARE: float = 0.3
+IMAGE_SHARE: float = 0.05
+COMMENT_DELAY_HOURS: float = 6.0
+
+TEXT_POOL_SIZE: int = 2000
+IMAGES_COUNT: int = 20
+IMAGE_SIZE = (960, 640)
+INSERT_BATCH_SIZE: int = 5000
+
+
+def power_law(size, exponent, rng):
+    """Вероятности по закону Ципфа, перемешанные между объектами.
+
+    Вес объекта ранга r пропорционален r ** -exponent; перемешивание
+    нужно, чтобы популярными оказались не первые созданные объекты.
+    """
+    weights = np.arange(1, size + 1, dtype=np.float64) ** -exponent
+    rng.shuffle(weights)
+    return weights / weights.sum()
+
+
+def follow_pairs(rng, popularity, count):
+    """Уникальные пары (подписчик, автор) без подписок на себя.
+
+    Подписчики выбираются равномерно, авторы — по популярности, так
+    что число подписчиков у авторов распределено по степенному закону.
+    Пары генерируются векторно, дубликаты отбрасываются, а недостающие
+    пары добираются следующим проходом.
+    """
+    size = len(popularity)
+    count = min(count, size * (size - 1))
+    keys = np.empty(0, dtype=np.int64)
+    while len(keys) < count:
+        need = count - len(keys)
+        users = rng.integers(size, size=need)
+        authors = rng.choice(size, size=need, p=popularity)
+        allowed = users != authors
+        keys = np.concatenate([keys, users[allowed] * size + authors[allowed]])
+        _, first = np.unique(keys, return_index=True)
+        keys = keys[np.sort(first)]
+    keys = keys[:count]
+    return keys // size, keys % size
+
+
+@contextmanager
+def explicit_dates(model, name):
+    """Позволяет bulk_create сохранить заданные даты в поле auto_now_add."""
+    field = model._meta.get_field(name)
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+class BenchmarkSeeder:
+    """Генерирует большой набор данных с реалистичным перекосом.
+
+    Все случайные величины берутся из генераторов с заданным зерном,
+    поэтому на пустой базе одно и то же зерно даёт одинаковые данные
+    (даты отсчитываются от now).
+    """
+
+    def __init__(self, seed=SEED, now=None, days=SEED_DAYS,
+                 batch_size=INSERT_BATCH_SIZE):
+        self.rng = np.random.default_rng(seed)
+        self.mixer = Mixer(commit=False, locale=FAKER_LOCALE)
+        self.faker = self.mixer.faker
+        self.faker.seed_instance(seed)
+        self.now = now or timezone.now()
+        self.start = self.now - dt.timedelta(days=days)
+        self.batch_size = batch_size
+
+        self.user_ids = np.empty(0, dtype=np.int64)
+        self.popularity = np.empty(0)
+        self.group_ids = np.empty(0, dtype=np.int64)
+        self.post_ids = np.empty(0, dtype=np.int64)
+        self.post_authors = np.empty(0, dtype=np.int64)
+        self.post_dates = np.empty(0)
+
+    def _insert(self, model, objects):
+        """Сохраняет объекты пачками и возвращает их id по порядку."""
+        last_id = (
+            model.objects.order_by("-id")
+            .values_list("id", flat=True).first() or 0
+        )
+        with transaction.atomic():
+            batch = []
+            for obj in objects:
+                batch.append(obj)
+                if len(batch) >= self.batch_size:
+                    model.objects.bulk_create(batch)
+                    batch = []
+            model.objects.bulk_create(batch)
+        return np.fromiter(
+            model.objects
+            .filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", flat=True)
+            .iterator(),
+            dtype=np.int64,
+        )
+
+    def _date(self, seconds):
+        return self.start + dt.timedelta(seconds=float(seconds))
+
+    def users(self, count=USERS_COUNT):
+        password = make_password(SEED_PASSWORD)
+        users = self.mixer.cycle(count).blend(
+            User,
+            username=self.mixer.sequence(
+                lambda i: f"{self.faker.user_name()}_{i}"),
+            first_name=self.faker.first_name,
+            last_name=self.faker.last_name,
+            password=password,
+            is_staff=False,
+            is_superuser=False,
+            is_active=True,
+            last_login=None,
+        )
+        self.user_ids = self._insert(User, users)
+        self.popularity = power_law(
+            len(self.user_ids), FOLLOWERS_EXPONENT, self.rng)
+        return len(self.user_ids)
+
+    def groups(self, count=GROUPS_COUNT):
+        groups = self.mixer.cycle(count).blend(
+            Group,
+            title=self.faker.catch_phrase,
+            slug=self.mixer.sequence("group-{0}"),
+            description=self.faker.paragraph,
+            trending_score=0.0,
+        )
+        self.group_ids = self._insert(Group, groups)
+        return len(self.group_ids)
+
+    def images(self, count=IMAGES_COUNT):
+        """Создаёт несколько картинок, которые разделят посты с картинками."""
+        names = []
+        for i in range(count):
+            name = f"posts/seed/{i}.jpg"
+            if not default_storage.exists(name):
+                color = tuple(int(c) for c in self.rng.integers(256, size=3))
+                content = io.BytesIO()
+                Image.new("RGB", IMAGE_SIZE, color).save(content, "JPEG")
+                default_storage.save(name, ContentFile(content.getvalue()))
+            names.append(name)
+        return names
+
+    def posts(self, count=POSTS_COUNT, image_share=IMAGE_SHARE):
+        """Посты, чаще от популярных авторов и в «горячих» группах.
+
+        Id постов растут вместе с датой публикации, как на живом сайте.
+        """
+        texts = [
+            self.faker.text(max_nb_chars=int(length))
+            for length in self.rng.integers(50, 1000, size=TEXT_POOL_SIZE)
+        ]
+        activity = self.popularity ** ACTIVITY_DAMPING
+        authors = self.rng.choice(
+            len(self.user_ids), size=count, p=activity / activity.sum())
+        groups = np.full(count, -1)
+        if len(self.group_ids):
+            grouped = self.rng.random(count) >= NO_GROUP_SHARE
+            groups[grouped] = self.rng.choice(
+                len(self.group_ids),
+                size=int(grouped.sum()),
+                p=power_law(len(self.group_ids), GROUPS_EXPONENT, self.rng),
+            )
+        dates = np.sort(self.rng.uniform(
+            0, (self.now - self.start).total_seconds(), size=count))
+        with_image = self.rng.random(count) < image_share
+        images = self.images() if with_image.any() else []
+        text_indices = self.rng.integers(len(texts), size=count)
+        image_indices = self.rng.integers(max(len(images), 1), size=count)
+
+        posts = (
+            Post(
+                author_id=int(self.user_ids[authors[i]]),
+                group_id=(
+                    int(self.group_ids[groups[i]]) if groups[i] >= 0
+                    else None
+                ),
+                text=texts[text_indices[i]],
+                pub_date=self._date(dates[i]),
+                image=images[image_indices[i]] if with_image[i] else "",
+            )
+            for i in range(count)
+        )
+        with explicit_dates(Post, "pub_date"):
+            self.post_ids = self._insert(Post, posts)
+        self.post_authors = authors
+        self.post_dates = dates
+        return len(self.post_ids)
+
+    def follows(self, count=FOLLOWS_COUNT):
+        users, authors = follow_pairs(self.rng, self.popularity, count)
+        follows = (
+            Follow(
+                user_id=int(self.user_ids[user]),
+                author_id=int(self.user_ids[author]),
+            )
+            for user, author in zip(users, authors)
+        )
+        return len(self._insert(Follow, follows))
+
+    def comments(self, count=COMMENTS_COUNT):
+        """Комментарии достаются в основном постам популярных авторов."""
+        if not len(self.post_ids):
+            return 0
+        texts = [
+            self.faker.sentence() for _ in range(TEXT_POOL_SIZE)
+        ]
+        weights = self.popularity[self.post_authors]
+        posts = self.rng.choice(
+            len(self.post_ids), size=count, p=weights / weights.sum())
+        authors = self.rng.integers(len(self.user_ids), size=count)
+        dates = np.minimum(
+            self.post_dates[posts]
+            + self.rng.exponential(COMMENT_DELAY_HOURS * 3600, size=count),
+            (self.now - self.start).total_seconds(),
+        )
+        text_indices = self.rng.integers(len(texts), size=count)
+
+        comments = (
+            Comment(
+                post_id=int(self.post_ids[posts[i]]),
+                author_id=int(self.user_ids[authors[i]]),
+                text=texts[text_indices[i]],
+                created=self._date(dates[i]),
+            )
+            for i in range(count)
+        )
+        with explicit_dates(Comment, "created"):
+            return len(self._insert(Comment, comments))
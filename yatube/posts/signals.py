@@ -0,0 +1,179 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.tasks import enqueue
+
+from .feeds import feed_scopes, invalidate_feeds, post_feed_scopes
+from .follows import reset_following
+from .models import Comment, Follow, Group, GroupStats, Post, User
+from .tasks import (GROUP_STATS_PRIORITY, THUMBNAIL_PRIORITY,
+                    TRENDING_PRIORITY)
+from .watermark import reset_high_water
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_post(sender, instance, **kwargs):
+    instance._previous_scopes = []
+    instance._previous_group_id = instance.group_id
+    if instance.pk is None:
+        return
+    previous = (
+        Post.objects
+        .filter(pk=instance.pk)
+        .values_list("author__username", "group__slug", "group_id")
+        .first()
+    )
+    if previous is not None:
+        username, group_slug, instance._previous_group_id = previous
+        instance._previous_scopes = feed_scopes(username, group_slug)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_feeds(sender, instance, **kwargs):
+    scopes = set(post_feed_scopes(instance))
+    scopes.update(getattr(instance, "_previous_scopes", []))
+    invalidate_feeds(scopes)
+
+
+# Поля автора и группы, которые выводятся в лентах.
+USER_FEED_FIELDS = ("username", "first_name", "last_name")
+GROUP_FEED_FIELDS = ("slug", "title", "description")
+
+
+def previous_values(model, instance, fields, update_fields):
+    if instance.pk is None or (
+            update_fields is not None
+            and not set(update_fields) & set(fields)):
+        return None
+    return model.objects.filter(pk=instance.pk).values(*fields).first()
+
+
+def feed_fields_changed(instance, previous, fields):
+    return previous is not None and any(
+        getattr(instance, field) != previous[field] for field in fields)
+
+
+@receiver(pre_save, sender=User)
+def remember_previous_user(sender, instance, update_fields=None, **kwargs):
+    instance._previous_feed_fields = previous_values(
+        User, instance, USER_FEED_FIELDS, update_fields)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_feeds(sender, instance, **kwargs):
+    """Имя автора выводится в его ленте, общей и лентах его групп."""
+    previous = getattr(instance, "_previous_feed_fields", None)
+    if not feed_fields_changed(instance, previous, USER_FEED_FIELDS):
+        return
+    scopes = {
+        "index",
+        f"author:{instance.username}",
+        f"author:{previous['username']}",
+    }
+    scopes.update(
+        f"group:{slug}"
+        for slug in Group.objects
+        .filter(post__author=instance)
+        .values_list("slug", flat=True)
+        .distinct()
+    )
+    invalidate_feeds(scopes)
+
+
+@receiver(pre_save, sender=Group)
+def remember_previous_group(sender, instance, update_fields=None, **kwargs):
+    instance._previous_feed_fields = previous_values(
+        Group, instance, GROUP_FEED_FIELDS, update_fields)
+
+
+@receiver(post_save, sender=Group)
+def invalidate_group_feeds(sender, instance, **kwargs):
+    previous = getattr(instance, "_previous_feed_fields", None)
+    if feed_fields_changed(instance, previous, GROUP_FEED_FIELDS):
+        invalidate_feeds(
+            {f"group:{instance.slug}", f"group:{previous['slug']}"})
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_high_water(sender, instance, created=True, **kwargs):
+    if created:
+        reset_high_water()
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_following(sender, instance, **kwargs):
+    reset_following(instance.user_id)
+
+
+@receiver(post_save, sender=Post)
+def update_post_trending(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        enqueue(
+            "posts.register_post",
+            {"post_id": instance.pk},
+            priority=TRENDING_PRIORITY,
+            key=f"post-created:{instance.pk}",
+        )
+
+
+@receiver(post_save, sender=Comment)
+def update_comment_trending(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        enqueue(
+            "posts.register_comment",
+            {"comment_id": instance.pk},
+            priority=TRENDING_PRIORITY,
+            key=f"comment-created:{instance.pk}",
+        )
+
+
+@receiver(post_save, sender=Post)
+def pregenerate_thumbnail(sender, instance, raw=False, **kwargs):
+    if instance.image and not raw:
+        enqueue(
+            "posts.thumbnail",
+            {"post_id": instance.pk},
+            priority=THUMBNAIL_PRIORITY,
+            key=f"thumbnail:{instance.pk}:{instance.image.name}",
+        )
+
+
+def enqueue_group_stats(name, group_id, when):
+    enqueue(
+        name,
+        {"group_id": group_id, "when": when.isoformat()},
+        priority=GROUP_STATS_PRIORITY,
+    )
+
+
+@receiver(post_save, sender=Group)
+def create_group_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        GroupStats.objects.get_or_create(group=instance)
+
+
+@receiver(post_save, sender=Post)
+def update_group_stats(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous_group_id = None
+    if not created:
+        previous_group_id = instance._previous_group_id
+        if previous_group_id == instance.group_id:
+            return
+    if previous_group_id is not None:
+        enqueue_group_stats(
+            "posts.group_post_removed", previous_group_id, instance.pub_date)
+    if instance.group_id is not None:
+        enqueue_group_stats(
+            "posts.group_post_added", instance.group_id, instance.pub_date)
+
+
+@receiver(post_delete, sender=Post)
+def remove_from_group_stats(sender, instance, **kwargs):
+    if instance.group_id is not None:
+        enqueue_group_stats(
+            "posts.group_post_removed", instance.group_id, instance.pub_date)
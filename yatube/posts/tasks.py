@@ -0,0 +1,53 @@
+from django.utils.dateparse import parse_datetime
+from sorl.thumbnail import get_thumbnail
+
+from core.tasks import task
+
+from .group_stats import post_added, post_removed
+from .models import Comment, Post
+from .trending import register_comment, register_post
+
+THUMBNAIL_GEOMETRY: str = "960x339"
+THUMBNAIL_OPTIONS = {"crop": "center", "upscale": True}
+
+TRENDING_PRIORITY: int = 10
+GROUP_STATS_PRIORITY: int = 5
+THUMBNAIL_PRIORITY: int = 0
+
+
+@task("posts.register_post")
+def register_post_task(post_id):
+    post = Post.objects.filter(pk=post_id).only("pub_date", "group").first()
+    if post is not None:
+        register_post(post)
+
+
+@task("posts.register_comment")
+def register_comment_task(comment_id):
+    comment = (
+        Comment.objects
+        .select_related("post")
+        .filter(pk=comment_id)
+        .only("created", "post__group")
+        .first()
+    )
+    if comment is not None:
+        register_comment(comment)
+
+
+@task("posts.group_post_added")
+def group_post_added_task(group_id, when):
+    post_added(group_id, parse_datetime(when))
+
+
+@task("posts.group_post_removed")
+def group_post_removed_task(group_id, when):
+    post_removed(group_id, parse_datetime(when))
+
+
+@task("posts.thumbnail")
+def thumbnail_task(post_id):
+    """Заранее создаёт миниатюру, чтобы её не строил первый просмотр."""
+    post = Post.objects.filter(pk=post_id).only("image").first()
+    if post is not None and post.image:
+        get_thumbnail(post.image, THUMBNAIL_GEOMETRY, **THUMBNAIL_OPTIONS)
@@ -0,0 +1,253 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from http import HTTPStatus
+
+from ..api import API_BATCH_MAX, API_MAX_PAGE_SIZE, API_PAGE_SIZE
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(PERF_SAMPLE_RATE=0)
+class PostApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.TOTAL_POSTS_COUNT = API_PAGE_SIZE + 3
+
+        cls.author = User.objects.create_user(username="author")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.group = Group.objects.create(
+            title="title",
+            slug="slug",
+            description="description",
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.author, group=cls.group, text=f"text_{i}")
+            for i in range(cls.TOTAL_POSTS_COUNT)
+        )
+        cls.post = Post.objects.create(author=cls.reader, text="other")
+        cls.comment = Comment.objects.create(
+            post=cls.post, author=cls.author, text="comment")
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.guest_client = Client()
+
+        self.auth_client = Client()
+        self.auth_client.force_login(PostApiTests.reader)
+
+    def _walk(self, client, path):
+        ids = []
+        cursor = None
+        while True:
+            params = {"cursor": cursor} if cursor else {}
+            data = client.get(path, params).json()
+            ids.extend(post["id"] for post in data["results"])
+            cursor = data["next"]
+            if cursor is None:
+                return ids
+
+    def test_feeds_walk_all_posts_with_cursor(self):
+        author_posts = list(
+            Post.objects
+            .filter(author=PostApiTests.author)
+            .order_by("-pub_date", "-id")
+            .values_list("id", flat=True)
+        )
+        paths = {
+            reverse("posts:api_index"): Post.objects.count(),
+            reverse(
+                "posts:api_group_list",
+                kwargs={"slug": PostApiTests.group.slug},
+            ): PostApiTests.TOTAL_POSTS_COUNT,
+            reverse(
+                "posts:api_profile",
+                kwargs={"username": PostApiTests.author.username},
+            ): PostApiTests.TOTAL_POSTS_COUNT,
+        }
+        for path, expected in paths.items():
+            with self.subTest(path=path):
+                ids = self._walk(self.guest_client, path)
+                self.assertEqual(len(ids), expected)
+                self.assertEqual(len(set(ids)), expected)
+
+        ids = self._walk(self.auth_client, reverse("posts:api_follow_index"))
+        self.assertEqual(ids, author_posts)
+
+    def test_first_page_fields(self):
+        data = self.guest_client.get(reverse("posts:api_index")).json()
+
+        self.assertEqual(len(data["results"]), API_PAGE_SIZE)
+        self.assertIsNotNone(data["next"])
+        self.assertEqual(
+            set(data["results"][0]),
+            {"id", "text", "pub_date", "image", "author", "group"},
+        )
+
+    def test_page_size_from_request(self):
+        path = reverse("posts:api_index")
+        data = self.guest_client.get(path, {"per_page": 5}).json()
+        self.assertEqual(len(data["results"]), 5)
+
+        data = self.guest_client.get(
+            path, {"per_page": API_MAX_PAGE_SIZE + 1}).json()
+        self.assertEqual(len(data["results"]), Post.objects.count())
+        self.assertIsNone(data["next"])
+
+    def test_unknown_objects_not_found(self):
+        for path in [
+            reverse("posts:api_group_list", kwargs={"slug": "unknown"}),
+            reverse("posts:api_profile", kwargs={"username": "unknown"}),
+            reverse("posts:api_post_detail", kwargs={"post_id": 0}),
+        ]:
+            with self.subTest(path=path):
+                response = self.guest_client.get(path)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_invalid_cursor(self):
+        response = self.guest_client.get(
+            reverse("posts:api_index"), {"cursor": "garbage"})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_follow_requires_auth(self):
+        response = self.guest_client.get(reverse("posts:api_follow_index"))
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+
+    def test_post_detail_with_comments(self):
+        post = PostApiTests.post
+        data = self.guest_client.get(
+            reverse("posts:api_post_detail", kwargs={"post_id": post.id})
+        ).json()
+
+        self.assertEqual(data["id"], post.id)
+        self.assertEqual(data["author"], post.author.username)
+        self.assertIsNone(data["group"])
+        self.assertEqual(
+            [comment["text"] for comment in data["comments"]],
+            [PostApiTests.comment.text],
+        )
+
+    def test_batch_single_query_keeps_order(self):
+        ids = list(Post.objects.values_list("id", flat=True)[:5])[::-1]
+        with self.assertNumQueries(1):
+            response = self.guest_client.get(
+                reverse("posts:api_post_batch"),
+                {"ids": ",".join(map(str, ids + [0]))},
+            )
+        self.assertEqual(
+            [post["id"] for post in response.json()["results"]], ids)
+
+    def test_batch_limits(self):
+        for ids in ["1,x", ",".join(["1"] * (API_BATCH_MAX + 1))]:
+            with self.subTest(ids=ids[:10]):
+                response = self.guest_client.get(
+                    reverse("posts:api_post_batch"), {"ids": ids})
+                self.assertEqual(
+                    response.status_code, HTTPStatus.BAD_REQUEST)
+
+
+@override_settings(PERF_SAMPLE_RATE=0)
+class NewPostsPollingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.post = Post.objects.create(author=cls.author, text="first")
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.guest_client = Client()
+
+        self.auth_client = Client()
+        self.auth_client.force_login(NewPostsPollingTests.reader)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_nothing_new_costs_no_queries(self):
+        path = reverse("posts:api_index_new")
+        post = NewPostsPollingTests.post
+        self.guest_client.get(path, {"after": post.id})
+
+        with self.assertNumQueries(0):
+            data = self.guest_client.get(path, {"after": post.id}).json()
+        self.assertEqual(data, {"latest": post.id, "count": 0})
+
+        with self.assertNumQueries(0):
+            data = self.guest_client.get(
+                path, {"since": post.pub_date.isoformat()}).json()
+        self.assertEqual(data["count"], 0)
+
+    def test_new_posts_counted_and_listed(self):
+        post = NewPostsPollingTests.post
+        other = User.objects.create_user(username="other")
+        newest = Post.objects.create(author=NewPostsPollingTests.author)
+        Post.objects.create(author=other, text="not followed")
+
+        data = self.guest_client.get(
+            reverse("posts:api_index_new"), {"after": post.id}).json()
+        self.assertEqual(data["count"], 2)
+        self.assertNotIn("results", data)
+
+        data = self.auth_client.get(
+            reverse("posts:api_follow_new"),
+            {"after": post.id, "list": 1},
+        ).json()
+        self.assertEqual(data["count"], 1)
+        self.assertEqual(
+            [row["id"] for row in data["results"]], [newest.id])
+
+    def test_invalid_mark(self):
+        for params in [{}, {"after": "x"}, {"since": "yesterday"}]:
+            with self.subTest(params=params):
+                response = self.guest_client.get(
+                    reverse("posts:api_index_new"), params)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.BAD_REQUEST)
+
+
+@override_settings(PERF_SAMPLE_RATE=0)
+class BulkFollowApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="user")
+        cls.authors = [
+            User.objects.create_user(username=f"author_{i}")
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        self.auth_client = Client()
+        self.auth_client.force_login(BulkFollowApiTests.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_bulk_follow_and_unfollow(self):
+        user = BulkFollowApiTests.user
+        names = [author.username for author in BulkFollowApiTests.authors]
+        path = reverse("posts:api_following")
+
+        for followed in [3, 0]:
+            response = self.auth_client.post(
+                path, {"follow": names + [user.username, "unknown"]})
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            self.assertEqual(response.json()["followed"], followed)
+        self.assertEqual(Follow.objects.filter(user=user).count(), 3)
+
+        data = self.auth_client.post(
+            path, {"unfollow": names[:2]}).json()
+        self.assertEqual(data, {"followed": 0, "unfollowed": 2})
+        self.assertEqual(
+            list(Follow.objects.values_list("author__username", flat=True)),
+            names[2:],
+        )
+
+    def test_bulk_follow_requires_auth(self):
+        response = Client().post(reverse("posts:api_following"))
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
@@ -0,0 +1,74 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from ..models import Comment, Follow, Group, Post, User
+
+
+class BenchViewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.group = Group.objects.create(
+            title="title", slug="slug", description="description")
+        for i in range(15):
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f"text_{i}")
+        cls.post = Post.objects.create(author=cls.author, text="post")
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text="comment")
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.output = os.path.join(self.directory, "bench.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_report_saved_and_writes_rolled_back(self):
+        posts, comments = Post.objects.count(), Comment.objects.count()
+        call_command(
+            "bench_views", repeat=3, output=self.output, stdout=StringIO())
+
+        with open(self.output) as file:
+            report = json.load(file)
+        self.assertEqual(report["dataset"]["post"], posts)
+        self.assertEqual(
+            set(report["views"]),
+            {"index", "group_posts", "profile", "post_detail",
+             "follow_index", "post_create", "add_comment"},
+        )
+        for result in report["views"].values():
+            self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+        self.assertEqual(Post.objects.count(), posts)
+        self.assertEqual(Comment.objects.count(), comments)
+
+    def test_compare_with_baseline(self):
+        call_command(
+            "bench_views", repeat=3, view=["post_detail"],
+            output=self.output, stdout=StringIO(),
+        )
+        with open(self.output) as file:
+            report = json.load(file)
+        report["views"]["post_detail"]["queries"] -= 1
+        with open(self.output, "w") as file:
+            json.dump(report, file)
+
+        with self.assertRaisesMessage(CommandError, "post_detail: запросов"):
+            call_command(
+                "bench_views", repeat=3, view=["post_detail"],
+                compare=self.output, threshold=100, stdout=StringIO(),
+            )
+
+    def test_empty_database(self):
+        Post.objects.all().delete()
+        Group.objects.all().delete()
+        with self.assertRaises(CommandError):
+            call_command("bench_views", repeat=3, stdout=StringIO())
@@ -0,0 +1,147 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from http import HTTPStatus
+
+from core.pubsub import bus
+from ..events import comment_channel, stream_slots
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(PERF_SAMPLE_RATE=0)
+class CommentStreamTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.post = Post.objects.create(author=cls.author, text="text")
+
+    def setUp(self):
+        self.guest_client = Client()
+
+        self.auth_client = Client()
+        self.auth_client.force_login(CommentStreamTests.author)
+
+    def _stream(self, **extra):
+        post = CommentStreamTests.post
+        response = self.auth_client.get(
+            reverse("posts:comment_stream", kwargs={"post_id": post.id}),
+            **extra,
+        )
+        self.addCleanup(response.close)
+        return response, iter(response.streaming_content)
+
+    def _event(self, chunk):
+        fields = dict(
+            line.split(": ", 1)
+            for line in chunk.decode().strip().splitlines()
+        )
+        return fields["event"], json.loads(fields["data"])
+
+    def test_unknown_post_not_found(self):
+        response = self.auth_client.get(
+            reverse("posts:comment_stream", kwargs={"post_id": 0}))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_guest_redirected_to_login(self):
+        url = reverse(
+            "posts:comment_stream",
+            kwargs={"post_id": CommentStreamTests.post.id},
+        )
+        response = self.guest_client.get(url)
+        self.assertRedirects(response, f"{reverse('users:login')}?next={url}")
+        self.assertEqual(
+            bus.subscribers(comment_channel(CommentStreamTests.post.id)), 0)
+
+    def test_stream_script_only_for_users(self):
+        url = reverse(
+            "posts:post_detail",
+            kwargs={"post_id": CommentStreamTests.post.id},
+        )
+        self.assertFalse(self.guest_client.get(url).context["comment_stream"])
+        self.assertTrue(self.auth_client.get(url).context["comment_stream"])
+
+    def test_new_comment_pushed_to_all_watchers(self):
+        post = CommentStreamTests.post
+        first, first_events = self._stream()
+        second, second_events = self._stream()
+
+        self.assertEqual(first["Content-Type"], "text/event-stream")
+        self.assertEqual(bus.subscribers(comment_channel(post.id)), 2)
+        next(first_events)
+        next(second_events)
+
+        self.auth_client.post(
+            reverse("posts:add_comment", kwargs={"post_id": post.id}),
+            data={"text": "live comment"},
+        )
+        author = CommentStreamTests.author
+        for events in [first_events, second_events]:
+            event, data = self._event(next(events))
+            self.assertEqual(event, "comment")
+            self.assertEqual(data["text"], "live comment")
+            self.assertEqual(data["author"], author.username)
+
+        first.close()
+        second.close()
+        self.assertEqual(bus.subscribers(comment_channel(post.id)), 0)
+
+    def test_reconnect_replays_missed_comments(self):
+        post = CommentStreamTests.post
+        seen = Comment.objects.create(
+            post=post, author=CommentStreamTests.author, text="seen")
+        missed = Comment.objects.create(
+            post=post, author=CommentStreamTests.author, text="missed")
+
+        response, events = self._stream(HTTP_LAST_EVENT_ID=str(seen.id))
+        next(events)
+        event, data = self._event(next(events))
+
+        self.assertEqual(data["id"], missed.id)
+        self.assertEqual(data["text"], missed.text)
+
+    def test_reconnect_with_after_parameter(self):
+        post = CommentStreamTests.post
+        seen = Comment.objects.create(
+            post=post, author=CommentStreamTests.author, text="seen")
+        missed = Comment.objects.create(
+            post=post, author=CommentStreamTests.author, text="missed")
+
+        response = self.auth_client.get(
+            reverse("posts:comment_stream", kwargs={"post_id": post.id}),
+            {"after": seen.id},
+        )
+        self.addCleanup(response.close)
+        events = iter(response.streaming_content)
+        next(events)
+        _, data = self._event(next(events))
+        self.assertEqual(data["id"], missed.id)
+
+    def test_streams_capped_per_process(self):
+        post = CommentStreamTests.post
+        responses = [
+            self._stream()[0] for _ in range(settings.SSE_MAX_STREAMS)]
+
+        response = self.auth_client.get(
+            reverse("posts:comment_stream", kwargs={"post_id": post.id}))
+        self.assertEqual(
+            response.status_code, HTTPStatus.SERVICE_UNAVAILABLE)
+        self.assertIn("Retry-After", response)
+        self.assertEqual(bus.subscribers(comment_channel(post.id)),
+                         settings.SSE_MAX_STREAMS)
+
+        # Слот освобождается, даже если поток так и не читали.
+        responses[0].close()
+        responses[0].close()
+        response, _ = self._stream()
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+        for response in responses[1:] + [response]:
+            response.close()
+        self.assertTrue(stream_slots.acquire(blocking=False))
+        stream_slots.release()
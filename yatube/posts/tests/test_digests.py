@@ -0,0 +1,104 @@
+import datetime as dt
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from io import StringIO
+
+from ..digests import DIGEST_POSTS_PER_AUTHOR, send_digests
+from ..models import DigestLog, Follow, Post
+
+User = get_user_model()
+
+
+class InterruptedEmailBackend(EmailBackend):
+    """Обрывает рассылку на второй пачке."""
+
+    calls = 0
+
+    def send_messages(self, messages):
+        self.calls += 1
+        if self.calls == 2:
+            raise ConnectionError("Рассылка прервана")
+        return super().send_messages(messages)
+
+
+class DigestTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.quiet_author = User.objects.create_user(username="quiet")
+        cls.readers = [
+            User.objects.create_user(
+                username=f"reader_{i}", email=f"reader_{i}@example.com")
+            for i in range(5)
+        ]
+        cls.no_email = User.objects.create_user(username="no_email")
+        Follow.objects.bulk_create(
+            [Follow(user=reader, author=cls.author) for reader in cls.readers]
+            + [
+                Follow(user=cls.readers[0], author=cls.quiet_author),
+                Follow(user=cls.no_email, author=cls.author),
+            ]
+        )
+
+    def test_one_digest_per_follower_in_batches(self):
+        Post.objects.bulk_create(
+            Post(author=DigestTests.author, text=f"post_{i}")
+            for i in range(DIGEST_POSTS_PER_AUTHOR + 2)
+        )
+
+        log = send_digests(batch_size=2)
+
+        self.assertEqual(log.recipients, len(DigestTests.readers))
+        self.assertEqual(log.posts, DIGEST_POSTS_PER_AUTHOR + 2)
+        self.assertCountEqual(
+            [message.to[0] for message in mail.outbox],
+            [reader.email for reader in DigestTests.readers],
+        )
+        body = mail.outbox[0].body
+        self.assertEqual(body.count("/posts/"), DIGEST_POSTS_PER_AUTHOR)
+        self.assertIn("/profile/author/", body)
+        self.assertNotIn("quiet", body)
+
+    def test_posts_sent_only_once(self):
+        Post.objects.create(author=DigestTests.author, text="text")
+        call_command("send_digests", stdout=StringIO())
+        send_digests(now=timezone.now() + dt.timedelta(seconds=1))
+
+        self.assertEqual(len(mail.outbox), len(DigestTests.readers))
+        self.assertEqual(
+            list(DigestLog.objects.values_list("posts", flat=True)), [0, 1])
+
+    def test_old_posts_skipped_on_first_run(self):
+        post = Post.objects.create(author=DigestTests.author, text="text")
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=timezone.now() - dt.timedelta(days=2))
+
+        log = send_digests()
+
+        self.assertEqual((log.recipients, log.posts), (0, 0))
+        self.assertEqual(mail.outbox, [])
+
+    def test_interrupted_run_resumed_without_duplicates(self):
+        Post.objects.create(author=DigestTests.author, text="text")
+
+        with self.assertRaises(ConnectionError):
+            send_digests(batch_size=2, connection=InterruptedEmailBackend())
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertTrue(DigestLog.objects.get().in_progress)
+
+        log = send_digests(
+            now=timezone.now() + dt.timedelta(hours=1), batch_size=2)
+
+        self.assertFalse(log.in_progress)
+        self.assertEqual(log.recipients, len(DigestTests.readers))
+        self.assertEqual(DigestLog.objects.count(), 1)
+        self.assertCountEqual(
+            [message.to[0] for message in mail.outbox],
+            [reader.email for reader in DigestTests.readers],
+        )
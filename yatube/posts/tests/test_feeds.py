@@ -0,0 +1,166 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.base import CacheKeyWarning
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+from http import HTTPStatus
+import warnings
+
+from ..feeds import FEED_ITEMS_COUNT
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+@override_settings(PERF_SAMPLE_RATE=0)
+class PostFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.TOTAL_POSTS_COUNT = FEED_ITEMS_COUNT + 5
+
+        cls.user = User.objects.create_user(username="feed_author")
+        cls.group = Group.objects.create(
+            title="title",
+            slug="slug",
+            description="description",
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, group=cls.group, text=f"text_{i}")
+            for i in range(cls.TOTAL_POSTS_COUNT)
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def tearDown(self):
+        cache.clear()
+
+    def _feed_urls(self):
+        user = PostFeedTests.user
+        group = PostFeedTests.group
+        return {
+            reverse("posts:index_rss"): "application/rss+xml",
+            reverse("posts:index_atom"): "application/atom+xml",
+            reverse(
+                "posts:group_rss", kwargs={"slug": group.slug}
+            ): "application/rss+xml",
+            reverse(
+                "posts:group_atom", kwargs={"slug": group.slug}
+            ): "application/atom+xml",
+            reverse(
+                "posts:profile_rss", kwargs={"username": user.username}
+            ): "application/rss+xml",
+            reverse(
+                "posts:profile_atom", kwargs={"username": user.username}
+            ): "application/atom+xml",
+        }
+
+    def test_feeds_exist_at_desired_location(self):
+        for path, content_type in self._feed_urls().items():
+            with self.subTest(path=path):
+                response = self.guest_client.get(path)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertTrue(
+                    response["Content-Type"].startswith(content_type))
+                self.assertIn("ETag", response)
+                self.assertIn("Last-Modified", response)
+
+    def test_feed_items_count_is_bounded(self):
+        response = self.guest_client.get(reverse("posts:index_rss"))
+        self.assertEqual(
+            response.content.count(b"<item>"), FEED_ITEMS_COUNT)
+
+    def test_unknown_group_feed_not_found(self):
+        response = self.guest_client.get(
+            reverse("posts:group_rss", kwargs={"slug": "unknown"}))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_conditional_get_not_modified(self):
+        path = reverse("posts:index_atom")
+        etag = self.guest_client.get(path)["ETag"]
+
+        response = self.guest_client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_cached_feed_does_not_query_database(self):
+        path = reverse("posts:index_rss")
+        self.guest_client.get(path)
+
+        with self.assertNumQueries(0):
+            self.guest_client.get(path)
+
+    def test_feed_invalidated_on_post_changes(self):
+        user = PostFeedTests.user
+        group = PostFeedTests.group
+        paths = [
+            reverse("posts:index_rss"),
+            reverse("posts:group_rss", kwargs={"slug": group.slug}),
+            reverse("posts:profile_rss", kwargs={"username": user.username}),
+        ]
+        for path in paths:
+            self.guest_client.get(path)
+
+        post = Post.objects.create(
+            author=user, group=group, text="brand new post")
+        for path in paths:
+            with self.subTest(path=path):
+                response = self.guest_client.get(path)
+                self.assertIn(post.text.encode(), response.content)
+
+        post.text = "edited post"
+        post.group = None
+        post.save()
+        response = self.guest_client.get(paths[1])
+        self.assertNotIn(b"brand new post", response.content)
+        self.assertNotIn(b"edited post", response.content)
+
+    def test_last_modified_is_newest_post(self):
+        path = reverse("posts:index_rss")
+        newest = Post.objects.latest("pub_date")
+        last_modified = self.guest_client.get(path)["Last-Modified"]
+        self.assertEqual(
+            last_modified, http_date(newest.pub_date.timestamp()))
+
+        cache.clear()
+        response = self.guest_client.get(
+            path, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_cache_key_safe_for_any_username(self):
+        user = User.objects.create_user(username="feed user")
+        Post.objects.create(author=user, text="text")
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            response = self.guest_client.get(
+                reverse("posts:profile_rss", kwargs={"username": user}))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertFalse([
+            warning for warning in caught
+            if issubclass(warning.category, CacheKeyWarning)
+        ])
+
+    def test_author_rename_refreshes_feeds(self):
+        for path in self._feed_urls():
+            self.guest_client.get(path)
+        author = User.objects.get(pk=PostFeedTests.user.pk)
+        author.first_name = "Новое"
+        author.last_name = "Имя"
+        author.save()
+
+        for path in self._feed_urls():
+            with self.subTest(path=path):
+                response = self.guest_client.get(path)
+                self.assertIn("Новое Имя", response.content.decode())
+
+    def test_group_edit_refreshes_feed(self):
+        path = reverse(
+            "posts:group_rss", kwargs={"slug": PostFeedTests.group.slug})
+        self.guest_client.get(path)
+        group = Group.objects.get(pk=PostFeedTests.group.pk)
+        group.title = "Новое название"
+        group.save()
+
+        response = self.guest_client.get(path)
+        self.assertIn("Новое название", response.content.decode())
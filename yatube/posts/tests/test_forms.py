@@ -16,7 +16,7 @@ User = get_user_model()
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, PERF_SAMPLE_RATE=0)
 class PostFormTests(TestCase):
     @classmethod
     def setUpClass(cls):
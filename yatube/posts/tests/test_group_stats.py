@@ -0,0 +1,118 @@
+import datetime as dt
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from io import StringIO
+
+from core.tasks import run_pending
+
+from ..group_stats import HISTOGRAM_DAYS, histograms
+from ..models import GroupActivity, GroupStats, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(PERF_SAMPLE_RATE=0)
+class GroupStatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="user")
+        cls.group = Group.objects.create(
+            title="group", slug="group", description="group")
+        cls.other_group = Group.objects.create(
+            title="other", slug="other", description="other")
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def _stats(self, group):
+        stats = GroupStats.objects.get(group=group)
+        return stats.post_count, stats.last_post_at
+
+    def test_stats_follow_post_writes(self):
+        group = GroupStatsTests.group
+        other_group = GroupStatsTests.other_group
+        self.assertEqual(self._stats(group), (0, None))
+
+        first = Post.objects.create(
+            author=GroupStatsTests.user, group=group, text="first")
+        second = Post.objects.create(
+            author=GroupStatsTests.user, group=group, text="second")
+        run_pending()
+        self.assertEqual(self._stats(group), (2, second.pub_date))
+        self.assertEqual(
+            histograms([group.id])[group.id][-1], 2)
+
+        second.group = other_group
+        second.save()
+        run_pending()
+        self.assertEqual(self._stats(group), (1, first.pub_date))
+        self.assertEqual(self._stats(other_group), (1, second.pub_date))
+
+        first.delete()
+        run_pending()
+        self.assertEqual(self._stats(group), (0, None))
+
+    def test_rebuild_matches_incremental_stats(self):
+        group = GroupStatsTests.group
+        for i in range(3):
+            Post.objects.create(
+                author=GroupStatsTests.user, group=group, text=str(i))
+        run_pending()
+        expected = {
+            "stats": list(GroupStats.objects.values_list(
+                "group", "post_count", "last_post_at")),
+            "activity": list(GroupActivity.objects.values_list(
+                "group", "day", "post_count")),
+        }
+
+        GroupStats.objects.all().delete()
+        GroupActivity.objects.all().delete()
+        call_command("rebuild_group_stats", stdout=StringIO())
+
+        self.assertCountEqual(
+            GroupStats.objects.values_list(
+                "group", "post_count", "last_post_at"),
+            expected["stats"],
+        )
+        self.assertCountEqual(
+            GroupActivity.objects.values_list("group", "day", "post_count"),
+            expected["activity"],
+        )
+
+    def test_histogram_covers_last_days(self):
+        group = GroupStatsTests.group
+        today = timezone.localdate()
+        GroupActivity.objects.create(
+            group=group, day=today - dt.timedelta(days=1), post_count=3)
+        GroupActivity.objects.create(
+            group=group,
+            day=today - dt.timedelta(days=HISTOGRAM_DAYS),
+            post_count=5,
+        )
+
+        days = histograms([group.id], today=today)[group.id]
+        self.assertEqual(len(days), HISTOGRAM_DAYS)
+        self.assertEqual(days[-2:], [3, 0])
+        self.assertEqual(sum(days), 3)
+
+    def test_group_index_page(self):
+        Post.objects.create(
+            author=GroupStatsTests.user,
+            group=GroupStatsTests.group,
+            text="text",
+        )
+        run_pending()
+
+        with self.assertNumQueries(3):
+            response = self.guest_client.get(reverse("posts:group_index"))
+
+        self.assertTemplateUsed(response, "posts/group_index.html")
+        groups = {group.slug: group for group in response.context["page_obj"]}
+        self.assertEqual(groups["group"].stats.post_count, 1)
+        self.assertEqual(groups["group"].histogram[-1], (1, 100))
+        self.assertEqual(groups["other"].stats.post_count, 0)
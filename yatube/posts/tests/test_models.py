@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
 from django.test import TestCase
 
 from ..models import Group, Post, Comment, Follow
@@ -135,3 +136,14 @@ class FollowModelTest(TestCase):
                 self.assertEqual(
                     follow._meta.get_field(field).verbose_name, expected_value
                 )
+
+    def test_follow_is_unique_and_not_self(self):
+        follow = FollowModelTest.follow
+        for user, author in [
+            (follow.user, follow.author),
+            (follow.user, follow.user),
+        ]:
+            with self.subTest(user=user, author=author):
+                with self.assertRaises(IntegrityError):
+                    with transaction.atomic():
+                        Follow.objects.create(user=user, author=author)
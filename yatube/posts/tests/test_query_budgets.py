@@ -0,0 +1,115 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import URLPattern, resolve, reverse
+
+from core.budgets import budget_problems, get_budget, record_queries
+from .. import urls, views
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(PERF_SAMPLE_RATE=0)
+class QueryBudgetTests(TestCase):
+    """Все HTML-страницы постов укладываются в свой бюджет запросов.
+
+    Данных столько, чтобы N+1 проявился повторяющимися запросами.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.authors = [
+            User.objects.create_user(username=f"author_{i}")
+            for i in range(5)
+        ]
+        cls.reader = User.objects.create_user(username="reader")
+        cls.groups = [
+            Group.objects.create(
+                title=f"group_{i}", slug=f"group_{i}", description="d")
+            for i in range(3)
+        ]
+        Post.objects.bulk_create(
+            Post(
+                author=cls.authors[i % 5],
+                group=cls.groups[i % 3] if i % 4 else None,
+                text=f"text_{i}",
+            )
+            for i in range(30)
+        )
+        cls.post = Post.objects.filter(author=cls.authors[0]).first()
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=author, text="comment")
+            for author in cls.authors
+        )
+        Follow.objects.bulk_create(
+            Follow(user=cls.reader, author=author)
+            for author in cls.authors[:3]
+        )
+
+    def setUp(self):
+        self.auth_client = Client()
+        self.auth_client.force_login(QueryBudgetTests.reader)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_posts_views_have_budgets(self):
+        for pattern in urls.urlpatterns:
+            if (isinstance(pattern, URLPattern)
+                    and pattern.callback.__module__ == views.__name__):
+                with self.subTest(view=pattern.name):
+                    self.assertIsNotNone(get_budget(pattern.callback))
+
+    def test_views_within_budget(self):
+        post = QueryBudgetTests.post
+        paths = [
+            reverse("posts:index"),
+            reverse("posts:trending"),
+            reverse("posts:group_index"),
+            reverse("posts:group_list", kwargs={"slug": "group_1"}),
+            reverse("posts:profile", kwargs={"username": "author_0"}),
+            reverse("posts:post_detail", kwargs={"post_id": post.id}),
+            reverse("posts:post_create"),
+            reverse("posts:follow_index"),
+        ]
+        for path in paths:
+            with self.subTest(path=path):
+                cache.clear()
+                with record_queries() as queries:
+                    self.auth_client.get(path)
+                self.assertEqual(
+                    budget_problems(queries, get_budget(resolve(path).func)),
+                    [],
+                )
+
+    def test_writes_within_budget(self):
+        post = QueryBudgetTests.post
+        author_client = Client()
+        author_client.force_login(QueryBudgetTests.authors[0])
+        group_id = QueryBudgetTests.groups[0].id
+        requests = [
+            ("get", reverse("posts:post_edit", kwargs={"post_id": post.id}),
+             {}),
+            ("post", reverse("posts:post_edit", kwargs={"post_id": post.id}),
+             {"text": "edited", "group": group_id}),
+            ("post", reverse("posts:post_create"),
+             {"text": "new", "group": group_id}),
+            ("post", reverse("posts:add_comment", kwargs={"post_id": post.id}),
+             {"text": "comment"}),
+            ("get", reverse(
+                "posts:profile_follow", kwargs={"username": "author_4"}), {}),
+            ("get", reverse(
+                "posts:profile_unfollow", kwargs={"username": "author_4"}),
+             {}),
+        ]
+        for method, path, data in requests:
+            with self.subTest(method=method, path=path):
+                cache.clear()
+                with record_queries() as queries:
+                    getattr(author_client, method)(path, data)
+                self.assertEqual(
+                    budget_problems(queries, get_budget(resolve(path).func)),
+                    [],
+                )
@@ -0,0 +1,117 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from http import HTTPStatus
+
+from core.throttling import SlidingWindow
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(
+    RATE_LIMITS={
+        "post": {"user": (2, 60), "ip": (3, 60)},
+        "comment": {"user": (2, 60), "ip": (3, 60)},
+        "follow": {"user": (2, 60), "ip": (3, 60)},
+    },
+    PERF_SAMPLE_RATE=0,
+)
+class WriteRateLimitTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="user")
+        cls.other = User.objects.create_user(username="other")
+        cls.post = Post.objects.create(author=cls.other, text="text")
+
+    def setUp(self):
+        self.auth_client = Client()
+        self.auth_client.force_login(WriteRateLimitTests.user)
+
+        self.other_client = Client()
+        self.other_client.force_login(WriteRateLimitTests.other)
+
+    def tearDown(self):
+        cache.clear()
+
+    def _comment(self, client):
+        return client.post(
+            reverse(
+                "posts:add_comment",
+                kwargs={"post_id": WriteRateLimitTests.post.id},
+            ),
+            data={"text": "comment"},
+        )
+
+    def test_comments_limited_per_user(self):
+        for _ in range(2):
+            self.assertEqual(
+                self._comment(self.auth_client).status_code,
+                HTTPStatus.FOUND,
+            )
+
+        response = self._comment(self.auth_client)
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", response)
+        self.assertEqual(Comment.objects.count(), 2)
+
+    def test_ip_limit_shared_by_users(self):
+        for client in [self.auth_client, self.auth_client, self.other_client]:
+            self.assertEqual(self._comment(client).status_code,
+                             HTTPStatus.FOUND)
+
+        response = self._comment(self.other_client)
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+
+    def test_post_form_not_limited(self):
+        path = reverse("posts:post_create")
+        for _ in range(3):
+            self.assertEqual(
+                self.auth_client.get(path).status_code, HTTPStatus.OK)
+        for _ in range(2):
+            self.auth_client.post(path, {"text": "text"})
+
+        response = self.auth_client.post(path, {"text": "text"})
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertEqual(Post.objects.filter(text="text").count(), 3)
+
+    def test_comment_get_not_limited(self):
+        path = reverse(
+            "posts:add_comment",
+            kwargs={"post_id": WriteRateLimitTests.post.id},
+        )
+        for _ in range(3):
+            self.assertEqual(
+                self.auth_client.get(path).status_code, HTTPStatus.FOUND)
+
+        self.assertEqual(
+            self._comment(self.auth_client).status_code, HTTPStatus.FOUND)
+
+    def test_follow_toggles_limited(self):
+        username = WriteRateLimitTests.other.username
+        self.auth_client.get(
+            reverse("posts:profile_follow", kwargs={"username": username}))
+        self.auth_client.get(
+            reverse("posts:profile_unfollow", kwargs={"username": username}))
+
+        response = self.auth_client.get(
+            reverse("posts:profile_follow", kwargs={"username": username}))
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+
+
+class SlidingWindowTests(TestCase):
+    def tearDown(self):
+        cache.clear()
+
+    def test_previous_window_decays(self):
+        window = SlidingWindow("test", limit=2, period=10)
+
+        self.assertEqual(window.hit("key", now=100), 0)
+        self.assertEqual(window.hit("key", now=101), 0)
+        self.assertEqual(window.hit("key", now=102), 8)
+        self.assertEqual(window.hit("key", now=110), 1)
+        self.assertEqual(window.hit("key", now=111), 0)
+        self.assertEqual(window.hit("key", now=112), 3)
+        self.assertEqual(window.hit("key", now=116), 0)
@@ -0,0 +1,77 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from io import StringIO
+
+from ..models import Follow, Recommendation
+from ..recommendations import FollowGraph
+
+User = get_user_model()
+
+
+@override_settings(PERF_SAMPLE_RATE=0)
+class RecommendationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.users = {
+            name: User.objects.create_user(username=name)
+            for name in ["me", "friend", "twin", "far", "near", "lonely"]
+        }
+        for user, author in [
+            ("me", "friend"),
+            ("friend", "far"),
+            ("friend", "near"),
+            ("twin", "friend"),
+            ("twin", "near"),
+        ]:
+            Follow.objects.create(
+                user=cls.users[user], author=cls.users[author])
+
+    def setUp(self):
+        self.auth_client = Client()
+        self.auth_client.force_login(RecommendationTests.users["me"])
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_graph_ranks_friends_of_friends_and_co_follows(self):
+        users = RecommendationTests.users
+        graph = FollowGraph.load()
+
+        recommended = [
+            author_id for author_id, _ in graph.recommend(users["me"].id)]
+        self.assertEqual(recommended, [users["near"].id, users["far"].id])
+        self.assertEqual(graph.recommend(users["lonely"].id), [])
+
+    def test_command_stores_top_authors(self):
+        users = RecommendationTests.users
+        Recommendation.objects.create(
+            user=users["me"], author=users["lonely"], score=100)
+
+        call_command("compute_recommendations", "--limit=1", stdout=StringIO())
+
+        self.assertEqual(
+            list(
+                Recommendation.objects
+                .filter(user=users["me"])
+                .values_list("author", flat=True)
+            ),
+            [users["near"].id],
+        )
+
+    def test_pages_show_recommendations_not_followed(self):
+        users = RecommendationTests.users
+        call_command("compute_recommendations", stdout=StringIO())
+        Follow.objects.create(user=users["me"], author=users["far"])
+
+        for path in [
+            reverse("posts:follow_index"),
+            reverse("posts:profile", kwargs={"username": "friend"}),
+        ]:
+            with self.subTest(path=path):
+                response = self.auth_client.get(path)
+                self.assertEqual(
+                    response.context["recommendations"], [users["near"]])
@@ -0,0 +1,95 @@
+import shutil
+import tempfile
+from io import StringIO
+
+import numpy as np
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db.models import Count
+from django.test import TestCase, override_settings
+
+from ..models import Comment, Follow, Group, GroupStats, Post, User
+from ..seeding import BenchmarkSeeder, follow_pairs, power_law
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class FollowPairsTests(TestCase):
+    def test_pairs_unique_reproducible_and_skewed(self):
+        popularity = power_law(200, 1.1, np.random.default_rng(1))
+        users, authors = follow_pairs(
+            np.random.default_rng(1), popularity, 2000)
+        same_users, same_authors = follow_pairs(
+            np.random.default_rng(1), popularity, 2000)
+
+        self.assertEqual(len(users), 2000)
+        self.assertTrue((users == same_users).all())
+        self.assertTrue((authors == same_authors).all())
+        self.assertFalse((users == authors).any())
+        self.assertEqual(len(set(zip(users, authors))), 2000)
+
+        followers = np.bincount(authors, minlength=200)
+        self.assertGreater(followers.max(), 10 * np.median(followers))
+
+    def test_count_capped_by_possible_pairs(self):
+        users, _ = follow_pairs(
+            np.random.default_rng(1), np.full(3, 1 / 3), 100)
+        self.assertEqual(len(users), 6)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class SeedBenchmarkTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_seeder_creates_requested_objects(self):
+        seeder = BenchmarkSeeder(seed=7, batch_size=50)
+        seeder.users(30)
+        seeder.groups(4)
+        seeder.posts(200, image_share=0.5)
+        seeder.follows(100)
+        seeder.comments(300)
+
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Group.objects.count(), 4)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Follow.objects.count(), 100)
+        self.assertEqual(Comment.objects.count(), 300)
+        self.assertTrue(Post.objects.exclude(image="").exists())
+        self.assertTrue(Post.objects.filter(image="").exists())
+
+        dates = list(
+            Post.objects.order_by("id").values_list("pub_date", flat=True))
+        self.assertEqual(dates, sorted(dates))
+        self.assertFalse(
+            Post.objects.filter(pub_date__gt=seeder.now).exists())
+        self.assertFalse(
+            Post.objects.filter(pub_date__lt=seeder.start).exists())
+
+        sizes = sorted(
+            Post.objects
+            .filter(group__isnull=False)
+            .order_by()
+            .values("group")
+            .annotate(count=Count("id"))
+            .values_list("count", flat=True)
+        )
+        self.assertGreater(sizes[-1], sizes[0])
+
+    def test_command_refuses_non_empty_database(self):
+        author = User.objects.create_user(username="author")
+        Post.objects.create(author=author, text="text")
+        with self.assertRaises(CommandError):
+            call_command("seed_benchmark", scale=0.0001)
+
+    def test_command_rebuilds_derived_data(self):
+        call_command(
+            "seed_benchmark",
+            users=20, groups=3, posts=50, comments=40, follows=30,
+            image_share=0, stdout=StringIO(),
+        )
+        self.assertEqual(GroupStats.objects.count(), 3)
+        self.assertGreater(
+            Post.objects.filter(trending_score__gt=0).count(), 0)
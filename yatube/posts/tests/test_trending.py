@@ -0,0 +1,97 @@
+import datetime as dt
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from io import StringIO
+
+from core.tasks import run_pending
+
+from ..models import Comment, Group, Post
+from ..trending import activity, combine
+
+User = get_user_model()
+
+
+class TrendingScoreTests(TestCase):
+    def test_decay_keeps_order_without_rescoring(self):
+        now = dt.datetime(2024, 1, 1, tzinfo=dt.timezone.utc)
+        day_ago = now - dt.timedelta(days=1)
+
+        self.assertAlmostEqual(
+            activity(2, day_ago), activity(1, now))
+        self.assertAlmostEqual(
+            combine(activity(1, day_ago), activity(1, day_ago)),
+            activity(1, now),
+        )
+        self.assertGreater(activity(1, now), activity(1.9, day_ago))
+
+
+@override_settings(PERF_SAMPLE_RATE=0)
+class TrendingViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="user")
+        cls.quiet_group = Group.objects.create(
+            title="quiet", slug="quiet", description="quiet")
+        cls.busy_group = Group.objects.create(
+            title="busy", slug="busy", description="busy")
+        cls.quiet_post = Post.objects.create(
+            author=cls.user, group=cls.quiet_group, text="quiet")
+        cls.busy_post = Post.objects.create(
+            author=cls.user, group=cls.busy_group, text="busy")
+        run_pending()
+
+    def setUp(self):
+        self.auth_client = Client()
+        self.auth_client.force_login(TrendingViewTests.user)
+
+    def _ranking(self):
+        response = self.auth_client.get(reverse("posts:trending"))
+        return (
+            [post.id for post in response.context["posts"]],
+            [group.id for group in response.context["groups"]],
+        )
+
+    def test_comments_raise_post_and_group(self):
+        busy_post = TrendingViewTests.busy_post
+        quiet_post = TrendingViewTests.quiet_post
+        Post.objects.filter(pk=busy_post.pk).update(trending_score=0)
+        Group.objects.filter(pk=busy_post.group_id).update(trending_score=0)
+
+        for _ in range(4):
+            self.auth_client.post(
+                reverse("posts:add_comment", kwargs={"post_id": busy_post.id}),
+                data={"text": "comment"},
+            )
+        run_pending()
+
+        posts, groups = self._ranking()
+        self.assertEqual(posts[:2], [busy_post.id, quiet_post.id])
+        self.assertEqual(
+            groups[:2], [busy_post.group_id, quiet_post.group_id])
+
+    def test_posts_load_only_card_fields(self):
+        response = self.auth_client.get(reverse("posts:trending"))
+        post = response.context["posts"][0]
+        self.assertIn("password", post.author.get_deferred_fields())
+        self.assertIn("description", post.group.get_deferred_fields())
+        self.assertNotIn("text", post.get_deferred_fields())
+
+    def test_rebuild_matches_incremental_scores(self):
+        busy_post = TrendingViewTests.busy_post
+        Comment.objects.create(
+            post=busy_post, author=TrendingViewTests.user, text="comment")
+        run_pending()
+        incremental = self._ranking()
+        expected = Post.objects.get(pk=busy_post.pk).trending_score
+
+        Post.objects.update(trending_score=0)
+        Group.objects.update(trending_score=0)
+        call_command("rebuild_trending", stdout=StringIO())
+
+        self.assertEqual(self._ranking(), incremental)
+        self.assertAlmostEqual(
+            Post.objects.get(pk=busy_post.pk).trending_score, expected)
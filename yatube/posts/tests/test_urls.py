@@ -1,6 +1,6 @@
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from http import HTTPStatus
 
 from ..models import Follow, Post, Group, Comment
@@ -8,6 +8,7 @@ from ..models import Follow, Post, Group, Comment
 User = get_user_model()
 
 
+@override_settings(PERF_SAMPLE_RATE=0)
 class PostURLTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -10,15 +10,16 @@ from django.urls import reverse
 from django import forms
 from http import HTTPStatus
 
+from ..follows import following_ids
 from ..models import Follow, Post, Group
-from ..views import POSTS_PER_PAGE
+from ..views import MAX_POSTS_PER_PAGE, POSTS_PER_PAGE
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 User = get_user_model()
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, PERF_SAMPLE_RATE=0)
 class PostViewTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -222,6 +223,42 @@ class PostViewTests(TestCase):
             PostViewTests.TOTAL_POSTS_COUNT - PostViewTests.POSTS_PER_PAGE,
         )
 
+    def test_feeds_load_only_card_fields(self):
+        user = PostViewTests.user
+        for path in [
+            reverse("posts:index"),
+            reverse("posts:group_list", kwargs={"slug": "slug"}),
+            reverse("posts:profile", kwargs={"username": user.username}),
+        ]:
+            with self.subTest(path=path):
+                post = self.guest_client.get(path).context["page_obj"][0]
+                self.assertIn("password", post.author.get_deferred_fields())
+                self.assertIn("description", post.group.get_deferred_fields())
+                self.assertNotIn("text", post.get_deferred_fields())
+
+    def test_page_size_from_request(self):
+        path = reverse(
+            "posts:group_list", kwargs={"slug": PostViewTests.group.slug})
+        for per_page, expected in {
+            "3": 3,
+            str(MAX_POSTS_PER_PAGE + 1): PostViewTests.TOTAL_POSTS_COUNT,
+            "0": PostViewTests.POSTS_PER_PAGE,
+            "x": PostViewTests.POSTS_PER_PAGE,
+        }.items():
+            with self.subTest(per_page=per_page):
+                response = self.guest_client.get(path, {"per_page": per_page})
+                page = response.context["page_obj"]
+                self.assertEqual(len(page), expected)
+                self.assertLessEqual(
+                    page.paginator.per_page, MAX_POSTS_PER_PAGE)
+
+    def test_page_links_keep_page_size(self):
+        response = self.guest_client.get(
+            reverse("posts:index"), {"per_page": 3, "page": 2})
+
+        self.assertEqual(len(response.context["page_obj"]), 3)
+        self.assertContains(response, 'href="?per_page=3&amp;page=3"')
+
     def test_post_detail_page_show_correct_context(self):
         post = list(PostViewTests.posts.values())[0]
 
@@ -411,7 +448,7 @@ class PostViewTests(TestCase):
             self.assertEqual(image_first, image_second)
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, PERF_SAMPLE_RATE=0)
 class CreateFollowTest(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -422,6 +459,9 @@ class CreateFollowTest(TestCase):
     def setUp(self):
         self.guest_client = Client()
 
+    def tearDown(self):
+        cache.clear()
+
     @classmethod
     def tearDownClass(cls):
         super().tearDownClass()
@@ -529,3 +569,43 @@ class CreateFollowTest(TestCase):
         posts = response.context["page_obj"]
 
         self.assertEqual(len(posts), 0)
+
+    def test_follow_is_idempotent_and_not_self(self):
+        user = CreateFollowTest.user
+        author = CreateFollowTest.author
+
+        auth_client = Client()
+        auth_client.force_login(user)
+        for username in [author.username, author.username, user.username]:
+            auth_client.get(
+                reverse(
+                    "posts:profile_follow",
+                    kwargs={"username": username},
+                )
+            )
+
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_profile_following_state_is_cached(self):
+        user = CreateFollowTest.user
+        author = CreateFollowTest.author
+
+        auth_client = Client()
+        auth_client.force_login(user)
+        path = reverse("posts:profile", kwargs={"username": author.username})
+        self.assertFalse(auth_client.get(path).context["following"])
+
+        auth_client.get(
+            reverse(
+                "posts:profile_follow",
+                kwargs={"username": author.username},
+            )
+        )
+        self.assertTrue(auth_client.get(path).context["following"])
+
+        with self.assertNumQueries(0):
+            following = following_ids(user)
+        self.assertEqual(following, {author.id})
+
+        Follow.objects.filter(user=user).delete()
+        self.assertFalse(auth_client.get(path).context["following"])
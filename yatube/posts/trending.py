@@ -0,0 +1,129 @@
+import datetime as dt
+import math
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Comment, Group, Post
+
+TRENDING_HALF_LIFE_HOURS: int = 24
+TRENDING_WINDOW_HALF_LIVES: int = 10
+TRENDING_EPOCH = dt.datetime(2022, 1, 1, tzinfo=dt.timezone.utc)
+
+POST_WEIGHT: float = 3.0
+COMMENT_WEIGHT: float = 1.0
+
+TRENDING_POSTS_COUNT: int = 10
+TRENDING_GROUPS_COUNT: int = 10
+UPDATE_BATCH_SIZE: int = 500
+
+
+def activity(weight, when):
+    """Вклад события в рейтинг в логарифмической шкале.
+
+    Вес события w в момент t затухает как w * 2 ** (-(now - t) / T).
+    Сравнивать рейтинги можно и без множителя 2 ** (-now / T), общего
+    для всех, поэтому хранится log(w) + t * ln 2 / T, отсчитанное от
+    эпохи. Сохранённые значения не нужно пересчитывать со временем, а
+    новые события добавляются через log-sum-exp. Ноль по умолчанию
+    соответствует единичному событию в эпоху и давно затух.
+    """
+    hours = (when - TRENDING_EPOCH).total_seconds() / 3600
+    return math.log(weight) + hours * math.log(2) / TRENDING_HALF_LIFE_HOURS
+
+
+def combine(score, value):
+    """log(exp(score) + exp(value)) без переполнения."""
+    high, low = max(score, value), min(score, value)
+    return high + math.log1p(math.exp(low - high))
+
+
+def bump(model, pk, value):
+    with transaction.atomic():
+        score = (
+            model.objects
+            .select_for_update()
+            .filter(pk=pk)
+            .values_list("trending_score", flat=True)
+            .first()
+        )
+        if score is not None:
+            model.objects.filter(pk=pk).update(
+                trending_score=combine(score, value))
+
+
+def register_post(post):
+    value = activity(POST_WEIGHT, post.pub_date)
+    bump(Post, post.pk, value)
+    if post.group_id is not None:
+        bump(Group, post.group_id, value)
+
+
+def register_comment(comment):
+    value = activity(COMMENT_WEIGHT, comment.created)
+    bump(Post, comment.post_id, value)
+    if comment.post.group_id is not None:
+        bump(Group, comment.post.group_id, value)
+
+
+def trending_posts(queryset=None, limit=TRENDING_POSTS_COUNT):
+    if queryset is None:
+        queryset = Post.objects.select_related("author", "group")
+    return queryset.order_by("-trending_score")[:limit]
+
+
+def trending_groups(limit=TRENDING_GROUPS_COUNT):
+    return Group.objects.order_by("-trending_score")[:limit]
+
+
+def _store(model, scores):
+    model.objects.bulk_update(
+        [
+            model(pk=pk, trending_score=score)
+            for pk, score in scores.items()
+        ],
+        ["trending_score"],
+        batch_size=UPDATE_BATCH_SIZE,
+    )
+
+
+def rebuild_trending(now=None):
+    """Пересчитывает рейтинги с нуля по активности за окно затухания.
+
+    События старше окна дают пренебрежимо малый вклад и не читаются.
+    """
+    now = now or timezone.now()
+    since = now - dt.timedelta(
+        hours=TRENDING_HALF_LIFE_HOURS * TRENDING_WINDOW_HALF_LIVES)
+
+    post_scores = defaultdict(float)
+    group_scores = defaultdict(float)
+    events = [
+        (
+            POST_WEIGHT,
+            Post.objects
+            .filter(pub_date__gte=since)
+            .values_list("id", "group_id", "pub_date"),
+        ),
+        (
+            COMMENT_WEIGHT,
+            Comment.objects
+            .filter(created__gte=since)
+            .values_list("post_id", "post__group_id", "created"),
+        ),
+    ]
+    for weight, rows in events:
+        for post_id, group_id, when in rows.iterator():
+            value = activity(weight, when)
+            post_scores[post_id] = combine(post_scores[post_id], value)
+            if group_id is not None:
+                group_scores[group_id] = combine(
+                    group_scores[group_id], value)
+
+    with transaction.atomic():
+        Post.objects.exclude(trending_score=0).update(trending_score=0)
+        Group.objects.exclude(trending_score=0).update(trending_score=0)
+        _store(Post, post_scores)
+        _store(Group, group_scores)
+    return len(post_scores), len(group_scores)
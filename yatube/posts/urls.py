@@ -1,10 +1,12 @@
 from django.urls import path
-from . import views
+from . import api, feeds, views
 
 app_name = "posts"
 
 urlpatterns = [
     path("", views.index, name="index"),
+    path("trending/", views.trending, name="trending"),
+    path("groups/", views.group_index, name="group_index"),
     path("group/<slug:slug>/", views.group_posts, name="group_list"),
     path("profile/<str:username>/", views.profile, name="profile"),
     path("posts/<int:post_id>/", views.post_detail, name="post_detail"),
@@ -15,6 +17,11 @@ urlpatterns = [
         views.add_comment,
         name="add_comment",
     ),
+    path(
+        "posts/<int:post_id>/comments/stream/",
+        views.comment_stream,
+        name="comment_stream",
+    ),
     path("follow/", views.follow_index, name="follow_index"),
     path(
         "profile/<str:username>/follow/",
@@ -26,4 +33,39 @@ urlpatterns = [
         views.profile_unfollow,
         name="profile_unfollow",
     ),
+    path("rss/", feeds.PostsFeed("rss"), name="index_rss"),
+    path("atom/", feeds.PostsFeed("atom"), name="index_atom"),
+    path(
+        "group/<slug:slug>/rss/",
+        feeds.GroupPostsFeed("rss"),
+        name="group_rss",
+    ),
+    path(
+        "group/<slug:slug>/atom/",
+        feeds.GroupPostsFeed("atom"),
+        name="group_atom",
+    ),
+    path(
+        "profile/<str:username>/rss/",
+        feeds.AuthorPostsFeed("rss"),
+        name="profile_rss",
+    ),
+    path(
+        "profile/<str:username>/atom/",
+        feeds.AuthorPostsFeed("atom"),
+        name="profile_atom",
+    ),
+    path("api/posts/", api.index, name="api_index"),
+    path("api/posts/batch/", api.post_batch, name="api_post_batch"),
+    path("api/posts/new/", api.index_new, name="api_index_new"),
+    path(
+        "api/posts/<int:post_id>/",
+        api.post_detail,
+        name="api_post_detail",
+    ),
+    path("api/group/<slug:slug>/", api.group_posts, name="api_group_list"),
+    path("api/profile/<str:username>/", api.profile, name="api_profile"),
+    path("api/follow/", api.follow_index, name="api_follow_index"),
+    path("api/follow/new/", api.follow_new, name="api_follow_new"),
+    path("api/following/", api.following, name="api_following"),
 ]
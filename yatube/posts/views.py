@@ -1,66 +1,147 @@
+from http import HTTPStatus
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views.decorators.cache import cache_page
-
-from .models import Post, User, Group, Follow
+from django.views.decorators.http import require_GET
+
+from core.budgets import query_budget
+from core.paging import page_size
+from core.pubsub import bus
+from core.throttling import rate_limit
+from .events import (
+    SSE_OVERLOAD_RETRY,
+    CommentStream,
+    comment_channel,
+    comment_message,
+    publish_comment,
+    stream_slots,
+)
+from .follows import (
+    author_ids,
+    follow_authors,
+    following_ids,
+    recommended_authors,
+    unfollow_authors,
+)
+from .models import Comment, Post, User, Group
+from .trending import trending_groups, trending_posts
 from .forms import PostForm, CommentForm
+from .group_stats import histograms
 
 POSTS_PER_PAGE: int = 10
+MAX_POSTS_PER_PAGE: int = 50
+GROUPS_PER_PAGE: int = 20
+MAX_GROUPS_PER_PAGE: int = 100
+
+# Поля, которые выводит карточка поста includes/article.html.
+POST_CARD_FIELDS = (
+    "id",
+    "text",
+    "pub_date",
+    "image",
+    "author",
+    "author__username",
+    "author__first_name",
+    "author__last_name",
+    "group",
+    "group__slug",
+)
 
 
-def page_obj(post_list, page_number):
-    paginator = Paginator(post_list, POSTS_PER_PAGE)
-    return paginator.get_page(page_number)
+def post_cards(queryset):
+    return queryset.select_related("author", "group").only(*POST_CARD_FIELDS)
 
 
+def page_obj(object_list, request, per_page=POSTS_PER_PAGE,
+             max_per_page=MAX_POSTS_PER_PAGE):
+    paginator = Paginator(
+        object_list, page_size(request, per_page, max_per_page))
+    return paginator.get_page(request.GET.get("page"))
+
+
+@query_budget(3)
 @cache_page(20, key_prefix="index_page")
 def index(request):
-    post_list = Post.objects.select_related("group", "author").all()
+    post_list = post_cards(Post.objects.all())
 
     context = {
-        "page_obj": page_obj(post_list, request.GET.get("page")),
+        "page_obj": page_obj(post_list, request),
     }
     return render(request, "posts/index.html", context)
 
 
+@query_budget(3)
+def trending(request):
+    context = {
+        "posts": trending_posts(post_cards(Post.objects.all())),
+        "groups": trending_groups(),
+    }
+    return render(request, "posts/trending.html", context)
+
+
+@query_budget(4)
+def group_index(request):
+    groups = (
+        Group.objects
+        .select_related("stats")
+        .only("title", "slug", "stats__post_count", "stats__last_post_at")
+        .order_by("title")
+    )
+    page = page_obj(groups, request, GROUPS_PER_PAGE, MAX_GROUPS_PER_PAGE)
+
+    counts = histograms([group.id for group in page])
+    peak = max((max(days) for days in counts.values()), default=0) or 1
+    for group in page:
+        group.histogram = [
+            (count, round(100 * count / peak)) for count in counts[group.id]
+        ]
+
+    return render(request, "posts/group_index.html", {"page_obj": page})
+
+
+@query_budget(4)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
 
-    post_list = Post.objects.select_related("author").filter(group=group).all()
+    post_list = post_cards(Post.objects.filter(group=group))
 
     context = {
         "group": group,
-        "page_obj": page_obj(post_list, request.GET.get("page")),
+        "page_obj": page_obj(post_list, request),
     }
     return render(request, "posts/group_list.html", context)
 
 
+@query_budget(7)
 def profile(request, username):
     user = request.user
     author = get_object_or_404(User, username=username)
 
     following = False
+    recommendations = []
     if user.is_authenticated:
-        following = Follow.objects.filter(user=user, author=author).exists()
+        following = author.id in following_ids(user)
+        recommendations = recommended_authors(user)
 
     post_count = Post.objects.filter(author=author).count()
 
-    post_list = (
-        Post.objects
-        .select_related("author", "group")
-        .filter(author=author)
-        .all())
+    post_list = post_cards(Post.objects.filter(author=author))
 
     context = {
         "post_count": post_count,
         "author": author,
-        "page_obj": page_obj(post_list, request.GET.get("page")),
+        "page_obj": page_obj(post_list, request),
         "following": following,
+        "recommendations": recommendations,
     }
     return render(request, "posts/profile.html", context)
 
 
+@query_budget(4)
 def post_detail(request, post_id):
     post = get_object_or_404(
         Post.objects.select_related("author", "group"), id=post_id)
@@ -68,7 +149,9 @@ def post_detail(request, post_id):
     post_count = Post.objects.filter(author=post.author).count()
 
     context = {
-        "comments": post.comments.all(),
+        "comments": post.comments.select_related("author"),
+        "comment_stream": (
+            request.user.is_authenticated and settings.SSE_MAX_STREAMS > 0),
         "form": CommentForm(),
         "post": post,
         "post_count": post_count,
@@ -76,7 +159,9 @@ def post_detail(request, post_id):
     return render(request, "posts/post_detail.html", context)
 
 
+@query_budget(6)
 @login_required
+@rate_limit("post", methods=["POST"])
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
 
@@ -90,6 +175,7 @@ def post_create(request):
     return render(request, "posts/create_post.html", {"form": form})
 
 
+@query_budget(8)
 @login_required
 def post_edit(request, post_id):
     post = get_object_or_404(
@@ -112,7 +198,9 @@ def post_edit(request, post_id):
     return render(request, "posts/create_post.html", context)
 
 
+@query_budget(5)
 @login_required
+@rate_limit("comment", methods=["POST"])
 def add_comment(request, post_id):
     post = get_object_or_404(
         Post.objects.select_related("author", "group"), id=post_id)
@@ -124,41 +212,87 @@ def add_comment(request, post_id):
         comment.author = request.user
         comment.post = post
         comment.save()
+        publish_comment(comment)
 
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@query_budget(2)
 @login_required
-def follow_index(request):
-    posts = (
-        Post.objects
-        .filter(author__following__user=request.user)
-        .select_related("group", "author")
-        .all()
+@require_GET
+def comment_stream(request, post_id):
+    if not Post.objects.filter(id=post_id).exists():
+        raise Http404
+
+    if not stream_slots.acquire(blocking=False):
+        # EventSource не переподключается сам после 503, страница
+        # повторит попытку через Retry-After.
+        response = HttpResponse(status=HTTPStatus.SERVICE_UNAVAILABLE)
+        response["Retry-After"] = SSE_OVERLOAD_RETRY
+        return response
+
+    # Подписка оформляется до чтения пропущенного, чтобы не потерять
+    # комментарии, добавленные между запросом к базе и подпиской.
+    subscription = bus.subscribe(comment_channel(post_id))
+    try:
+        backlog = []
+        last_event_id = (
+            request.META.get("HTTP_LAST_EVENT_ID")
+            or request.GET.get("after")
+        )
+        if last_event_id and last_event_id.isdigit():
+            backlog = [
+                comment_message(comment)
+                for comment in (
+                    Comment.objects
+                    .select_related("author")
+                    .filter(post_id=post_id, id__gt=int(last_event_id))
+                    .order_by("id")
+                )
+            ]
+    except Exception:
+        subscription.close()
+        stream_slots.release()
+        raise
+
+    response = StreamingHttpResponse(
+        CommentStream(subscription, backlog),
+        content_type="text/event-stream",
     )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@query_budget(5)
+@login_required
+def follow_index(request):
+    posts = post_cards(
+        Post.objects.filter(author__following__user=request.user))
 
     context = {
-        "page_obj": page_obj(posts, request.GET.get("page")),
+        "page_obj": page_obj(posts, request),
+        "recommendations": recommended_authors(request.user),
     }
 
     return render(request, 'posts/follow.html', context)
 
 
+@query_budget(4)
 @login_required
+@rate_limit("follow")
 def profile_follow(request, username):
-    user = request.user
-    author = get_object_or_404(User, username=username)
-    if user != author:
-        Follow.objects.get_or_create(
-            user=request.user,
-            author=author
-        )
+    ids = author_ids([username])
+    if not ids:
+        raise Http404
+    follow_authors(request.user, ids)
     return redirect("posts:profile", username=username)
 
 
+@query_budget(4)
 @login_required
+@rate_limit("follow")
 def profile_unfollow(request, username):
-    follow = get_object_or_404(
-        Follow.objects, user=request.user, author__username=username)
-    follow.delete()
+    if not unfollow_authors(request.user, author_ids([username])):
+        raise Http404
     return redirect("posts:profile", username=username)
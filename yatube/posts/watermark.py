@@ -0,0 +1,31 @@
+from django.core.cache import cache
+
+from .models import Post
+
+HIGH_WATER_KEY = "posts:high_water"
+# Сброс при новом посте виден только процессу, где пост создан, если
+# кэш не общий; запрос по индексу дешёвый, поэтому срок — секунды.
+HIGH_WATER_TIMEOUT: int = 5
+
+
+def high_water():
+    """Возвращает (id, дату публикации) самого нового поста.
+
+    Значение берётся по индексу первичного ключа и хранится в кэше
+    несколько секунд или до создания или удаления поста, так что частый
+    опрос ленты обычно обходится без запросов к базе.
+    """
+    mark = cache.get(HIGH_WATER_KEY)
+    if mark is None:
+        mark = (
+            Post.objects
+            .order_by("-id")
+            .values_list("id", "pub_date")
+            .first()
+        ) or (0, None)
+        cache.set(HIGH_WATER_KEY, mark, HIGH_WATER_TIMEOUT)
+    return mark
+
+
+def reset_high_water():
+    cache.delete(HIGH_WATER_KEY)
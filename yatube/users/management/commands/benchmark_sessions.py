@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+User = get_user_model()
+
+DB_SESSION_ENGINE: str = "django.contrib.sessions.backends.db"
+
+
+class Command(BaseCommand):
+    help = (
+        "Считает запросы к таблице сессий на авторизованных запросах "
+        "для сессий в базе и для текущего SESSION_ENGINE"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests", type=int, default=20,
+            help="Количество запросов к странице",
+        )
+        parser.add_argument(
+            "--path", default=None,
+            help="Страница для запросов, по умолчанию лента подписок",
+        )
+
+    def count_queries(self, engine, path, requests):
+        with override_settings(SESSION_ENGINE=engine):
+            with transaction.atomic():
+                user = User.objects.create_user(username="session-benchmark")
+                client = Client()
+                client.force_login(user)
+                with CaptureQueriesContext(connection) as queries:
+                    for _ in range(requests):
+                        client.get(path)
+                transaction.set_rollback(True)
+        session_queries = sum(
+            "django_session" in query["sql"]
+            for query in queries.captured_queries
+        )
+        return session_queries, len(queries)
+
+    def handle(self, *args, **options):
+        path = options["path"] or reverse("posts:follow_index")
+        requests = options["requests"]
+        for engine in (DB_SESSION_ENGINE, settings.SESSION_ENGINE):
+            session_queries, total = self.count_queries(
+                engine, path, requests)
+            self.stdout.write(
+                f"{engine}: запросов к сессиям "
+                f"{session_queries / requests:.2f}, "
+                f"всего {total / requests:.2f} на запрос страницы"
+            )
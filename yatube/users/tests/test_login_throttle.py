@@ -0,0 +1,106 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from http import HTTPStatus
+
+from core.metrics import registry as metrics
+from core.throttling import TokenBucket
+
+User = get_user_model()
+
+
+@override_settings(
+    LOGIN_THROTTLE_IP_BURST=5,
+    LOGIN_THROTTLE_IP_RATE=1 / 60,
+    LOGIN_THROTTLE_USER_BURST=3,
+    LOGIN_THROTTLE_USER_RATE=1 / 60,
+    PERF_SAMPLE_RATE=0,
+)
+class LoginThrottleTests(TestCase):
+    def setUp(self):
+        self.guest_client = Client()
+        User.objects.create_user(username="user", password="password")
+        metrics.reset()
+
+    def tearDown(self):
+        cache.clear()
+        metrics.reset()
+
+    def _login(self, username, password="wrong", ip="127.0.0.1"):
+        return self.guest_client.post(
+            reverse("users:login"),
+            {"username": username, "password": password},
+            REMOTE_ADDR=ip,
+        )
+
+    def test_rejected_before_password_check(self):
+        for _ in range(3):
+            self.assertEqual(self._login("user").status_code, HTTPStatus.OK)
+
+        with mock.patch("django.contrib.auth.forms.authenticate") as check:
+            response = self._login("user", "password")
+
+        check.assert_not_called()
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertGreater(int(response["Retry-After"]), 0)
+        self.assertTemplateUsed(response, "core/429.html")
+        text = self.guest_client.get(reverse("metrics")).content.decode()
+        for outcome, count in [("allowed", 3), ("rejected", 1)]:
+            self.assertIn(
+                f'yatube_throttle_requests_total{{outcome="{outcome}",'
+                f'scope="login-user"}} {count}',
+                text,
+            )
+
+    def test_ip_limited_across_usernames(self):
+        for i in range(5):
+            self.assertEqual(
+                self._login(f"user_{i}").status_code, HTTPStatus.OK)
+
+        response = self._login("other")
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+
+    def test_successful_login_within_limit(self):
+        response = self._login("user", "password")
+        self.assertRedirects(response, reverse("posts:index"))
+
+    def test_successful_logins_not_counted(self):
+        for _ in range(5):
+            response = self._login("user", "password")
+            self.assertRedirects(response, reverse("posts:index"))
+            self.guest_client.logout()
+
+    def test_failures_from_other_ip_do_not_lock_account(self):
+        for _ in range(3):
+            self._login("user", ip="10.0.0.2")
+        self.assertEqual(
+            self._login("user", ip="10.0.0.2").status_code,
+            HTTPStatus.TOO_MANY_REQUESTS,
+        )
+
+        response = self._login("user", "password")
+        self.assertRedirects(response, reverse("posts:index"))
+
+
+class TokenBucketTests(TestCase):
+    def tearDown(self):
+        cache.clear()
+
+    def test_bucket_refills_over_time(self):
+        bucket = TokenBucket("test", rate=1, burst=2)
+
+        self.assertEqual(bucket.consume("key", now=100), 0)
+        self.assertEqual(bucket.consume("key", now=100), 0)
+        self.assertEqual(bucket.consume("key", now=100), 1)
+        self.assertEqual(bucket.consume("key", now=101), 0)
+        self.assertEqual(bucket.consume("other", now=101), 0)
+
+    def test_wait_does_not_take_token(self):
+        bucket = TokenBucket("test", rate=1, burst=1)
+
+        self.assertEqual(bucket.wait("key", now=100), 0)
+        self.assertEqual(bucket.consume("key", now=100), 0)
+        self.assertEqual(bucket.wait("key", now=100), 1)
@@ -0,0 +1,87 @@
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY, get_user_model
+from django.contrib.sessions.backends.cached_db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from http import HTTPStatus
+
+from core.testing import independent_cache
+
+User = get_user_model()
+
+
+def other_process_session(session_key):
+    """Сессия, прочитанная через отдельный экземпляр кэша сессий."""
+    store = SessionStore(session_key)
+    store._cache = independent_cache(settings.SESSION_CACHE_ALIAS)
+    return store
+
+
+@override_settings(PERF_SAMPLE_RATE=0)
+class CachedSessionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="user", password="old-password")
+        self.client = Client()
+        self.client.login(username="user", password="old-password")
+
+    def tearDown(self):
+        caches[settings.SESSION_CACHE_ALIAS].clear()
+
+    def test_authenticated_request_skips_session_table(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("posts:follow_index"))
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertFalse(any(
+            "django_session" in query["sql"]
+            for query in queries.captured_queries
+        ))
+
+    def test_session_survives_cache_loss(self):
+        caches[settings.SESSION_CACHE_ALIAS].clear()
+
+        response = self.client.get(reverse("posts:follow_index"))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_password_change_logs_out_other_sessions(self):
+        other_client = Client()
+        other_client.login(username="user", password="old-password")
+
+        self.client.post(
+            reverse("users:password_change"),
+            {
+                "old_password": "old-password",
+                "new_password1": "new-secret-password",
+                "new_password2": "new-secret-password",
+            },
+        )
+
+        response = self.client.get(reverse("posts:follow_index"))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        response = other_client.get(reverse("posts:follow_index"))
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    def test_logout_removes_session(self):
+        session_key = self.client.session.session_key
+
+        self.client.get(reverse("users:logout"))
+
+        self.assertFalse(
+            Session.objects.filter(session_key=session_key).exists())
+        self.assertNotIn(SESSION_KEY, self.client.session)
+        response = self.client.get(reverse("posts:follow_index"))
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    def test_logout_seen_by_other_processes(self):
+        session_key = self.client.session.session_key
+        self.assertIn(SESSION_KEY, other_process_session(session_key).load())
+
+        self.client.get(reverse("users:logout"))
+
+        self.assertNotIn(
+            SESSION_KEY, other_process_session(session_key).load())
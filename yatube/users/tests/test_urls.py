@@ -1,10 +1,11 @@
 from django.contrib.auth import get_user_model
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from http import HTTPStatus
 
 User = get_user_model()
 
 
+@override_settings(PERF_SAMPLE_RATE=0)
 class AuthURLTests(TestCase):
     def setUp(self):
         self.guest_client = Client()
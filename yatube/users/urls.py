@@ -1,5 +1,4 @@
 from django.contrib.auth.views import (
-    LoginView,
     LogoutView,
     PasswordResetView,
     PasswordResetDoneView,
@@ -10,7 +9,7 @@ from django.contrib.auth.views import (
 )
 from django.urls import path
 
-from .views import SignUp
+from .views import SignUp, ThrottledLoginView
 
 app_name = 'users'
 
@@ -24,7 +23,7 @@ urlpatterns = [
     ),
     path(
         'login/',
-        LoginView.as_view(
+        ThrottledLoginView.as_view(
             template_name='users/login.html'),
         name='login'
     ),
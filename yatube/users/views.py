@@ -1,6 +1,10 @@
+from django.conf import settings
+from django.contrib.auth.views import LoginView
 from django.views.generic import CreateView
 from django.urls import reverse_lazy
 
+from core.throttling import TokenBucket, client_ip
+from core.views import too_many_requests
 from .forms import CreationForm
 
 
@@ -8,3 +12,41 @@ class SignUp(CreateView):
     form_class = CreationForm
     success_url = reverse_lazy('posts:index')
     template_name = 'users/signup.html'
+
+
+class ThrottledLoginView(LoginView):
+    """Вход, который отклоняет частые попытки до проверки пароля.
+
+    Для имени пользователя считаются только неудачные попытки и только
+    с того же IP-адреса: иначе любой мог бы держать чужой аккаунт
+    заблокированным, отправляя его имя.
+    """
+
+    def user_bucket(self):
+        return TokenBucket(
+            'login-user',
+            settings.LOGIN_THROTTLE_USER_RATE,
+            settings.LOGIN_THROTTLE_USER_BURST,
+        )
+
+    def user_identity(self):
+        return (
+            self.request.POST.get('username', ''), client_ip(self.request))
+
+    def post(self, request, *args, **kwargs):
+        ip_bucket = TokenBucket(
+            'login-ip',
+            settings.LOGIN_THROTTLE_IP_RATE,
+            settings.LOGIN_THROTTLE_IP_BURST,
+        )
+        retry_after = max(
+            ip_bucket.consume(client_ip(request)),
+            self.user_bucket().wait(self.user_identity()),
+        )
+        if retry_after:
+            return too_many_requests(request, retry_after)
+        return super().post(request, *args, **kwargs)
+
+    def form_invalid(self, form):
+        self.user_bucket().consume(self.user_identity())
+        return super().form_invalid(form)
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -54,11 +55,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.ProfilingMiddleware",
+    "core.middleware.PerformanceMiddleware",
+    "core.middleware.QueryBudgetMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.middleware.CachedAuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
@@ -68,7 +72,7 @@ ROOT_URLCONF = "yatube.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "core.perf.InstrumentedDjangoTemplates",
         "DIRS": [os.path.join(BASE_DIR, "templates")],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -142,14 +146,115 @@ MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 LOGIN_URL = "users:login"
 LOGIN_REDIRECT_URL = "posts:index"
 
+# Ограничение попыток входа: запас попыток и скорость его восполнения
+# в попытках в секунду, отдельно для IP-адреса и для неудачных попыток
+# войти под одним именем с одного IP-адреса.
+LOGIN_THROTTLE_IP_BURST = 20
+LOGIN_THROTTLE_IP_RATE = 20 / 60
+LOGIN_THROTTLE_USER_BURST = 5
+LOGIN_THROTTLE_USER_RATE = 5 / 300
+
+# Лимиты на запись: (запросов, за секунд) на пользователя и на IP-адрес.
+RATE_LIMITS = {
+    "post": {"user": (10, 600), "ip": (30, 600)},
+    "comment": {"user": (20, 300), "ip": (60, 300)},
+    "follow": {"user": (60, 600), "ip": (200, 600)},
+}
+
 
-EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
+EMAIL_BACKEND = "core.mail.QueuedEmailBackend"
+QUEUED_EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
+# Адрес сайта для ссылок в письмах.
+SITE_URL = "http://127.0.0.1:8000"
 
 CSRF_FAILURE_VIEW = "core.views.csrf_failure"
 
 CACHES = {
+    # В продакшене тоже лучше общий для процессов: иначе подписки,
+    # отметки новых постов и лимиты каждый процесс видит по-своему до
+    # истечения коротких сроков хранения.
     "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-    }
+        "BACKEND": "core.perf.InstrumentedLocMemCache",
+    },
+    # Отдельный кэш, чтобы сессии не вытеснялись кэшем страниц. Файлы
+    # общие для всех процессов машины, поэтому выход из системы сразу
+    # действует везде. Если сайт работает на нескольких машинах, нужен
+    # общий для них кэш (Memcached, Redis) или SESSION_ENGINE
+    # "django.contrib.sessions.backends.db".
+    "sessions": {
+        "BACKEND": "core.perf.InstrumentedFileBasedCache",
+        "LOCATION": os.path.join(BASE_DIR, "session_cache"),
+        # Сверх лимита часть записей удаляется, и такие сессии снова
+        # читаются из базы.
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+}
+
+# Сессия читается из кэша, а в базу пишется только при изменении.
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+SESSION_CACHE_ALIAS = "sessions"
+
+TEST_RUNNER = "core.testing.TestRunner"
+
+THUMBNAIL_BACKEND = "core.perf.InstrumentedThumbnailBackend"
+
+# Потоки в одном процессе WSGI-сервера. Поток комментариев (SSE) держит
+# поток сервера до SSE_STREAM_TIMEOUT, поэтому сайт запускается с
+# потоками, например gunicorn --worker-class gthread --threads 8, и
+# потокам комментариев отдаётся не больше половины из них. С синхронными
+# воркерами (YATUBE_WSGI_THREADS=1) потоки комментариев выключены.
+WSGI_THREADS = int(os.environ.get("YATUBE_WSGI_THREADS", 8))
+SSE_MAX_STREAMS = WSGI_THREADS // 2
+
+# Доля запросов, для которых собираются метрики производительности.
+PERF_SAMPLE_RATE = 0.05
+
+# Каталог, куда процессы сбрасывают метрики для /metrics. Должен быть
+# общим для всех процессов на машине.
+METRICS_DIR = os.path.join(tempfile.gettempdir(), "yatube-metrics")
+
+# Профилирование запросов cProfile: доля случайных запросов и токен для
+# заголовка X-Profile-Token. Без того и другого профилировщик отключён.
+PROFILE_SAMPLE_RATE = 0
+PROFILE_TOKEN = os.environ.get("YATUBE_PROFILE_TOKEN", "")
+PROFILE_DIR = os.path.join(tempfile.gettempdir(), "yatube-profiles")
+PROFILE_KEEP = 200
+
+# Проверка бюджетов SQL-запросов view при DEBUG: "warn", "raise" или "off".
+QUERY_BUDGET_MODE = "warn"
+
+# Запросы дольше порога (мс) пишутся в лог с планом; None отключает лог.
+SLOW_QUERY_THRESHOLD_MS = 100
+# В логе бывают данные пользователей, поэтому он лежит в закрытом
+# каталоге, доступном только владельцу процесса.
+SLOW_QUERY_LOG = os.path.join(BASE_DIR, "logs", "slow-queries.log")
+SLOW_QUERY_LOG_BACKUPS = 5
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "message": {"format": "%(message)s"},
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+        "slow_queries": {
+            "class": "core.logs.PrivateRotatingFileHandler",
+            "filename": SLOW_QUERY_LOG,
+            "maxBytes": 10 * 1024 * 1024,
+            "backupCount": SLOW_QUERY_LOG_BACKUPS,
+            "formatter": "message",
+            "delay": True,
+        },
+    },
+    "loggers": {
+        "yatube.perf": {"handlers": ["console"], "level": "INFO"},
+        "yatube.query_budget": {"handlers": ["console"], "level": "WARNING"},
+        "yatube.slow_queries": {
+            "handlers": ["slow_queries"],
+            "level": "INFO",
+            "propagate": False,
+        },
+    },
 }